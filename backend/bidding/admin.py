@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Bid, BidHistory
+from .models import Bid, BidHistory, ProxyBid
+from .services import complete_bids
 
 
 @admin.register(BidHistory)
@@ -13,6 +14,16 @@ class BidHistoryAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('bid', 'team')
 
 
+@admin.register(ProxyBid)
+class ProxyBidAdmin(admin.ModelAdmin):
+    list_display = ['bid', 'team', 'max_amount', 'updated_at']
+    search_fields = ['team__name', 'bid__prospect__name']
+    readonly_fields = ['created_at', 'updated_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('bid__prospect', 'team')
+
+
 @admin.register(Bid)
 class BidAdmin(admin.ModelAdmin):
     list_display = ['prospect', 'nominator', 'current_bidder', 'current_bid', 'status', 'created_at']
@@ -33,14 +44,22 @@ class BidAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('prospect', 'nominator', 'current_bidder')
     
+    def save_model(self, request, obj, form, change):
+        previous_bidder = None
+        if change:
+            previous_bidder = Bid.objects.get(pk=obj.pk).current_bidder
+        super().save_model(request, obj, form, change)
+        
+        # Manual edits bypass the bidding flow, so recompute the affected committed POM
+        obj.current_bidder.reconcile_committed_pom()
+        if previous_bidder and previous_bidder != obj.current_bidder:
+            previous_bidder.reconcile_committed_pom()
+    
     actions = ['complete_selected_bids', 'cancel_selected_bids']
     
     def complete_selected_bids(self, request, queryset):
         """Admin action to complete selected bids"""
-        completed_count = 0
-        for bid in queryset.filter(status='active'):
-            if bid.complete_bid():
-                completed_count += 1
+        completed_count = len(complete_bids(queryset))
         
         self.message_user(
             request, 
@@ -52,8 +71,8 @@ class BidAdmin(admin.ModelAdmin):
         """Admin action to cancel selected bids"""
         cancelled_count = 0
         for bid in queryset.filter(status='active'):
-            bid.cancel_bid()
-            cancelled_count += 1
+            if bid.cancel_bid():
+                cancelled_count += 1
         
         self.message_user(
             request, 
@@ -1,11 +1,215 @@
+import asyncio
 import json
+import logging
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
-from .models import Bid
+from teams.models import Team
+from .events import (
+    BIDDING_STREAM,
+    bidding_snapshot,
+    encode_event,
+    event_log,
+    matches_topics,
+    snapshot_cache,
+    team_snapshot,
+    team_stream,
+    topic_group
+)
+from .models import Bid, BidOutbid
+from .send_queue import SendQueue
+from .services import BidRequestError, nominate_for_team, place_bid_for_team
 
+logger = logging.getLogger(__name__)
 
-class BiddingConsumer(AsyncWebsocketConsumer):
+
+# Subscription message keys and the topic kind each one filters on
+SUBSCRIPTION_TOPICS = {
+    'bids': 'bid',
+    'prospects': 'prospect',
+    'positions': 'position',
+    'organizations': 'organization',
+}
+MAX_SUBSCRIPTION_TOPICS = 100
+
+
+class SequencedStreamMixin:
+    """Forward sequenced events and let reconnecting clients resume a stream from a sequence number"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Last sequence number forwarded per stream
+        self.delivered_seqs = {}
+        # Outbound events, sent in order by the sender task so slow clients get coalesced updates
+        self.send_queue = SendQueue()
+        self.sender = None
+    
+    async def accept(self, subprotocol=None, headers=None):
+        """Accept the connection, echoing the subprotocol the access token was sent with"""
+        await super().accept(subprotocol or self.scope.get('auth_subprotocol'), headers)
+    
+    async def forward_event(self, event):
+        """Forward a live event once, even if this socket is in several groups it was sent to"""
+        stream, seq = event.get('stream'), event.get('seq')
+        if seq is not None:
+            if seq <= self.delivered_seqs.get(stream, 0):
+                return
+            self.delivered_seqs[stream] = seq
+        self.queue_event(event)
+    
+    def queue_event(self, event):
+        """Queue an event for the sender task"""
+        self.send_queue.put_event(event)
+        self.start_sender()
+    
+    def queue_snapshot(self, stream):
+        """Queue a snapshot of stream for the sender task"""
+        self.send_queue.put_snapshot(stream)
+        self.start_sender()
+    
+    def start_sender(self):
+        if self.sender is None:
+            self.sender = asyncio.ensure_future(self.run_sender())
+    
+    async def run_sender(self):
+        """Send queued entries one at a time, in order"""
+        while True:
+            entry = await self.send_queue.get()
+            try:
+                if entry[0] == 'coalesced':
+                    # Sequence numbers superseded by a newer event about the same bid
+                    await self.send(text_data=json.dumps({'type': 'coalesced', 'stream': entry[1], 'seqs': entry[2]}))
+                elif entry[0] == 'snapshot':
+                    await self.send_snapshot(entry[1])
+                else:
+                    await self.send_event(entry[1])
+            except Exception:
+                logger.exception(f"❌ Failed to send queued {entry[0]} on WebSocket")
+    
+    async def websocket_disconnect(self, message):
+        """Stop the sender task before the consumer shuts down"""
+        if self.sender is not None:
+            self.sender.cancel()
+        counts = self.send_queue.counts
+        if counts['coalesced'] or counts['dropped']:
+            logger.info(f"📢 WebSocket send queue closed: {counts['sent']} sent, {counts['coalesced']} coalesced, {counts['dropped']} dropped")
+        await super().websocket_disconnect(message)
+    
+    async def send_event(self, event):
+        """Forward a channel layer event to the WebSocket, using its pre-encoded frame when present"""
+        text = event.get('text')
+        if text is None:
+            text = encode_event(event)
+        await self.send(text_data=text)
+    
+    def get_snapshot(self, stream):
+        """Build the full-state snapshot of stream (sent on connect or when a resume gap is too old)"""
+        raise NotImplementedError
+    
+    def wants_snapshot(self):
+        """Whether the client opted in to a snapshot on connect (?snapshot=1)"""
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        return query.get('snapshot', [''])[0].lower() in ('1', 'true', 'yes')
+    
+    async def send_snapshot(self, stream):
+        """Send the shared, cached encoding of the stream's current snapshot"""
+        text = await database_sync_to_async(snapshot_cache.get)(stream, lambda: self.get_snapshot(stream))
+        await self.send(text_data=text)
+    
+    def streams(self):
+        """Streams this socket carries; the first is the default for resume and snapshot requests"""
+        raise NotImplementedError
+    
+    def replay_filter(self, stream):
+        """Topic groups that replayed events must match, or None to replay everything"""
+        return None
+    
+    async def resume(self, stream, last_seq):
+        """Replay events after last_seq, or send a snapshot if the gap is too old"""
+        events = await database_sync_to_async(event_log.since)(stream, last_seq)
+        if events is None:
+            self.queue_snapshot(stream)
+            return
+        topics = self.replay_filter(stream)
+        for event in events:
+            if topics is None or matches_topics(event, topics):
+                self.queue_event(event)
+    
+    async def handle_stream_message(self, message_type, data):
+        """Handle resume and snapshot requests for one of this socket's streams.
+        
+        Returns False if message_type is not a stream message.
+        """
+        if message_type not in ('resume', 'snapshot'):
+            return False
+        streams = self.streams()
+        stream = data.get('stream') or (streams[0] if streams else None)
+        if stream in streams:
+            if message_type == 'resume':
+                await self.resume(stream, int(data.get('last_seq') or 0))
+            else:
+                self.queue_snapshot(stream)
+        return True
+    
+    async def get_team_id(self):
+        """Team ID of the connected user, looked up once and cached in the connection scope"""
+        if 'team_id' not in self.scope:
+            user = self.scope.get('user')
+            team_id = None
+            if user and not isinstance(user, AnonymousUser):
+                team_id = await self.lookup_team_id(user)
+            self.scope['team_id'] = team_id
+        return self.scope['team_id']
+    
+    @database_sync_to_async
+    def lookup_team_id(self, user):
+        """Get team ID for user (a User, or a TokenUser that only carries the id)"""
+        try:
+            return Team.objects.filter(owner_id=user.id).values_list('id', flat=True).first()
+        except AttributeError:
+            return None
+
+
+class TeamStreamMixin:
+    """Join the connected user's private team stream and forward its events"""
+    
+    async def join_team_stream(self):
+        team_id = await self.get_team_id()
+        if team_id:
+            await self.channel_layer.group_add(
+                team_stream(team_id),
+                self.channel_name
+            )
+            
+            if self.wants_snapshot():
+                self.queue_snapshot(team_stream(team_id))
+    
+    async def leave_team_stream(self):
+        team_id = self.scope.get('team_id')
+        if team_id:
+            await self.channel_layer.group_discard(
+                team_stream(team_id),
+                self.channel_name
+            )
+    
+    async def team_update(self, event):
+        """Send team update to WebSocket"""
+        await self.forward_event(event)
+    
+    async def prospect_acquired(self, event):
+        """Send prospect acquisition notification to WebSocket"""
+        await self.forward_event(event)
+    
+    async def outbid(self, event):
+        """Send outbid notification to WebSocket"""
+        await self.forward_event(event)
+
+
+class BiddingConsumer(SequencedStreamMixin, AsyncWebsocketConsumer):
+    # Topic groups this socket is subscribed to, or None for the whole bidding feed
+    subscription = None
+    
     async def connect(self):
         """Handle WebSocket connection"""
         # Accept the connection
@@ -13,17 +217,21 @@ class BiddingConsumer(AsyncWebsocketConsumer):
         
         # Join the bidding room
         await self.channel_layer.group_add(
-            "bidding_updates",
+            BIDDING_STREAM,
             self.channel_name
         )
+        
+        if self.wants_snapshot():
+            self.queue_snapshot(BIDDING_STREAM)
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
-        # Leave the bidding room
-        await self.channel_layer.group_discard(
-            "bidding_updates",
-            self.channel_name
-        )
+        # Leave the bidding room (or the topic groups of a filtered subscription)
+        for group in self.subscription or {BIDDING_STREAM}:
+            await self.channel_layer.group_discard(
+                group,
+                self.channel_name
+            )
     
     async def receive(self, text_data):
         """Handle incoming WebSocket messages"""
@@ -46,88 +254,202 @@ class BiddingConsumer(AsyncWebsocketConsumer):
                         f"bid_{bid_id}",
                         self.channel_name
                     )
+            
+            elif message_type == 'subscribe':
+                await self.subscribe(data)
+            
+            elif message_type == 'place_bid':
+                await self.receive_place_bid(data)
+            
+            elif message_type == 'nominate':
+                await self.receive_nominate(data)
+            
+            else:
+                await self.handle_stream_message(message_type, data)
         
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, TypeError, ValueError):
             pass
     
-    async def bid_update(self, event):
-        """Send bid update to WebSocket"""
+    async def subscribe(self, data):
+        """Filter the feed to the given bids, prospects, positions and organizations.
+        
+        With "involved" the socket also receives events about auctions the user's
+        team has nominated or bid on. An empty subscription restores the whole feed.
+        """
+        topics = set()
+        for key, kind in SUBSCRIPTION_TOPICS.items():
+            values = data.get(key) or []
+            if not isinstance(values, list):
+                raise ValueError(f"{key} must be a list")
+            topics.update(topic_group(kind, value) for value in values)
+        
+        if data.get('involved'):
+            team_id = await self.get_team_id()
+            if team_id:
+                topics.add(topic_group('involved', team_id))
+        
+        if len(topics) > MAX_SUBSCRIPTION_TOPICS:
+            raise ValueError("Too many subscription topics")
+        
+        current = self.subscription or {BIDDING_STREAM}
+        requested = topics or {BIDDING_STREAM}
+        for group in requested - current:
+            await self.channel_layer.group_add(group, self.channel_name)
+        for group in current - requested:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.subscription = topics or None
+        
         await self.send(text_data=json.dumps({
-            'type': 'bid_update',
-            'bid_id': event['bid_id'],
-            'data': event['data']
+            'type': 'subscribed',
+            'stream': BIDDING_STREAM,
+            'topics': sorted(topics),
         }))
     
+    async def receive_place_bid(self, data):
+        """Place a bid on an auction and reply with bid_ack, bid_outbid or bid_error"""
+        request_id = data.get('request_id')
+        team_id = await self.get_team_id()
+        if not team_id:
+            await self.send_reply('bid_error', request_id, error="Log in with a team to bid")
+            return
+        
+        try:
+            bid = await database_sync_to_async(place_bid_for_team)(team_id, data.get('bid_id'), data.get('amount'))
+        except BidOutbid as e:
+            await self.send_reply('bid_outbid', request_id, bid_id=data.get('bid_id'), current_bid=e.current_bid)
+        except BidRequestError as e:
+            await self.send_reply('bid_error', request_id, error=str(e))
+        except Exception as e:
+            logger.error(f"❌ Socket bid on {data.get('bid_id')} by team {team_id} failed: {e}")
+            await self.send_reply('bid_error', request_id, error="Failed to place bid")
+        else:
+            if bid.current_bidder_id != team_id:
+                # Another team's maximum bid answered straight away
+                await self.send_reply('bid_outbid', request_id, bid_id=bid.id, current_bid=bid.current_bid)
+                return
+            await self.send_reply(
+                'bid_ack', request_id,
+                bid_id=bid.id,
+                current_bid=bid.current_bid,
+                expires_at=bid.expires_at.isoformat()
+            )
+    
+    async def receive_nominate(self, data):
+        """Nominate a prospect and reply with nominate_ack or bid_error"""
+        request_id = data.get('request_id')
+        team_id = await self.get_team_id()
+        if not team_id:
+            await self.send_reply('bid_error', request_id, error="Log in with a team to nominate")
+            return
+        
+        try:
+            bid = await database_sync_to_async(nominate_for_team)(team_id, data.get('prospect'), data.get('starting_bid'))
+        except BidRequestError as e:
+            await self.send_reply('bid_error', request_id, error=str(e))
+        except Exception as e:
+            logger.error(f"❌ Socket nomination by team {team_id} failed: {e}")
+            await self.send_reply('bid_error', request_id, error="Failed to create bid")
+        else:
+            await self.send_reply(
+                'nominate_ack', request_id,
+                bid_id=bid.id,
+                prospect_id=bid.prospect_id,
+                current_bid=bid.current_bid,
+                expires_at=bid.expires_at.isoformat()
+            )
+    
+    async def send_reply(self, reply_type, request_id, **fields):
+        """Answer a request directly, ahead of any queued stream events"""
+        await self.send(text_data=json.dumps({'type': reply_type, 'request_id': request_id, **fields}))
+    
+    def streams(self):
+        return [BIDDING_STREAM]
+    
+    def replay_filter(self, stream):
+        if stream == BIDDING_STREAM:
+            return self.subscription
+        return None
+    
+    def get_snapshot(self, stream):
+        return bidding_snapshot()
+    
+    async def bid_update(self, event):
+        """Send bid update to WebSocket"""
+        await self.forward_event(event)
+    
     async def bid_completed(self, event):
         """Send bid completion notification to WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'bid_completed',
-            'bid_id': event['bid_id'],
-            'data': event['data']
-        }))
+        await self.forward_event(event)
+    
+    async def bid_cancelled(self, event):
+        """Send bid cancellation notification to WebSocket"""
+        await self.forward_event(event)
     
     async def new_bid(self, event):
         """Send new bid notification to WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'new_bid',
-            'data': event['data']
-        }))
+        await self.forward_event(event)
+    
+    async def bid_closing_soon(self, event):
+        """Send auction closing soon notification to WebSocket"""
+        await self.forward_event(event)
     
     async def bid_placed(self, event):
         """Send bid placed notification to WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'bid_placed',
-            'bid_id': event['bid_id'],
-            'data': event['data']
-        }))
+        await self.forward_event(event)
 
 
-class TeamConsumer(AsyncWebsocketConsumer):
+class TeamConsumer(TeamStreamMixin, SequencedStreamMixin, AsyncWebsocketConsumer):
     async def connect(self):
         """Handle WebSocket connection for team-specific updates"""
         # Accept the connection
         await self.accept()
         
-        # Get user from scope
-        user = self.scope.get('user')
-        if user and not isinstance(user, AnonymousUser):
-            # Join team-specific room
-            team_id = await self.get_team_id(user)
-            if team_id:
-                await self.channel_layer.group_add(
-                    f"team_{team_id}",
-                    self.channel_name
-                )
+        # Join team-specific room
+        await self.join_team_stream()
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
-        user = self.scope.get('user')
-        if user and not isinstance(user, AnonymousUser):
-            team_id = await self.get_team_id(user)
-            if team_id:
-                await self.channel_layer.group_discard(
-                    f"team_{team_id}",
-                    self.channel_name
-                )
+        await self.leave_team_stream()
     
-    @database_sync_to_async
-    def get_team_id(self, user):
-        """Get team ID for user"""
+    async def receive(self, text_data):
+        """Handle incoming WebSocket messages"""
         try:
-            return user.team.id
-        except:
-            return None
+            data = json.loads(text_data)
+            await self.handle_stream_message(data.get('type'), data)
+        except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+            pass
     
-    async def team_update(self, event):
-        """Send team update to WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'team_update',
-            'data': event['data']
-        }))
+    def streams(self):
+        team_id = self.scope.get('team_id')
+        return [team_stream(team_id)] if team_id else []
     
-    async def prospect_acquired(self, event):
-        """Send prospect acquisition notification to WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'prospect_acquired',
-            'data': event['data']
-        })) 
\ No newline at end of file
+    def get_snapshot(self, stream):
+        return team_snapshot(self.scope['team_id'])
+
+
+class StreamConsumer(TeamStreamMixin, BiddingConsumer):
+    """One socket per client carrying both the bidding stream and the user's team stream.
+    
+    The user is authenticated and their team resolved once, on connect. Resume and
+    snapshot requests pick a stream with "stream" (the bidding stream by default),
+    and subscriptions only filter the bidding stream.
+    """
+    
+    async def connect(self):
+        """Handle WebSocket connection"""
+        await super().connect()
+        await self.join_team_stream()
+    
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection"""
+        await super().disconnect(close_code)
+        await self.leave_team_stream()
+    
+    def streams(self):
+        team_id = self.scope.get('team_id')
+        return [BIDDING_STREAM, team_stream(team_id)] if team_id else [BIDDING_STREAM]
+    
+    def get_snapshot(self, stream):
+        if stream == BIDDING_STREAM:
+            return bidding_snapshot()
+        return team_snapshot(self.scope['team_id'])
@@ -0,0 +1,321 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import deque
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Min, Prefetch
+from .models import Bid, BidEvent, BidHistory
+import logging
+
+logger = logging.getLogger(__name__)
+
+BIDDING_STREAM = 'bidding_updates'
+
+
+def team_stream(team_id):
+    return f"team_{team_id}"
+
+
+def topic_group(kind, value):
+    """Channel layer group for a subscription topic, e.g. topic_group('organization', 'Red Sox')"""
+    return f"{kind}_{re.sub(r'[^A-Za-z0-9_.-]', '-', str(value))}"[:99]
+
+
+def bid_topics(bid):
+    """Topic groups an event about bid is routed to, besides the whole bidding feed.
+    
+    Expects the bid loaded as load_bids_for_events does (prospect and history prefetched).
+    """
+    involved = {bid.nominator_id, bid.current_bidder_id}
+    involved.update(entry.team_id for entry in bid.history.all())
+    return [
+        topic_group('bid', bid.id),
+        topic_group('prospect', bid.prospect_id),
+        topic_group('position', bid.prospect.position),
+        topic_group('organization', bid.prospect.organization),
+        *[topic_group('involved', team_id) for team_id in sorted(involved)],
+    ]
+
+
+def load_bids_for_events(bid_ids):
+    """Load bids with everything build_compact_bid_payload renders"""
+    return list(
+        Bid.objects.filter(id__in=bid_ids)
+        .select_related('prospect', 'nominator__owner', 'current_bidder__owner')
+        .prefetch_related(Prefetch('history', queryset=BidHistory.objects.select_related('team__owner')))
+    )
+
+
+def bid_state(bid):
+    """Full compact state of one bid (with its teams and prospect side-loaded) for events"""
+    from .serializers import build_compact_bid_payload
+    payload = build_compact_bid_payload([bid])
+    return {
+        'bid': payload['bids'][0],
+        'included': payload['included'],
+    }
+
+
+def team_balances(team):
+    """POM balances carried on team channel events"""
+    return {
+        'team_id': team.id,
+        'pom_balance': team.pom_balance,
+        'committed_pom': team.committed_pom,
+        'available_pom': team.get_available_pom(),
+    }
+
+
+def outbid_notice(bid, previous_bid, previous_leader):
+    """Data of the outbid event for a bid's previous leader, from the in-memory state after the change.
+    
+    previous_leader is the leader's locked Team row with the released POM applied,
+    so the event carries its absolute balances.
+    """
+    return {
+        **team_balances(previous_leader),
+        'bid_id': bid.id,
+        'prospect_id': bid.prospect_id,
+        'prospect_name': bid.prospect.name,
+        'freed_pom': previous_bid,
+        'current_bid': bid.current_bid,
+        'current_bidder': bid.current_bidder.name,
+        'current_bidder_id': bid.current_bidder_id,
+        'message': f'You were outbid on {bid.prospect.name}: the current bid is now {bid.current_bid} POM',
+    }
+
+
+class MemoryEventLog:
+    """Per-stream sequence counters and a bounded ring of recent events, in process memory"""
+    
+    def __init__(self, size):
+        self.size = size
+        self._streams = {}
+        self._lock = threading.Lock()
+    
+    def append(self, stream, event):
+        with self._lock:
+            seq, ring = self._streams.get(stream, (0, None))
+            if ring is None:
+                ring = deque(maxlen=self.size)
+            seq += 1
+            event['seq'] = seq
+            ring.append((seq, event))
+            self._streams[stream] = (seq, ring)
+        return seq
+    
+    def last_seq(self, stream):
+        with self._lock:
+            return self._streams.get(stream, (0, None))[0]
+    
+    def since(self, stream, last_seq):
+        """Events after last_seq, or None if some of them are no longer retained"""
+        with self._lock:
+            seq, ring = self._streams.get(stream, (0, None))
+            if last_seq >= seq:
+                return []
+            if not ring or ring[0][0] > last_seq + 1:
+                return None
+            return [event for event_seq, event in ring if event_seq > last_seq]
+
+
+class DatabaseEventLog:
+    """Sequenced events stored as BidEvent rows, shared by every process, trimmed to size per stream"""
+    
+    def __init__(self, size):
+        self.size = size
+    
+    def append(self, stream, event):
+        while True:
+            seq = self.last_seq(stream) + 1
+            try:
+                with transaction.atomic():
+                    BidEvent.objects.create(stream=stream, seq=seq, event_type=event['type'], payload={**event, 'seq': seq})
+            except IntegrityError:
+                continue  # another process took this sequence number first
+            BidEvent.objects.filter(stream=stream, seq__lte=seq - self.size).delete()
+            return seq
+    
+    def last_seq(self, stream):
+        return BidEvent.objects.filter(stream=stream).aggregate(seq=Max('seq'))['seq'] or 0
+    
+    def since(self, stream, last_seq):
+        """Events after last_seq, or None if some of them are no longer retained"""
+        retained = BidEvent.objects.filter(stream=stream).aggregate(first=Min('seq'), last=Max('seq'))
+        if retained['last'] is None or last_seq >= retained['last']:
+            return []
+        if retained['first'] > last_seq + 1:
+            return None
+        return list(
+            BidEvent.objects.filter(stream=stream, seq__gt=last_seq)
+            .order_by('seq')
+            .values_list('payload', flat=True)
+        )
+
+
+def _create_event_log():
+    size = getattr(settings, 'BID_EVENT_REPLAY_SIZE', 500)
+    if getattr(settings, 'BID_EVENT_LOG', 'memory') == 'database':
+        return DatabaseEventLog(size)
+    return MemoryEventLog(size)
+
+
+event_log = _create_event_log()
+
+# Sequence numbers are assigned and sent under one lock so each stream is delivered in order
+_publish_lock = threading.Lock()
+
+# Event loop of the ASGI server in this process (see farm_system.asgi)
+_server_loop = None
+
+
+def bind_server_loop(loop):
+    """Record the server's event loop, so background threads send to the channel layer on it"""
+    global _server_loop
+    _server_loop = loop
+
+
+def matches_topics(event, topics):
+    """Whether an event was routed to any of the given topic groups"""
+    return bool(topics.intersection(event.get('topics', ())))
+
+
+def client_message(event):
+    """The message a WebSocket client receives for a channel layer event"""
+    message = {
+        'type': event['type'],
+        'stream': event.get('stream'),
+        'seq': event.get('seq'),
+    }
+    for key in ('bid_id', 'prospect_id'):
+        if key in event:
+            message[key] = event[key]
+    message['data'] = event['data']
+    return message
+
+
+def encode_event(event):
+    """JSON text of the client message for an event"""
+    return json.dumps(client_message(event))
+
+
+def publish(stream, event, topics=()):
+    """Sequence an event on its stream, record it for replay and send it to the stream's group.
+    
+    The event is also sent to each of the given topic groups, which sockets with
+    filtered subscriptions join instead of the whole stream. A socket in several
+    matching groups receives the same sequence number more than once and drops
+    the repeats.
+    
+    The client message is encoded once here and the groups receive only the
+    pre-encoded frame (plus routing fields), so each consumer forwards it
+    unchanged instead of re-encoding it per socket.
+    """
+    with _publish_lock:
+        event = {**event, 'stream': stream, 'topics': list(topics)}
+        event['seq'] = event_log.append(stream, event)
+        event['text'] = encode_event(event)
+        frame = {key: value for key, value in event.items() if key not in ('data', 'topics')}
+        send_to_groups([stream, *event['topics']], frame)
+    return event['seq']
+
+
+def send_to_groups(groups, message):
+    """Send one message to several channel layer groups.
+    
+    Layers that support it (the Redis layer) pipeline the sends over a pooled
+    connection; otherwise each group is sent to in turn. The in-memory layer is
+    not thread-safe, so a thread outside the server (the outbox dispatcher, the
+    expiry scheduler) hands its sends to the server's event loop and waits for
+    them, instead of running them on a loop of its own.
+    """
+    channel_layer = get_channel_layer()
+    if hasattr(channel_layer, 'group_send_many_sync'):
+        channel_layer.group_send_many_sync(groups, message)
+        return
+    if _server_loop is not None and _server_loop.is_running() and not _on_loop(_server_loop):
+        asyncio.run_coroutine_threadsafe(_group_send_all(channel_layer, groups, message), _server_loop).result()
+        return
+    group_send = async_to_sync(channel_layer.group_send)
+    for group in groups:
+        group_send(group, message)
+
+
+def _on_loop(loop):
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+async def _group_send_all(channel_layer, groups, message):
+    for group in groups:
+        await channel_layer.group_send(group, message)
+
+
+def bidding_snapshot():
+    """Current active auctions, with the bidding stream position they reflect"""
+    from .serializers import build_compact_bid_payload
+    
+    seq = event_log.last_seq(BIDDING_STREAM)
+    bids = load_bids_for_events(Bid.objects.filter(status='active').values('id'))
+    return {
+        'type': 'snapshot',
+        'stream': BIDDING_STREAM,
+        'seq': seq,
+        'data': build_compact_bid_payload(bids),
+    }
+
+
+def team_snapshot(team_id):
+    """Current balances of a team, with the team stream position they reflect"""
+    from teams.models import Team
+    
+    stream = team_stream(team_id)
+    seq = event_log.last_seq(stream)
+    return {
+        'type': 'snapshot',
+        'stream': stream,
+        'seq': seq,
+        'data': team_balances(Team.objects.get(id=team_id)),
+    }
+
+
+class SnapshotCache:
+    """Encoded snapshots shared by every connection, rebuilt only when their stream moves on.
+    
+    A snapshot is reused while its stream's sequence number is unchanged and it is
+    younger than the TTL, so a wave of reconnects costs one query and one encode.
+    Builds are serialized, so concurrent callers wait for the first build instead
+    of each querying the database.
+    """
+    
+    def __init__(self, ttl=None):
+        if ttl is None:
+            ttl = getattr(settings, 'BID_SNAPSHOT_CACHE_SECONDS', 5)
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, stream, build):
+        """Return the JSON text of the current snapshot of stream, building it with build() if stale"""
+        with self._lock:
+            seq = event_log.last_seq(stream)
+            entry = self._entries.get(stream)
+            if entry and entry[0] == seq and time.monotonic() - entry[1] < self.ttl:
+                return entry[2]
+            text = json.dumps(build())
+            self._entries[stream] = (seq, time.monotonic(), text)
+            return text
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+snapshot_cache = SnapshotCache()
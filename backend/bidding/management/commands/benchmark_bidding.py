@@ -0,0 +1,164 @@
+import random
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from django.db.models import Q
+from teams.models import Team
+from prospects.models import Prospect
+from bidding.models import Bid, BidHistory, BidOutbid, OutboxNotification
+
+
+BENCH_USER_PREFIX = 'bench_bidder_'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent bid placement and verify that no bid updates are lost'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bidders',
+            type=int,
+            default=8,
+            help='Number of teams bidding in parallel threads',
+        )
+        parser.add_argument(
+            '--bids-per-bidder',
+            type=int,
+            default=50,
+            help='Number of bid attempts made by each bidder',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the benchmark teams, prospect and bid instead of deleting them',
+        )
+
+    def handle(self, *args, **options):
+        self._cleanup()
+        teams = self._create_teams(options['bidders'])
+        bid = self._create_auction(teams[0])
+
+        results = {'placed': [], 'outbid': 0, 'rejected': 0, 'locked': 0}
+        lock = threading.Lock()
+
+        def bidder(team):
+            try:
+                for _ in range(options['bids_per_bidder']):
+                    auction = Bid.objects.select_related('prospect', 'current_bidder').get(pk=bid.pk)
+                    if auction.current_bidder_id == team.id:
+                        continue
+                    amount = auction.current_bid + random.randint(1, 3)
+                    try:
+                        auction.place_bid(team, amount)
+                        with lock:
+                            results['placed'].append((amount, team.id))
+                    except BidOutbid:
+                        with lock:
+                            results['outbid'] += 1
+                    except ValueError:
+                        with lock:
+                            results['rejected'] += 1
+                    except OperationalError:
+                        # SQLite serializes writers; a busy database is reported, not retried
+                        with lock:
+                            results['locked'] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=bidder, args=(team,)) for team in teams]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        attempts = len(results['placed']) + results['outbid'] + results['rejected'] + results['locked']
+        self.stdout.write(f"Bidders: {len(teams)}, attempts: {attempts}, elapsed: {elapsed:.2f}s")
+        self.stdout.write(f"  - Placed: {len(results['placed'])} ({len(results['placed']) / elapsed:.1f} bids/sec)")
+        self.stdout.write(f"  - Outbid (CAS lost): {results['outbid']}")
+        self.stdout.write(f"  - Rejected: {results['rejected']}")
+        self.stdout.write(f"  - Database busy: {results['locked']}")
+
+        lost_updates = self._verify(bid, teams, results['placed'])
+        if lost_updates:
+            self.stdout.write(self.style.ERROR(f'Found {lost_updates} lost or inconsistent updates.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Zero lost updates.'))
+
+        if options['keep']:
+            self._delete_notifications([team.id for team in teams], [bid.id])
+        else:
+            self._cleanup()
+
+    def _verify(self, bid, teams, placed):
+        """Count placed bids that are missing from the final auction state, history or ledger"""
+        problems = 0
+        bid.refresh_from_db()
+
+        if placed:
+            winning_amount, winning_team_id = max(placed)
+            if bid.current_bid != winning_amount or bid.current_bidder_id != winning_team_id:
+                self.stdout.write(
+                    f'  - Final state {bid.current_bid} POM by team {bid.current_bidder_id}, '
+                    f'expected {winning_amount} POM by team {winning_team_id}'
+                )
+                problems += 1
+
+        history = list(BidHistory.objects.filter(bid=bid).order_by('id').values_list('amount', flat=True))
+        problems += abs(len(history) - len(placed))
+        problems += sum(1 for earlier, later in zip(history, history[1:]) if later <= earlier)
+
+        for team in Team.objects.filter(pk__in=[team.id for team in teams]):
+            drift = team.committed_pom - team.calculate_committed_pom()
+            if drift:
+                self.stdout.write(f'  - {team.name} committed POM drifted by {drift:+d}')
+                problems += 1
+
+        return problems
+
+    def _create_teams(self, count):
+        teams = []
+        for i in range(count):
+            user = User.objects.create_user(username=f'{BENCH_USER_PREFIX}{i + 1}', password=None)
+            team = user.team
+            team.name = f'Benchmark Team {i + 1}'
+            team.pom_balance = 1_000_000
+            team.save()
+            teams.append(team)
+        return teams
+
+    def _create_auction(self, nominator):
+        prospect = Prospect.objects.create(
+            name='Benchmark Prospect',
+            position='SS',
+            organization='Benchmark',
+            date_of_birth='2005-01-01',
+            eta=2030,
+            created_by=nominator
+        )
+        bid = Bid.objects.create(
+            prospect=prospect,
+            nominator=nominator,
+            current_bidder=nominator,
+            starting_bid=5,
+            current_bid=5,
+            expires_at=Bid.calculate_expiration_time()
+        )
+        Team.adjust_committed_pom(nominator.id, 5)
+        return bid
+
+    def _cleanup(self):
+        team_ids = list(Team.objects.filter(owner__username__startswith=BENCH_USER_PREFIX).values_list('id', flat=True))
+        bid_ids = list(Bid.objects.filter(nominator_id__in=team_ids).values_list('id', flat=True))
+        self._delete_notifications(team_ids, bid_ids)
+        User.objects.filter(username__startswith=BENCH_USER_PREFIX).delete()
+
+    def _delete_notifications(self, team_ids, bid_ids):
+        """Drop the outbox notifications the run queued, so they are never sent to real sockets"""
+        OutboxNotification.objects.filter(
+            Q(task__in=['notify_bid_created', 'notify_bid_placed'], args__0__in=bid_ids)
+            | Q(task='notify_outbid', args__0__in=team_ids)
+        ).delete()
@@ -0,0 +1,123 @@
+import asyncio
+import multiprocessing
+import time
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from farm_system.channel_layers import PooledRedisChannelLayer
+from farm_system.redis_standin import RedisStandIn
+
+
+def run_worker(url, sockets, events, ready, results):
+    """One simulated Daphne process: its sockets join the bidding group and wait for every event"""
+    async def serve():
+        layer = PooledRedisChannelLayer(hosts=[url])
+        channels = [await layer.new_channel() for _ in range(sockets)]
+        for channel in channels:
+            await layer.group_add('bidding_updates', channel)
+        ready.put(True)
+
+        async def drain(channel):
+            for _ in range(events):
+                await layer.receive(channel)
+
+        await asyncio.gather(*[drain(channel) for channel in channels])
+        results.put(time.perf_counter())
+        await layer.flush()
+
+    asyncio.run(serve())
+
+
+class Command(BaseCommand):
+    help = 'Benchmark broadcast throughput through the Redis channel layer to N Daphne worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            default='1,2,4',
+            help='Comma separated worker process counts to measure',
+        )
+        parser.add_argument(
+            '--sockets',
+            type=int,
+            default=50,
+            help='Sockets connected to each worker',
+        )
+        parser.add_argument(
+            '--events',
+            type=int,
+            default=200,
+            help='Events broadcast at each worker count',
+        )
+        parser.add_argument(
+            '--topics',
+            type=int,
+            default=6,
+            help='Topic groups each event is also sent to (see bidding.events.bid_topics)',
+        )
+        parser.add_argument(
+            '--redis-url',
+            default='',
+            help='Redis server to use instead of the in-process stand-in',
+        )
+
+    def handle(self, *args, **options):
+        counts = [int(count) for count in options['workers'].split(',') if count.strip()]
+
+        standin = None
+        url = options['redis_url']
+        if not url:
+            standin = RedisStandIn()
+            url = standin.start()
+            self.stdout.write(f"Using in-process Redis stand-in at {url}")
+
+        try:
+            self.stdout.write(
+                f"{'workers':>8} {'sockets':>8} {'per-group events/s':>19} {'pipelined events/s':>19} {'deliveries/s':>13}"
+            )
+            for count in counts:
+                legacy = self._measure(url, count, options, pipelined=False)
+                pipelined = self._measure(url, count, options, pipelined=True)
+                deliveries = options['events'] * count * options['sockets'] / pipelined
+                self.stdout.write(
+                    f"{count:>8} {count * options['sockets']:>8} {options['events'] / legacy:>19.0f} "
+                    f"{options['events'] / pipelined:>19.0f} {deliveries:>13.0f}"
+                )
+        finally:
+            if standin:
+                standin.stop()
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete (wall time from first send until every worker received every event)'))
+
+    def _measure(self, url, workers, options, pipelined):
+        """Seconds to broadcast the events and have them delivered to every socket of every worker"""
+        context = multiprocessing.get_context('spawn')
+        ready, results = context.Queue(), context.Queue()
+        processes = [
+            context.Process(target=run_worker, args=(url, options['sockets'], options['events'], ready, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for _ in processes:
+            ready.get(timeout=60)
+
+        layer = PooledRedisChannelLayer(hosts=[url])
+        groups = ['bidding_updates', *[f"topic_{topic}" for topic in range(options['topics'])]]
+        group_send = async_to_sync(layer.group_send)
+
+        start = time.perf_counter()
+        for seq in range(1, options['events'] + 1):
+            frame = {'type': 'bid_update', 'stream': 'bidding_updates', 'seq': seq, 'text': '{"type": "bid_update"}'}
+            if pipelined:
+                # publish(): one pipeline over the process-wide pool
+                layer.group_send_many_sync(groups, frame)
+            else:
+                # previous publish(): one async_to_sync group_send per group
+                for group in groups:
+                    group_send(group, frame)
+        finished = max(results.get(timeout=120) for _ in processes)
+
+        for process in processes:
+            process.join()
+        layer.close_sync_pools()
+        return finished - start
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import time
+from channels.layers import InMemoryChannelLayer
+from django.core.management.base import BaseCommand
+from bidding.events import client_message, encode_event
+
+
+def sample_event(seq, history_length):
+    """A bid_placed event shaped like the ones publish() sends, with a realistic payload size"""
+    teams = {
+        str(team_id): {
+            'id': team_id,
+            'name': f"Team {team_id}",
+            'owner': f"owner{team_id}",
+            'pom_balance': 100,
+            'committed_pom': 40,
+        }
+        for team_id in range(1, 9)
+    }
+    history = [
+        {'id': entry, 'team': entry % 8 + 1, 'amount': 5 + entry, 'bid_time': '2025-06-01T12:00:00+00:00'}
+        for entry in range(history_length)
+    ]
+    return {
+        'type': 'bid_placed',
+        'stream': 'bidding_updates',
+        'seq': seq,
+        'bid_id': 1,
+        'prospect_id': 1,
+        'data': {
+            'prospect_name': 'Sample Prospect',
+            'prospect_position': 'SS',
+            'current_bid': 5 + history_length,
+            'current_bidder': 'Team 1',
+            'current_bidder_id': 1,
+            'expires_at': '2025-06-02T12:00:00+00:00',
+            'bid_id': 1,
+            'bid': {
+                'id': 1, 'prospect': 1, 'nominator': 1, 'current_bidder': 1,
+                'starting_bid': 5, 'current_bid': 5 + history_length, 'status': 'active',
+                'created_at': '2025-06-01T12:00:00+00:00', 'last_bid_time': '2025-06-01T12:00:00+00:00',
+                'completed_at': None, 'expires_at': '2025-06-02T12:00:00+00:00',
+                'time_remaining': 1440.0, 'is_expired': False, 'history': history,
+            },
+            'included': {
+                'teams': teams,
+                'prospects': {
+                    '1': {
+                        'id': 1, 'name': 'Sample Prospect', 'position': 'SS', 'organization': 'NYY',
+                        'date_of_birth': '2004-01-01', 'age': 21.4, 'level': 'AA', 'eta': 2026,
+                        'team': None, 'is_available': True, 'at_bats': 120, 'innings_pitched': '0.0',
+                        'tags_applied': 0, 'eligibility_status': 'Eligible (20 AB remaining)',
+                    }
+                },
+            },
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-event CPU cost of broadcasting to N sockets, per-socket encoding vs serialize-once'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--connections',
+            default='10,100,500,1000',
+            help='Comma separated connection counts to measure',
+        )
+        parser.add_argument(
+            '--events',
+            type=int,
+            default=20,
+            help='Number of events broadcast at each connection count',
+        )
+        parser.add_argument(
+            '--history',
+            type=int,
+            default=20,
+            help='Number of bid history entries in each event payload',
+        )
+
+    def handle(self, *args, **options):
+        counts = [int(count) for count in options['connections'].split(',') if count.strip()]
+
+        self.stdout.write(f"{'sockets':>8} {'per-socket ms/event':>20} {'encode-once ms/event':>21} {'speedup':>8}")
+        for count in counts:
+            legacy = asyncio.run(self._measure(count, options['events'], options['history'], encode_once=False))
+            encode_once = asyncio.run(self._measure(count, options['events'], options['history'], encode_once=True))
+            self.stdout.write(
+                f"{count:>8} {legacy * 1000:>20.3f} {encode_once * 1000:>21.3f} {legacy / encode_once:>7.1f}x"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete (CPU seconds measured with time.process_time)'))
+
+    async def _measure(self, connections, events, history_length, encode_once):
+        """CPU seconds per event to fan one event out through the channel layer to every socket"""
+        layer = InMemoryChannelLayer(capacity=events + 10)
+        channels = [await layer.new_channel() for _ in range(connections)]
+        for channel in channels:
+            await layer.group_add('bidding_updates', channel)
+
+        frames = []
+
+        async def send(text_data):
+            frames.append(text_data)
+
+        start = time.process_time()
+        for seq in range(1, events + 1):
+            event = sample_event(seq, history_length)
+            if encode_once:
+                # publish(): encode once, send only the frame and routing fields
+                event['text'] = encode_event(event)
+                event = {key: value for key, value in event.items() if key != 'data'}
+            await layer.group_send('bidding_updates', event)
+
+            for channel in channels:
+                received = await layer.receive(channel)
+                if encode_once:
+                    await send(received['text'])
+                else:
+                    await send(json.dumps(client_message(received)))
+            frames.clear()
+        return (time.process_time() - start) / events
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from bidding.models import Bid
+from bidding.services import complete_bids
 
 
 class Command(BaseCommand):
@@ -19,17 +20,17 @@ class Command(BaseCommand):
         expired_bids = Bid.objects.filter(
             status='active',
             expires_at__lt=timezone.now()
-        )
-        
-        if not expired_bids.exists():
-            self.stdout.write(
-                self.style.SUCCESS('No expired bids found.')
-            )
-            return
-        
-        self.stdout.write(f'Found {expired_bids.count()} expired bids.')
+        ).select_related('prospect', 'current_bidder')
         
         if options['dry_run']:
+            expired_bids = list(expired_bids)
+            if not expired_bids:
+                self.stdout.write(
+                    self.style.SUCCESS('No expired bids found.')
+                )
+                return
+            
+            self.stdout.write(f'Found {len(expired_bids)} expired bids.')
             self.stdout.write('DRY RUN - Would complete the following bids:')
             for bid in expired_bids:
                 self.stdout.write(
@@ -37,29 +38,27 @@ class Command(BaseCommand):
                 )
             return
         
-        completed_count = 0
-        for bid in expired_bids:
-            try:
-                if bid.complete_bid():
-                    completed_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'Completed bid for {bid.prospect.name} - {bid.current_bidder.name} wins for {bid.current_bid} POM'
-                        )
-                    )
-                else:
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f'Failed to complete bid for {bid.prospect.name}'
-                        )
-                    )
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(
-                        f'Error completing bid for {bid.prospect.name}: {str(e)}'
-                    )
+        try:
+            completed = complete_bids(expired_bids)
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error completing expired bids: {str(e)}')
+            )
+            return
+        
+        if not completed:
+            self.stdout.write(
+                self.style.SUCCESS('No expired bids completed.')
+            )
+            return
+        
+        for bid in completed:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Completed bid for {bid.prospect.name} - {bid.current_bidder.name} wins for {bid.current_bid} POM'
                 )
+            )
         
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully completed {completed_count} bids.')
-        ) 
\ No newline at end of file
+            self.style.SUCCESS(f'Successfully completed {len(completed)} bids.')
+        )
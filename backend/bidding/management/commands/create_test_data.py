@@ -119,6 +119,7 @@ class Command(BaseCommand):
                 status='active',
                 expires_at=timezone.now() + timedelta(minutes=5)
             )
+            Team.adjust_committed_pom(nominator.id, starting_bid)
             
             # Manually set the timestamps for testing
             bid.created_at = bid_start_times[i % len(bid_start_times)]
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from teams.models import Team
+
+
+class Command(BaseCommand):
+    help = 'Recompute committed POM for every team from active bids and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without correcting the stored committed POM',
+        )
+
+    def handle(self, *args, **options):
+        drifted_count = 0
+        
+        for team in Team.objects.all():
+            actual = team.calculate_committed_pom()
+            drift = team.committed_pom - actual
+            if not drift:
+                continue
+            
+            drifted_count += 1
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{team.name}: stored {team.committed_pom} POM, active bids total {actual} POM (drift {drift:+d})'
+                )
+            )
+            
+            if not options['dry_run']:
+                team.reconcile_committed_pom()
+        
+        if drifted_count == 0:
+            self.stdout.write(
+                self.style.SUCCESS('Committed POM matches active bids for all teams.')
+            )
+        elif options['dry_run']:
+            self.stdout.write(f'DRY RUN - {drifted_count} teams have drifted committed POM.')
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f'Corrected committed POM for {drifted_count} teams.')
+            )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from bidding.scheduler import expiry_scheduler
+
+
+class Command(BaseCommand):
+    help = 'Run the auction expiry scheduler in the foreground'
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'Starting expiry scheduler (closing soon leads: {expiry_scheduler.closing_soon_leads}s, '
+            f'resync every {expiry_scheduler.resync_interval}s)'
+        )
+        try:
+            expiry_scheduler.run()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping expiry scheduler')
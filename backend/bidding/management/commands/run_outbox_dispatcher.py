@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from bidding.outbox import outbox_dispatcher, outbox_metrics
+
+
+class Command(BaseCommand):
+    help = 'Run the notification outbox dispatcher in the foreground'
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'Starting outbox dispatcher (batches of {outbox_dispatcher.batch_size}, '
+            f'polling every {outbox_dispatcher.poll_interval}s)'
+        )
+        try:
+            outbox_dispatcher.run()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping outbox dispatcher')
+            self.stdout.write(str(outbox_metrics.snapshot()))
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bidding', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['-created_at', '-id'], name='bid_created_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='bid_status_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['nominator', '-created_at', '-id'], name='bid_nominator_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['current_bidder', 'status', '-created_at', '-id'], name='bid_bidder_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(condition=models.Q(('status__in', ['completed', 'cancelled'])), fields=['-created_at', '-id'], name='bid_closed_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bidding', '0002_bid_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BidEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stream', models.CharField(max_length=50)),
+                ('seq', models.BigIntegerField()),
+                ('event_type', models.CharField(max_length=50)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['stream', 'seq'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bidevent',
+            constraint=models.UniqueConstraint(fields=('stream', 'seq'), name='bid_event_stream_seq_unique'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:39
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0002_team_committed_pom'),
+        ('bidding', '0003_bidevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProxyBid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('max_amount', models.IntegerField(validators=[django.core.validators.MinValueValidator(5)])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('bid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proxies', to='bidding.bid')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proxy_bids', to='teams.team')),
+            ],
+            options={
+                'ordering': ['updated_at', 'id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='proxybid',
+            constraint=models.UniqueConstraint(fields=('bid', 'team'), name='proxy_bid_bid_team_unique'),
+        ),
+    ]
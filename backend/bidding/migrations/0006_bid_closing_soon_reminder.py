@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bidding', '0005_outboxnotification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bid',
+            name='reminded_deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bid',
+            name='reminded_lead',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
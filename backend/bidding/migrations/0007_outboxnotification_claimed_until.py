@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bidding', '0006_bid_closing_soon_reminder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxnotification',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
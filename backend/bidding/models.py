@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from teams.models import Team
@@ -7,6 +7,17 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Smallest raise over the current bid; proxy bids advance the price by this much
+MIN_BID_INCREMENT = 1
+
+
+class BidOutbid(ValueError):
+    """Raised when another team took the auction past the attempted amount first"""
+    
+    def __init__(self, current_bid):
+        self.current_bid = current_bid
+        super().__init__(f"You were outbid. The current bid is now {current_bid} POM")
+
 
 class Bid(models.Model):
     STATUS_CHOICES = [
@@ -28,6 +39,10 @@ class Bid(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     expires_at = models.DateTimeField(null=True, blank=True)
     
+    # Last "closing soon" reminder sent (deadline and lead), so each is sent once however many schedulers run
+    reminded_deadline = models.DateTimeField(null=True, blank=True)
+    reminded_lead = models.PositiveIntegerField(null=True, blank=True)
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -36,6 +51,16 @@ class Bid(models.Model):
             models.Index(fields=['current_bidder']),
             models.Index(fields=['last_bid_time']),
             models.Index(fields=['expires_at']),
+            # Cursor pagination: one index range scan per page of each listing
+            models.Index(fields=['-created_at', '-id'], name='bid_created_cursor_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='bid_status_cursor_idx'),
+            models.Index(fields=['nominator', '-created_at', '-id'], name='bid_nominator_cursor_idx'),
+            models.Index(fields=['current_bidder', 'status', '-created_at', '-id'], name='bid_bidder_cursor_idx'),
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='bid_closed_cursor_idx',
+                condition=models.Q(status__in=['completed', 'cancelled'])
+            ),
         ]
     
     def __str__(self):
@@ -58,11 +83,16 @@ class Bid(models.Model):
         """Check if bid has expired"""
         return self.expires_at and timezone.now() >= self.expires_at
     
-    def update_expiration_time(self):
-        """Update the expiration time based on current settings"""
+    @staticmethod
+    def calculate_expiration_time(start=None):
+        """Get the expiration time for a bid placed at start, based on current settings"""
         from django.conf import settings
         expiration_minutes = getattr(settings, 'BID_EXPIRATION_MINUTES', 1440)
-        self.expires_at = timezone.now() + timezone.timedelta(minutes=expiration_minutes)
+        return (start or timezone.now()) + timezone.timedelta(minutes=expiration_minutes)
+    
+    def update_expiration_time(self):
+        """Update the expiration time based on current settings"""
+        self.expires_at = self.calculate_expiration_time()
         self.save(update_fields=['expires_at'])
     
     def place_bid(self, team, amount):
@@ -78,65 +108,130 @@ class Bid(models.Model):
             raise ValueError(f"Bid must be higher than current bid of {self.current_bid} POM")
         
         if not team.can_afford_bid(amount, exclude_bid=self):
-            available_pom = team.get_available_pom(exclude_bid=self)
-            error_msg = (
-                f"Team cannot afford this bid. Available POM: {available_pom} "
-                f"(current balance: {team.pom_balance} POM, "
-                f"committed to other bids: {team.pom_balance - available_pom} POM)"
-            )
-            logger.warning(f"Bid failed: {error_msg}")
-            raise ValueError(error_msg)
+            raise ValueError(self._unaffordable_message(team))
         
-        # Record the bid in history
-        BidHistory.objects.create(
-            bid=self,
-            team=team,
-            amount=amount
-        )
+        now = timezone.now()
+        expires_at = self.calculate_expiration_time(now)
+        expected_bid = self.current_bid
+        expected_bidder_id = self.current_bidder_id
         
-        # Update the current bid
-        self.current_bid = amount
-        self.current_bidder = team
-        self.last_bid_time = timezone.now()
-        
-        # Save the changes to the database
-        self.save()
-        
-        # Update expiration time (extends the bid when someone bids)
-        self.update_expiration_time()
+        with transaction.atomic():
+            # Compare-and-swap: only take the lead if nobody changed the auction since we read it.
+            # On a lost race re-read the row and retry while our amount still beats the new price.
+            while True:
+                updated = Bid.objects.filter(
+                    pk=self.pk,
+                    status='active',
+                    current_bid=expected_bid,
+                    current_bidder_id=expected_bidder_id,
+                    current_bid__lt=amount,
+                ).update(
+                    current_bid=amount,
+                    current_bidder=team,
+                    last_bid_time=now,
+                    expires_at=expires_at,
+                )
+                if updated:
+                    break
+                
+                latest = Bid.objects.filter(pk=self.pk).values(
+                    'status', 'current_bid', 'current_bidder_id'
+                ).get()
+                if latest['status'] != 'active':
+                    logger.warning(f"Bid failed: auction {self.pk} closed while bidding")
+                    raise ValueError("Cannot bid on inactive auction")
+                if latest['current_bid'] >= amount:
+                    logger.warning(f"Bid failed: outbid on auction {self.pk}, current bid is now {latest['current_bid']}")
+                    raise BidOutbid(latest['current_bid'])
+                expected_bid = latest['current_bid']
+                expected_bidder_id = latest['current_bidder_id']
+            
+            # Lock the teams in the one order every auction path uses (bid row first, then teams by pk)
+            from .services import lock_auction_teams, resolve_proxy_bids
+            teams = lock_auction_teams(self, team.id, expected_bidder_id)
+            
+            # Commit POM to the new leader (guarded against concurrent spending) and release the previous leader
+            if expected_bidder_id == team.id:
+                committed = Team.commit_if_affordable(team.id, amount - expected_bid)
+            else:
+                committed = Team.commit_if_affordable(team.id, amount)
+                if committed:
+                    Team.adjust_committed_pom(expected_bidder_id, -expected_bid)
+                    teams[expected_bidder_id].committed_pom -= expected_bid
+            if not committed:
+                # Raising inside the atomic block rolls back the swap above
+                team.refresh_from_db(fields=['pom_balance', 'committed_pom'])
+                raise ValueError(self._unaffordable_message(team))
+            
+            # Record the bid in history
+            BidHistory.objects.create(
+                bid=self,
+                team=team,
+                amount=amount
+            )
+            
+            # Let other teams' proxy bids answer before anyone is notified
+            resolved = resolve_proxy_bids(self.pk, now)
+            
+            self.current_bid = amount
+            self.current_bidder = team
+            self.last_bid_time = now
+            self.expires_at = expires_at
+            if resolved:
+                self.current_bid = resolved.current_bid
+                self.current_bidder = resolved.current_bidder
+            
+            # Queue WebSocket notifications with the change; they are sent once it commits
+            from .events import outbid_notice
+            from .outbox import enqueue
+            from .scheduler import expiry_scheduler
+            enqueue('notify_bid_placed', self.id)
+            if expected_bidder_id != self.current_bidder_id:
+                enqueue('notify_outbid', expected_bidder_id, outbid_notice(self, expected_bid, teams[expected_bidder_id]))
+            transaction.on_commit(lambda: expiry_scheduler.arm(self.id, expires_at))
         
-        # Send WebSocket notification
-        from .tasks import notify_bid_placed
-        notify_bid_placed.delay(self.id)
+        team.refresh_from_db(fields=['committed_pom'])
         
         logger.info(f"Bid placed successfully: {amount} POM by {team.name} on {self.prospect.name}")
         
         return True
     
+    def _unaffordable_message(self, team):
+        available_pom = team.get_available_pom(exclude_bid=self)
+        error_msg = (
+            f"Team cannot afford this bid. Available POM: {available_pom} "
+            f"(current balance: {team.pom_balance} POM, "
+            f"committed to other bids: {team.pom_balance - available_pom} POM)"
+        )
+        logger.warning(f"Bid failed: {error_msg}")
+        return error_msg
+    
     def complete_bid(self):
         """Complete the bid and transfer prospect to winning team"""
-        if self.status != 'active':
-            return False
-        
-        # Deduct POM from winning team
-        if not self.current_bidder.deduct_pom(self.current_bid):
-            return False
-        
-        # Transfer prospect to winning team
-        self.prospect.transfer_to_team(self.current_bidder)
+        from .services import complete_bids
+        completed = complete_bids(Bid.objects.filter(pk=self.pk))
+        self.refresh_from_db()
+        return bool(completed)
+    
+    def cancel_bid(self):
+        """Cancel the bid (admin only), releasing the POM its leader had committed"""
+        from .outbox import enqueue
+        from .scheduler import expiry_scheduler
         
-        # Mark bid as completed
-        self.status = 'completed'
-        self.completed_at = timezone.now()
-        self.save()
+        with transaction.atomic():
+            bid = Bid.objects.select_for_update().get(pk=self.pk)
+            if bid.status == 'cancelled':
+                return False
+            
+            if bid.status == 'active':
+                Team.adjust_committed_pom(bid.current_bidder_id, -bid.current_bid)
+            Bid.objects.filter(pk=bid.pk).update(status='cancelled', completed_at=timezone.now())
+            
+            enqueue('notify_bid_cancelled', bid.id, bid.status == 'active')
+            transaction.on_commit(lambda: expiry_scheduler.disarm(bid.id))
         
+        self.refresh_from_db()
         return True
-    
-    def cancel_bid(self):
-        """Cancel the bid (admin only)"""
-        self.status = 'cancelled'
-        self.completed_at = timezone.now()
-        self.save()
 
 
 class BidHistory(models.Model):
@@ -154,4 +249,55 @@ class BidHistory(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.team.name} bid {self.amount} POM at {self.bid_time}" 
\ No newline at end of file
+        return f"{self.team.name} bid {self.amount} POM at {self.bid_time}" 
+
+class ProxyBid(models.Model):
+    """A team's private maximum on an auction, bid up to on its behalf by the proxy engine"""
+    bid = models.ForeignKey(Bid, on_delete=models.CASCADE, related_name='proxies')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='proxy_bids')
+    max_amount = models.IntegerField(validators=[MinValueValidator(5)])
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Equal maximums are won by the team that set its maximum first
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['updated_at', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['bid', 'team'], name='proxy_bid_bid_team_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.team.name} up to {self.max_amount} POM on {self.bid.prospect.name}"
+
+
+class OutboxNotification(models.Model):
+    """A notification queued in the same transaction as the change it announces (see bidding.outbox)"""
+    task = models.CharField(max_length=50)
+    args = models.JSONField(default=list)
+    attempts = models.PositiveIntegerField(default=0)
+    claimed_until = models.DateTimeField(null=True, blank=True)  # being sent by a dispatcher until then
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.task}{tuple(self.args)}"
+
+
+class BidEvent(models.Model):
+    """A sequenced WebSocket event kept for resume-from-offset replay (BID_EVENT_LOG='database')"""
+    stream = models.CharField(max_length=50)
+    seq = models.BigIntegerField()
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['stream', 'seq']
+        constraints = [
+            models.UniqueConstraint(fields=['stream', 'seq'], name='bid_event_stream_seq_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.stream} #{self.seq} {self.event_type}"
@@ -0,0 +1,225 @@
+import json
+import logging
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Notification tasks in bidding.tasks that can be queued in the outbox
+OUTBOX_TASKS = ('notify_bid_created', 'notify_bid_placed', 'notify_bids_completed', 'notify_bid_cancelled', 'notify_outbid')
+
+
+def enqueue(task, *args):
+    """Queue a notification in the current transaction; the dispatcher sends it once the transaction commits"""
+    from .models import OutboxNotification
+
+    if task not in OUTBOX_TASKS:
+        raise ValueError(f"Unknown outbox task: {task}")
+    OutboxNotification.objects.create(task=task, args=list(args))
+    transaction.on_commit(outbox_dispatcher.wake)
+
+
+class OutboxMetrics:
+    """Process-wide counts, batch sizes and send latency of the outbox dispatcher"""
+
+    FIELDS = ('batches', 'sent', 'deduplicated', 'failed', 'dropped')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+            self._max_batch_size = 0
+            self._latency_total = 0.0
+            self._latency_max = 0.0
+
+    def record_batch(self, size, latencies, **counts):
+        """Record one batch: its size, the seconds each sent row waited, and its outcome counts"""
+        with self._lock:
+            self._counts['batches'] += 1
+            for name, count in counts.items():
+                self._counts[name] += count
+            self._max_batch_size = max(self._max_batch_size, size)
+            self._latency_total += sum(latencies)
+            self._latency_max = max([self._latency_max, *latencies])
+
+    def snapshot(self):
+        with self._lock:
+            handled = self._counts['sent'] + self._counts['deduplicated']
+            return {
+                **self._counts,
+                'avg_batch_size': round(handled / self._counts['batches'], 1) if self._counts['batches'] else 0,
+                'max_batch_size': self._max_batch_size,
+                'avg_latency_ms': round(self._latency_total / handled * 1000, 1) if handled else 0,
+                'max_latency_ms': round(self._latency_max * 1000, 1),
+            }
+
+
+outbox_metrics = OutboxMetrics()
+
+
+class OutboxDispatcher:
+    """Sends the notifications queued in the outbox table to the channel layer.
+
+    State changes write their notifications to ``OutboxNotification`` in the same
+    transaction, so a notification is sent if and only if its change committed,
+    and the request never waits for the channel layer. The dispatcher thread wakes
+    when a transaction that queued something commits in this process, and polls
+    every ``poll_interval`` seconds for rows queued by other processes. Each batch
+    of the oldest rows is claimed for ``claim_seconds`` in a short transaction
+    (skipping rows another dispatcher holds), then sent after that commits, so the
+    event log rows written while sending are visible at once and no row lock is
+    held during the sends. Delivery is at-least-once: rows are only deleted after
+    they were sent, and a claim that runs out (a dispatcher that died) lets another
+    dispatcher send them again. Repeats of the same notification within a batch
+    are sent once, since every event carries the bid's current state.
+    """
+
+    def __init__(self, batch_size=None, poll_interval=None, max_attempts=None, claim_seconds=None):
+        if batch_size is None:
+            batch_size = getattr(settings, 'BID_OUTBOX_BATCH_SIZE', 100)
+        if poll_interval is None:
+            poll_interval = getattr(settings, 'BID_OUTBOX_POLL_SECONDS', 1.0)
+        if max_attempts is None:
+            max_attempts = getattr(settings, 'BID_OUTBOX_MAX_ATTEMPTS', 10)
+        if claim_seconds is None:
+            claim_seconds = getattr(settings, 'BID_OUTBOX_CLAIM_SECONDS', 60)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.claim_seconds = claim_seconds
+
+        self._condition = threading.Condition()
+        self._pending = False
+        self._thread = None
+        self._stopping = False
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def wake(self):
+        """Send queued notifications now instead of at the next poll"""
+        with self._condition:
+            self._pending = True
+            self._condition.notify()
+
+    def start(self):
+        """Start the dispatcher in a daemon thread (no-op if already running)"""
+        if self.is_running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self.run, name='bid-outbox-dispatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def run(self):
+        """Dispatch until stopped (blocks the calling thread)"""
+        if self._thread is None:
+            self._thread = threading.current_thread()
+        self._pending = True
+
+        while True:
+            with self._condition:
+                if not self._pending and not self._stopping:
+                    self._condition.wait(timeout=self.poll_interval)
+                if self._stopping:
+                    return
+                self._pending = False
+
+            try:
+                close_old_connections()
+                self.drain()
+            except Exception as e:
+                logger.error(f"❌ Outbox dispatch failed: {str(e)}")
+
+    def drain(self):
+        """Send queued notifications batch by batch until none are left; returns how many were sent"""
+        total = 0
+        while True:
+            sent, more = self.dispatch_batch()
+            total += sent
+            if not more:
+                return total
+
+    def dispatch_batch(self):
+        """Send and delete one batch of the oldest queued notifications.
+
+        Returns (sent, more): how many were sent, and whether another batch may be
+        waiting. A batch with failures stops the drain, so failing rows are retried
+        at the next poll instead of in a tight loop.
+        """
+        from . import tasks
+        from .models import OutboxNotification
+
+        rows = self._claim_batch()
+        if not rows:
+            return 0, False
+
+        done, failed, seen, latencies = [], [], set(), []
+        sent = deduplicated = 0
+        for row in rows:
+            key = (row.task, json.dumps(row.args, sort_keys=True))
+            if key in seen:
+                done.append(row.id)
+                deduplicated += 1
+                continue
+            try:
+                getattr(tasks, row.task)(*row.args)
+            except Exception as e:
+                logger.error(f"❌ Outbox notification {row.id} ({row.task}) failed: {str(e)}")
+                failed.append(row)
+                continue
+            seen.add(key)
+            done.append(row.id)
+            sent += 1
+            latencies.append((timezone.now() - row.created_at).total_seconds())
+
+        OutboxNotification.objects.filter(id__in=done).delete()
+
+        dropped = [row.id for row in failed if row.attempts + 1 >= self.max_attempts]
+        if dropped:
+            logger.error(f"❌ Dropping outbox notifications {dropped} after {self.max_attempts} attempts")
+            OutboxNotification.objects.filter(id__in=dropped).delete()
+        for row in failed:
+            if row.id not in dropped:
+                OutboxNotification.objects.filter(id=row.id).update(attempts=row.attempts + 1, claimed_until=None)
+
+        outbox_metrics.record_batch(
+            len(rows), latencies,
+            sent=sent, deduplicated=deduplicated, failed=len(failed), dropped=len(dropped)
+        )
+        return sent, len(rows) == self.batch_size and not failed
+
+    def _claim_batch(self):
+        """Claim the oldest unclaimed rows for this dispatcher and commit the claim"""
+        from .models import OutboxNotification
+
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(
+                OutboxNotification.objects.select_for_update(skip_locked=True)
+                .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lte=now))
+                .order_by('id')[:self.batch_size]
+            )
+            if rows:
+                OutboxNotification.objects.filter(id__in=[row.id for row in rows]).update(
+                    claimed_until=now + timedelta(seconds=self.claim_seconds)
+                )
+        return rows
+
+
+outbox_dispatcher = OutboxDispatcher()
@@ -4,4 +4,5 @@ from . import consumers
 websocket_urlpatterns = [
     re_path(r'ws/bidding/$', consumers.BiddingConsumer.as_asgi()),
     re_path(r'ws/team/$', consumers.TeamConsumer.as_asgi()),
+    re_path(r'ws/stream/$', consumers.StreamConsumer.as_asgi()),
 ] 
\ No newline at end of file
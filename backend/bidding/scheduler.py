@@ -0,0 +1,188 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiryScheduler:
+    """Closes auctions at their deadlines instead of polling for expired bids.
+
+    Active ``Bid.expires_at`` deadlines are kept in a min-heap together with
+    "closing soon" reminders at the configured lead times. The worker thread
+    sleeps until the earliest entry is due, so each auction closes as soon as
+    its deadline passes. Re-arming a bid (e.g. after ``place_bid`` extends it)
+    supersedes its older heap entries, which are skipped when they come due.
+    """
+
+    def __init__(self, closing_soon_leads=None, resync_interval=None):
+        if closing_soon_leads is None:
+            closing_soon_leads = getattr(settings, 'BID_CLOSING_SOON_LEAD_SECONDS', [300, 60])
+        if resync_interval is None:
+            resync_interval = getattr(settings, 'BID_EXPIRY_RESYNC_SECONDS', 300)
+        self.closing_soon_leads = sorted(closing_soon_leads, reverse=True)
+        self.resync_interval = resync_interval
+
+        # Heap entries are (due_timestamp, sequence, bid_id, deadline_timestamp, lead_seconds).
+        # lead_seconds is None for the entry that closes the auction.
+        self._heap = []
+        self._deadlines = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._next_resync = 0
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def arm(self, bid_id, expires_at):
+        """Schedule (or reschedule) the close and reminder events for a bid"""
+        if not self.is_running or expires_at is None:
+            return
+        with self._condition:
+            self._arm(bid_id, expires_at)
+            self._condition.notify()
+
+    def disarm(self, bid_id):
+        """Forget a bid's deadline so its pending heap entries are skipped"""
+        with self._condition:
+            self._deadlines.pop(bid_id, None)
+
+    def _arm(self, bid_id, expires_at):
+        deadline = expires_at.timestamp() if isinstance(expires_at, datetime) else expires_at
+        if self._deadlines.get(bid_id) == deadline:
+            return
+        self._deadlines[bid_id] = deadline
+
+        now = time.time()
+        heapq.heappush(self._heap, (deadline, next(self._sequence), bid_id, deadline, None))
+        for lead in self.closing_soon_leads:
+            due = deadline - lead
+            if due > now:
+                heapq.heappush(self._heap, (due, next(self._sequence), bid_id, deadline, lead))
+
+    def recover(self):
+        """Arm every active bid from the database (run on startup and periodically)"""
+        from .models import Bid
+
+        close_old_connections()
+        active = Bid.objects.filter(
+            status='active',
+            expires_at__isnull=False
+        ).values_list('id', 'expires_at')
+
+        count = 0
+        with self._condition:
+            for bid_id, expires_at in active:
+                self._arm(bid_id, expires_at)
+                count += 1
+            self._condition.notify()
+
+        self._next_resync = time.time() + self.resync_interval
+        logger.info(f"⏰ Expiry scheduler armed {count} active bids from the database")
+        return count
+
+    def start(self):
+        """Start the scheduler in a daemon thread (no-op if already running)"""
+        if self.is_running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self.run, name='bid-expiry-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def run(self):
+        """Process deadlines until stopped (blocks the calling thread)"""
+        if self._thread is None:
+            self._thread = threading.current_thread()
+        self.recover()
+
+        while True:
+            due = []
+            with self._condition:
+                while not self._stopping:
+                    now = time.time()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    if now >= self._next_resync:
+                        break
+                    wake_at = self._next_resync
+                    if self._heap:
+                        wake_at = min(wake_at, self._heap[0][0])
+                    self._condition.wait(timeout=wake_at - now)
+
+                if self._stopping:
+                    return
+
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, bid_id, deadline, lead = heapq.heappop(self._heap)
+                    if self._deadlines.get(bid_id) != deadline:
+                        continue  # superseded by a later arm() or disarm()
+                    if lead is None:
+                        self._deadlines.pop(bid_id, None)
+                    due.append((bid_id, deadline, lead))
+
+            if due:
+                self._dispatch(due)
+
+            if time.time() >= self._next_resync:
+                try:
+                    self.recover()
+                except Exception as e:
+                    logger.error(f"❌ Expiry scheduler resync failed: {str(e)}")
+                    self._next_resync = time.time() + self.resync_interval
+
+    def _dispatch(self, due):
+        from .tasks import complete_due_bids, notify_bid_closing_soon
+
+        close_old_connections()
+        extended = {}
+
+        for bid_id, deadline, lead in due:
+            if lead is None:
+                continue
+            try:
+                extended_to = notify_bid_closing_soon(bid_id, lead)
+            except Exception as e:
+                logger.error(f"❌ Expiry scheduler failed to send reminder for bid {bid_id}: {str(e)}")
+                continue
+            if extended_to:
+                extended[bid_id] = extended_to
+
+        # Close every auction that came due together in one batch
+        closing = {bid_id: deadline for bid_id, deadline, lead in due if lead is None}
+        if closing:
+            completed = []
+            try:
+                result = complete_due_bids(list(closing))
+                extended.update(result['extended'])
+                completed = result['completed']
+            except Exception as e:
+                logger.error(f"❌ Expiry scheduler failed to close bids {list(closing)}: {str(e)}")
+            now = time.time()
+            for bid_id in completed:
+                logger.info(f"⏰ Closed bid {bid_id} {now - closing[bid_id]:.3f}s after its deadline")
+
+        # These deadlines moved without this process seeing the arm() call, so follow them
+        if extended:
+            with self._condition:
+                for bid_id, expires_at in extended.items():
+                    self._arm(bid_id, datetime.fromisoformat(expires_at))
+
+
+expiry_scheduler = ExpiryScheduler()
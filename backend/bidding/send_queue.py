@@ -0,0 +1,118 @@
+import asyncio
+import itertools
+import threading
+from collections import OrderedDict
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Events that carry the bid's full state, so a newer one supersedes any queued event about the same bid
+BID_STATE_EVENTS = ('new_bid', 'bid_placed', 'bid_completed', 'bid_cancelled')
+
+
+class SendQueueMetrics:
+    """Process-wide counts of events sent, coalesced and dropped by connection send queues"""
+
+    FIELDS = ('queued', 'sent', 'coalesced', 'dropped', 'resyncs')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                self._counts[name] += count
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+
+send_queue_metrics = SendQueueMetrics()
+
+
+class SendQueue:
+    """Bounded outbound queue of one WebSocket connection.
+
+    Entries are channel layer events and snapshot requests, sent in order by the
+    connection's sender task. A full-state bid event replaces any queued event
+    about the same bid (latest state wins); the superseded sequence numbers are
+    handed out by get() as a 'coalesced' entry so the client does not take them
+    for a gap. When the queue is full, every queued event is dropped and replaced
+    by one snapshot of each stream they were on.
+    """
+
+    def __init__(self, size=None):
+        if size is None:
+            size = getattr(settings, 'BID_SOCKET_QUEUE_SIZE', 100)
+        self.size = size
+        self.counts = dict.fromkeys(SendQueueMetrics.FIELDS, 0)
+        self._entries = OrderedDict()
+        self._skipped = {}
+        self._keys = itertools.count()
+        self._ready = asyncio.Event()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _count(self, **counts):
+        for name, count in counts.items():
+            self.counts[name] += count
+        send_queue_metrics.add(**counts)
+
+    def put_event(self, event):
+        stream = event.get('stream')
+        key = ('event', stream, next(self._keys))
+        if event.get('type') in BID_STATE_EVENTS and event.get('bid_id') is not None:
+            key = ('bid', stream, event['bid_id'])
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._skipped.setdefault(stream, []).append(previous[1]['seq'])
+                self._count(coalesced=1)
+
+        if len(self._entries) >= self.size:
+            self._resync(stream)
+            return
+
+        self._entries[key] = ('event', event)
+        self._count(queued=1)
+        self._ready.set()
+
+    def put_snapshot(self, stream):
+        """Queue a snapshot of stream, unless one is already queued"""
+        self._entries.setdefault(('snapshot', stream), ('snapshot', stream))
+        self._ready.set()
+
+    def _resync(self, stream):
+        """Drop every queued event and queue a snapshot of each stream instead"""
+        streams = {stream}
+        dropped = 1
+        for key, (kind, value) in list(self._entries.items()):
+            if kind == 'event':
+                streams.add(value.get('stream'))
+                del self._entries[key]
+                dropped += 1
+        self._skipped.clear()
+        self._count(dropped=dropped, resyncs=1)
+        logger.warning(f"⚠️ Send queue overflow: dropped {dropped} events, resyncing {sorted(streams)}")
+        for resync_stream in sorted(streams):
+            self.put_snapshot(resync_stream)
+
+    async def get(self):
+        """Next entry to send: ('coalesced', stream, seqs), ('event', event) or ('snapshot', stream)"""
+        while not self._entries and not self._skipped:
+            self._ready.clear()
+            await self._ready.wait()
+        if self._skipped:
+            stream, seqs = self._skipped.popitem()
+            return ('coalesced', stream, sorted(seqs))
+        entry = self._entries.popitem(last=False)[1]
+        if entry[0] == 'event':
+            self._count(sent=1)
+        return entry
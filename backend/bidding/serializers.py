@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import Bid, BidHistory
+from django.db import transaction
+from farm_system.fieldsets import SparseFieldsetSerializerMixin
+from teams.models import Team
+from .models import Bid, BidHistory, BidOutbid, ProxyBid
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,7 +20,9 @@ class BidHistorySerializer(serializers.ModelSerializer):
         return TeamSerializer(obj.team, context=self.context).data
 
 
-class BidSerializer(serializers.ModelSerializer):
+class BidSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {'prospect': False, 'nominator': False, 'current_bidder': False, 'history': True}
+    
     prospect = serializers.SerializerMethodField()
     nominator = serializers.SerializerMethodField()
     current_bidder = serializers.SerializerMethodField()
@@ -47,7 +52,75 @@ class BidSerializer(serializers.ModelSerializer):
         return TeamSerializer(obj.current_bidder, context=self.context).data
 
 
-class BidCreateSerializer(serializers.ModelSerializer):
+class CompactBidHistorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BidHistory
+        fields = ['id', 'team', 'amount', 'bid_time']
+
+
+class CompactBidSerializer(serializers.ModelSerializer):
+    """Bid with prospect and teams referenced by id; see build_compact_bid_payload"""
+    time_remaining = serializers.ReadOnlyField()
+    is_expired = serializers.ReadOnlyField()
+    history = CompactBidHistorySerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = Bid
+        fields = [
+            'id', 'prospect', 'nominator', 'current_bidder', 'starting_bid',
+            'current_bid', 'status', 'created_at', 'last_bid_time', 'completed_at',
+            'expires_at', 'time_remaining', 'is_expired', 'history'
+        ]
+        read_only_fields = fields
+
+
+def build_compact_bid_payload(bids, context=None):
+    """Serialize bids by reference, with each team and prospect included exactly once.
+
+    Expects bids loaded with their prospect, teams, team owners and history teams
+    (as BidViewSet.get_queryset does) so no further queries are made.
+    """
+    from teams.serializers import CompactTeamSerializer
+    from prospects.serializers import CompactProspectSerializer
+    
+    bids = list(bids)
+    teams = {}
+    prospects = {}
+    for bid in bids:
+        prospects[bid.prospect_id] = bid.prospect
+        teams[bid.nominator_id] = bid.nominator
+        teams[bid.current_bidder_id] = bid.current_bidder
+        for entry in bid.history.all():
+            teams[entry.team_id] = entry.team
+    
+    return {
+        'bids': CompactBidSerializer(bids, many=True, context=context).data,
+        'included': {
+            'teams': {
+                str(team_id): data
+                for team_id, data in zip(teams, CompactTeamSerializer(teams.values(), many=True).data)
+            },
+            'prospects': {
+                str(prospect_id): data
+                for prospect_id, data in zip(prospects, CompactProspectSerializer(prospects.values(), many=True).data)
+            },
+        }
+    }
+
+
+class ActingTeamMixin:
+    """Serializers that act for a team: context['team'] if given, otherwise the requesting user's team"""
+    
+    def get_acting_team(self):
+        if 'team' in self.context:
+            return self.context['team']
+        request = self.context.get('request')
+        if request and hasattr(request, 'user'):
+            return request.user.team
+        return None
+
+
+class BidCreateSerializer(ActingTeamMixin, serializers.ModelSerializer):
     prospect_data = serializers.DictField(write_only=True)
     
     class Meta:
@@ -61,13 +134,13 @@ class BidCreateSerializer(serializers.ModelSerializer):
     
     def validate(self, data):
         # Check if team can afford the starting bid (considering all active bids)
-        request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            available_pom = request.user.team.get_available_pom()
-            can_afford = request.user.team.can_afford_bid(data['starting_bid'])
+        team = self.get_acting_team()
+        if team:
+            available_pom = team.get_available_pom()
+            can_afford = team.can_afford_bid(data['starting_bid'])
             
-            logger.info(f"Bid creation validation for team {request.user.team.name}:")
-            logger.info(f"  - Current balance: {request.user.team.pom_balance} POM")
+            logger.info(f"Bid creation validation for team {team.name}:")
+            logger.info(f"  - Current balance: {team.pom_balance} POM")
             logger.info(f"  - Available POM: {available_pom} POM")
             logger.info(f"  - Starting bid: {data['starting_bid']} POM")
             logger.info(f"  - Can afford: {can_afford}")
@@ -75,8 +148,8 @@ class BidCreateSerializer(serializers.ModelSerializer):
             if not can_afford:
                 error_msg = (
                     f"Insufficient available POM. You have {available_pom} POM available "
-                    f"(current balance: {request.user.team.pom_balance} POM, "
-                    f"committed to other bids: {request.user.team.pom_balance - available_pom} POM)"
+                    f"(current balance: {team.pom_balance} POM, "
+                    f"committed to other bids: {team.pom_balance - available_pom} POM)"
                 )
                 logger.warning(f"  - Validation failed: {error_msg}")
                 raise serializers.ValidationError({
@@ -90,39 +163,46 @@ class BidCreateSerializer(serializers.ModelSerializer):
         from prospects.models import Prospect
         
         prospect_data = validated_data.pop('prospect_data')
-        request = self.context.get('request')
-        
-        # Create the prospect first
-        prospect_data['created_by'] = request.user.team
-        prospect = Prospect.objects.create(**prospect_data)
+        team = self.get_acting_team()
         
-        # Create the bid
-        bid = Bid.objects.create(
-            prospect=prospect,
-            nominator=request.user.team,
-            current_bidder=request.user.team,
-            starting_bid=validated_data['starting_bid'],
-            current_bid=validated_data['starting_bid']
-        )
-        
-        # Create initial bid history entry for the nomination
-        BidHistory.objects.create(
-            bid=bid,
-            team=request.user.team,
-            amount=validated_data['starting_bid']
-        )
-        
-        # Set initial expiration time
-        bid.update_expiration_time()
-        
-        # Send WebSocket notification
-        from .tasks import notify_bid_created
-        notify_bid_created.delay(bid.id)
+        with transaction.atomic():
+            # Create the prospect first
+            prospect_data['created_by'] = team
+            prospect = Prospect.objects.create(**prospect_data)
+            
+            # Create the bid
+            bid = Bid.objects.create(
+                prospect=prospect,
+                nominator=team,
+                current_bidder=team,
+                starting_bid=validated_data['starting_bid'],
+                current_bid=validated_data['starting_bid'],
+                expires_at=Bid.calculate_expiration_time()
+            )
+            
+            # Create initial bid history entry for the nomination
+            BidHistory.objects.create(
+                bid=bid,
+                team=team,
+                amount=validated_data['starting_bid']
+            )
+            
+            # The nominator leads the auction, so the starting bid is committed
+            if not Team.commit_if_affordable(team.id, validated_data['starting_bid']):
+                raise serializers.ValidationError({
+                    'non_field_errors': ["Insufficient available POM for this nomination"]
+                })
+            
+            # Queue the WebSocket notification with the new bid; it is sent once this commits
+            from .outbox import enqueue
+            from .scheduler import expiry_scheduler
+            enqueue('notify_bid_created', bid.id)
+            transaction.on_commit(lambda: expiry_scheduler.arm(bid.id, bid.expires_at))
         
         return bid
 
 
-class BidPlaceSerializer(serializers.Serializer):
+class BidPlaceSerializer(ActingTeamMixin, serializers.Serializer):
     amount = serializers.IntegerField(min_value=1)
     
     def validate_amount(self, value):
@@ -132,13 +212,13 @@ class BidPlaceSerializer(serializers.Serializer):
         return value
     
     def validate(self, data):
-        request = self.context.get('request')
+        team = self.get_acting_team()
         bid = self.context.get('bid')
         
         logger.info(f"BidPlaceSerializer.validate() called with data: {data}")
         
-        if not request or not bid:
-            logger.error("Invalid context - missing request or bid")
+        if not team or not bid:
+            logger.error("Invalid context - missing team or bid")
             raise serializers.ValidationError("Invalid context")
         
         # Check if bid is still active
@@ -147,11 +227,11 @@ class BidPlaceSerializer(serializers.Serializer):
             raise serializers.ValidationError("Cannot bid on inactive auction")
         
         # Check if team can afford the bid (considering all active bids)
-        available_pom = request.user.team.get_available_pom(exclude_bid=bid)
-        can_afford = request.user.team.can_afford_bid(data['amount'], exclude_bid=bid)
+        available_pom = team.get_available_pom(exclude_bid=bid)
+        can_afford = team.can_afford_bid(data['amount'], exclude_bid=bid)
         
-        logger.info(f"Bid validation for team {request.user.team.name}:")
-        logger.info(f"  - Current balance: {request.user.team.pom_balance} POM")
+        logger.info(f"Bid validation for team {team.name}:")
+        logger.info(f"  - Current balance: {team.pom_balance} POM")
         logger.info(f"  - Available POM: {available_pom} POM")
         logger.info(f"  - Bid amount: {data['amount']} POM")
         logger.info(f"  - Can afford: {can_afford}")
@@ -159,8 +239,8 @@ class BidPlaceSerializer(serializers.Serializer):
         if not can_afford:
             error_msg = (
                 f"Insufficient available POM. You have {available_pom} POM available "
-                f"(current balance: {request.user.team.pom_balance} POM, "
-                f"committed to other bids: {request.user.team.pom_balance - available_pom} POM)"
+                f"(current balance: {team.pom_balance} POM, "
+                f"committed to other bids: {team.pom_balance - available_pom} POM)"
             )
             logger.warning(f"  - Validation failed: {error_msg}")
             logger.warning(f"  - Raising ValidationError with non_field_errors")
@@ -172,18 +252,35 @@ class BidPlaceSerializer(serializers.Serializer):
         return data
     
     def save(self, **kwargs):
-        request = self.context.get('request')
+        team = self.get_acting_team()
         bid = self.context.get('bid')
         
         logger.info(f"BidPlaceSerializer.save() called")
-        logger.info(f"  - Team: {request.user.team.name}")
+        logger.info(f"  - Team: {team.name}")
         logger.info(f"  - Amount: {self.validated_data['amount']}")
         logger.info(f"  - Bid ID: {bid.id}")
         
         try:
-            bid.place_bid(request.user.team, self.validated_data['amount'])
+            bid.place_bid(team, self.validated_data['amount'])
             logger.info(f"  - place_bid() completed successfully")
             return bid
+        except BidOutbid:
+            logger.warning(f"  - place_bid() lost the race to a higher bid")
+            raise
         except ValueError as e:
             logger.error(f"  - place_bid() failed with ValueError: {e}")
-            raise serializers.ValidationError(str(e)) 
\ No newline at end of file
+            raise serializers.ValidationError(str(e))
+
+
+class ProxyBidSerializer(serializers.ModelSerializer):
+    """A team's own maximum bid on an auction (never shown to other teams)"""
+    current_bid = serializers.ReadOnlyField(source='bid.current_bid')
+    leading = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ProxyBid
+        fields = ['bid', 'max_amount', 'current_bid', 'leading', 'updated_at']
+        read_only_fields = ['bid', 'updated_at']
+    
+    def get_leading(self, obj):
+        return obj.bid.current_bidder_id == obj.team_id
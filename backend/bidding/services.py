@@ -0,0 +1,311 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework import serializers
+from teams.models import Team
+from prospects.models import Prospect
+from .models import MIN_BID_INCREMENT, Bid, BidHistory, ProxyBid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def complete_bids(queryset, notify=True):
+    """Complete every active bid in queryset in one transaction using set-based updates.
+
+    Each winning team is charged once for the total of its won bids (releasing the
+    matching committed POM), prospects move to their winners, and the bids are marked
+    completed, in one UPDATE per table. Bids whose winner cannot cover the total are
+    left active. Notifications for all completed bids are dispatched in a single batch
+    after commit.
+
+    Returns the list of completed Bid instances (with prospect and current_bidder loaded).
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        bids = list(
+            queryset.filter(status='active')
+            .select_related('prospect')
+            .select_for_update(of=('self',))
+            .order_by('pk')
+        )
+        if not bids:
+            return []
+        bids.sort(key=lambda bid: (bid.expires_at is None, bid.expires_at or now, bid.id))
+
+        # Lock the winners (in pk order) so their balances cannot change between the check and the charge
+        teams = {
+            team.id: team
+            for team in Team.objects.select_for_update().filter(
+                pk__in={bid.current_bidder_id for bid in bids}
+            ).order_by('pk')
+        }
+
+        # Charge each team only for the bids it can cover, in deadline order
+        spent = defaultdict(int)
+        completed = []
+        for bid in bids:
+            team = teams[bid.current_bidder_id]
+            if team.pom_balance - spent[team.id] < bid.current_bid:
+                logger.error(f"❌ Failed to complete bid for {bid.prospect.name}: {team.name} cannot cover {bid.current_bid} POM")
+                continue
+            spent[team.id] += bid.current_bid
+            completed.append(bid)
+
+        if not completed:
+            return []
+
+        charge = Case(
+            *[When(pk=team_id, then=Value(amount)) for team_id, amount in spent.items()],
+            output_field=IntegerField()
+        )
+        Team.objects.filter(pk__in=spent.keys()).update(
+            pom_balance=F('pom_balance') - charge,
+            committed_pom=F('committed_pom') - charge,
+            updated_at=now
+        )
+
+        Prospect.objects.filter(pk__in=[bid.prospect_id for bid in completed]).update(
+            team_id=Case(
+                *[When(pk=bid.prospect_id, then=Value(bid.current_bidder_id)) for bid in completed],
+                output_field=IntegerField()
+            ),
+            acquired_at=now,
+            updated_at=now
+        )
+
+        Bid.objects.filter(pk__in=[bid.id for bid in completed]).update(
+            status='completed',
+            completed_at=now
+        )
+
+        # Reflect the new state on the returned instances
+        for team_id, amount in spent.items():
+            teams[team_id].pom_balance -= amount
+            teams[team_id].committed_pom -= amount
+        for bid in completed:
+            bid.current_bidder = teams[bid.current_bidder_id]
+            bid.prospect.team = bid.current_bidder
+            bid.prospect.acquired_at = now
+            bid.status = 'completed'
+            bid.completed_at = now
+
+        if notify:
+            from .outbox import enqueue
+            enqueue('notify_bids_completed', [bid.id for bid in completed])
+
+    logger.info(f"🎉 Completed {len(completed)} bids in one batch")
+    return completed
+
+
+def complete_expired_bids():
+    """Complete all active bids whose deadline has passed"""
+    return complete_bids(Bid.objects.filter(expires_at__lt=timezone.now()))
+
+
+def lock_auction_teams(bid, *team_ids):
+    """Lock the teams an auction can move POM between, in pk order.
+    
+    Every path that changes auctions locks the Bid rows first (in pk order) and then
+    their teams sorted by pk: the leader, the given teams and every proxy bidder at
+    once. With one lock order, concurrent bids, proxy resolutions and completions
+    wait for each other instead of deadlocking.
+    
+    Returns the locked teams by id.
+    """
+    team_ids = {
+        bid.current_bidder_id, *team_ids,
+        *ProxyBid.objects.filter(bid_id=bid.pk).values_list('team_id', flat=True)
+    }
+    return {
+        team.id: team
+        for team in Team.objects.select_for_update().filter(pk__in=team_ids).order_by('pk')
+    }
+
+
+def resolve_proxy_bids(bid_id, now=None):
+    """Bid the auction up on behalf of its proxy bids until the highest maximum leads.
+    
+    Runs inside the caller's transaction with the bid and the teams involved locked.
+    A proxy's ceiling is its maximum, capped at the POM its team has available, so
+    committed POM never exceeds what the team can cover. The winner pays the minimum
+    increment over the runner-up's ceiling (never more than its own); every outbid
+    proxy is recorded at its ceiling and the winner at the final price in one bulk
+    insert, and committed POM moves from the previous leader to the winner. Nothing
+    is broadcast here, so the caller notifies once with the final state after commit.
+    
+    Returns the updated Bid (with current_bidder loaded, and the locked teams with
+    their new balances in locked_teams), or None if the proxies did not change the
+    auction.
+    """
+    now = now or timezone.now()
+    bid = Bid.objects.select_for_update().get(pk=bid_id)
+    if bid.status != 'active':
+        return None
+    proxies = list(ProxyBid.objects.filter(bid_id=bid_id))
+    if not proxies:
+        return None
+    
+    teams = lock_auction_teams(bid)
+    
+    def ceiling(proxy):
+        team = teams[proxy.team_id]
+        available = team.pom_balance - team.committed_pom
+        if team.id == bid.current_bidder_id:
+            available += bid.current_bid
+        return min(proxy.max_amount, available)
+    
+    # (ceiling, priority, team id): the leader keeps the auction on an equal ceiling,
+    # then proxies rank in the order their maximums were set
+    leader_ceiling = bid.current_bid
+    challengers = []
+    for priority, proxy in enumerate(proxies, start=1):
+        if proxy.team_id == bid.current_bidder_id:
+            leader_ceiling = max(leader_ceiling, ceiling(proxy))
+        elif ceiling(proxy) >= bid.current_bid + MIN_BID_INCREMENT:
+            challengers.append((ceiling(proxy), priority, proxy.team_id))
+    if not challengers:
+        return None
+    
+    candidates = sorted(
+        [(leader_ceiling, 0, bid.current_bidder_id), *challengers],
+        key=lambda candidate: (-candidate[0], candidate[1])
+    )
+    (winner_ceiling, _, winner_id), (runner_up_ceiling, _, _) = candidates[:2]
+    price = min(winner_ceiling, runner_up_ceiling + MIN_BID_INCREMENT)
+    
+    history = [
+        BidHistory(bid=bid, team_id=team_id, amount=team_ceiling)
+        for team_ceiling, _, team_id in sorted(candidates[1:])
+        if team_ceiling > bid.current_bid
+    ]
+    history.append(BidHistory(bid=bid, team_id=winner_id, amount=price))
+    BidHistory.objects.bulk_create(history)
+    
+    def adjust(team_id, delta):
+        Team.adjust_committed_pom(team_id, delta)
+        teams[team_id].committed_pom += delta
+    
+    if winner_id == bid.current_bidder_id:
+        adjust(winner_id, price - bid.current_bid)
+    else:
+        adjust(bid.current_bidder_id, -bid.current_bid)
+        adjust(winner_id, price)
+    
+    expires_at = Bid.calculate_expiration_time(now)
+    Bid.objects.filter(pk=bid.pk).update(
+        current_bid=price,
+        current_bidder_id=winner_id,
+        last_bid_time=now,
+        expires_at=expires_at,
+    )
+    bid.current_bid = price
+    bid.current_bidder = teams[winner_id]
+    bid.last_bid_time = now
+    bid.expires_at = expires_at
+    bid.locked_teams = teams
+    
+    logger.info(f"🎉 Proxy bids resolved auction {bid.pk}: {price} POM by {bid.current_bidder.name} ({len(history)} auto-bids)")
+    return bid
+
+
+def set_proxy_bid(team_id, bid_id, max_amount):
+    """Set a team's private maximum on an active auction and resolve it against the other proxies.
+    
+    Returns the Bid after resolution. Raises ValueError if the maximum is below the
+    next valid bid or more than the team has available.
+    """
+    from .events import outbid_notice
+    from .outbox import enqueue
+    from .scheduler import expiry_scheduler
+    
+    with transaction.atomic():
+        bid = Bid.objects.select_for_update().select_related('prospect').get(pk=bid_id)
+        if bid.status != 'active':
+            raise ValueError("Cannot bid on inactive auction")
+        
+        team = Team.objects.get(pk=team_id)
+        minimum = bid.current_bid
+        if bid.current_bidder_id != team.id:
+            minimum += MIN_BID_INCREMENT
+        if max_amount < minimum:
+            raise ValueError(f"Maximum bid must be at least {minimum} POM")
+        if not team.can_afford_bid(max_amount, exclude_bid=bid):
+            raise ValueError(bid._unaffordable_message(team))
+        
+        ProxyBid.objects.update_or_create(bid=bid, team=team, defaults={'max_amount': max_amount})
+        previous_bidder_id, previous_bid = bid.current_bidder_id, bid.current_bid
+        resolved = resolve_proxy_bids(bid.pk)
+        if resolved:
+            enqueue('notify_bid_placed', resolved.id)
+            if resolved.current_bidder_id != previous_bidder_id:
+                resolved.prospect = bid.prospect
+                enqueue('notify_outbid', previous_bidder_id, outbid_notice(resolved, previous_bid, resolved.locked_teams[previous_bidder_id]))
+            transaction.on_commit(lambda: expiry_scheduler.arm(resolved.id, resolved.expires_at))
+    
+    bid.refresh_from_db()
+    return bid
+
+
+class BidRequestError(ValueError):
+    """A bid or nomination sent over the socket was rejected"""
+
+
+def first_error(detail):
+    """First message of a validation error detail, the one the UI would show"""
+    if isinstance(detail, dict):
+        for key in ('non_field_errors', 'error', 'detail'):
+            if key in detail:
+                return first_error(detail[key])
+        return first_error(next(iter(detail.values()), ''))
+    if isinstance(detail, (list, tuple)):
+        return first_error(detail[0]) if detail else ''
+    return str(detail)
+
+
+def place_bid_for_team(team_id, bid_id, amount):
+    """Place a bid for a team with the same checks as the place_bid endpoint.
+
+    Returns the updated Bid. Raises BidOutbid if another team got there first and
+    BidRequestError with the first validation message otherwise.
+    """
+    from .serializers import BidPlaceSerializer
+    
+    team = Team.objects.get(pk=team_id)
+    try:
+        bid = Bid.objects.select_related('prospect').get(pk=bid_id)
+    except (Bid.DoesNotExist, ValueError, TypeError):
+        raise BidRequestError("Bid not found")
+    
+    if bid.current_bidder_id == team.id:
+        raise BidRequestError("You cannot outbid yourself")
+    
+    serializer = BidPlaceSerializer(data={'amount': amount}, context={'team': team, 'bid': bid})
+    if not serializer.is_valid():
+        raise BidRequestError(first_error(serializer.errors))
+    try:
+        return serializer.save()
+    except serializers.ValidationError as e:
+        raise BidRequestError(first_error(e.detail))
+
+
+def nominate_for_team(team_id, prospect_data, starting_bid):
+    """Nominate a prospect for a team with the same checks as creating a bid through the API.
+
+    Returns the new Bid. Raises BidRequestError with the first validation message.
+    """
+    from .serializers import BidCreateSerializer
+    
+    team = Team.objects.get(pk=team_id)
+    serializer = BidCreateSerializer(
+        data={'prospect_data': prospect_data, 'starting_bid': starting_bid},
+        context={'team': team}
+    )
+    if not serializer.is_valid():
+        raise BidRequestError(first_error(serializer.errors))
+    try:
+        return serializer.save()
+    except serializers.ValidationError as e:
+        raise BidRequestError(first_error(e.detail))
@@ -1,10 +1,16 @@
 from celery import shared_task
 from django.utils import timezone
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-import json
 import logging
 from .models import Bid
+from .events import (
+    BIDDING_STREAM,
+    bid_state,
+    bid_topics,
+    load_bids_for_events,
+    publish,
+    team_balances,
+    team_stream
+)
 
 logger = logging.getLogger(__name__)
 
@@ -12,113 +18,244 @@ logger = logging.getLogger(__name__)
 @shared_task
 def check_expired_bids():
     """Check for expired bids and complete them automatically"""
-    from django.utils import timezone
-    
-    # Find bids that have expired (expires_at is in the past)
-    expired_bids = Bid.objects.filter(
-        status='active',
-        expires_at__lt=timezone.now()
-    )
+    from .services import complete_expired_bids
     
     logger.info(f"🔍 Checking for expired bids...")
     logger.info(f"   Current time: {timezone.now()}")
-    logger.info(f"   Found {expired_bids.count()} expired bids")
     
-    completed_count = 0
-    for bid in expired_bids:
-        try:
-            if bid.complete_bid():
-                completed_count += 1
-                
-                # Send real-time notification to all connected clients
-                notify_bid_completed.delay(bid.id)
-                
-                logger.info(f"✅ Automatically completed bid for {bid.prospect.name} - {bid.current_bidder.name} wins for {bid.current_bid} POM")
-            else:
-                logger.error(f"❌ Failed to complete bid for {bid.prospect.name}")
-        except Exception as e:
-            logger.error(f"❌ Error completing bid for {bid.prospect.name}: {str(e)}")
+    try:
+        completed = complete_expired_bids()
+    except Exception as e:
+        logger.error(f"❌ Error completing expired bids: {str(e)}")
+        return 0
+    
+    for bid in completed:
+        logger.info(f"✅ Automatically completed bid for {bid.prospect.name} - {bid.current_bidder.name} wins for {bid.current_bid} POM")
+    
+    if completed:
+        logger.info(f"🎉 Successfully completed {len(completed)} expired bids")
+    
+    return len(completed)
+
+
+@shared_task
+def complete_due_bids(bid_ids):
+    """Complete the given auctions whose deadlines have passed (called by the expiry scheduler)
+
+    Returns {'extended': {bid id: new deadline (ISO string)}, 'completed': [bid ids]}:
+    the auctions extended in the meantime, so the scheduler can re-arm them, and the
+    ones actually closed (bids whose winner can no longer pay stay active).
+    """
+    from .services import complete_bids
+    
+    now = timezone.now()
+    extended = {
+        bid_id: expires_at.isoformat()
+        for bid_id, expires_at in Bid.objects.filter(
+            id__in=bid_ids,
+            status='active',
+            expires_at__gt=now
+        ).values_list('id', 'expires_at')
+    }
     
-    if completed_count > 0:
-        logger.info(f"🎉 Successfully completed {completed_count} expired bids")
+    try:
+        completed = complete_bids(Bid.objects.filter(id__in=bid_ids, expires_at__lte=now))
+    except Exception as e:
+        logger.error(f"❌ Error completing bids {bid_ids}: {str(e)}")
+        return {'extended': extended, 'completed': []}
+    
+    for bid in completed:
+        logger.info(f"✅ Automatically completed bid for {bid.prospect.name} - {bid.current_bidder.name} wins for {bid.current_bid} POM")
     
-    return completed_count
+    return {'extended': extended, 'completed': [bid.id for bid in completed]}
+
+
+@shared_task
+def notify_bid_closing_soon(bid_id, lead_seconds):
+    """Send WebSocket notification that an auction is about to close
+
+    Returns the new deadline as an ISO string if the auction was extended past this
+    reminder, so the scheduler can re-arm it, otherwise None.
+    """
+    bid = Bid.objects.filter(id=bid_id).values('status', 'expires_at', 'current_bid', 'prospect_id').first()
+    if not bid or bid['status'] != 'active' or not bid['expires_at']:
+        return None
+    
+    seconds_remaining = (bid['expires_at'] - timezone.now()).total_seconds()
+    if seconds_remaining > lead_seconds + 1:
+        return bid['expires_at'].isoformat()
+    
+    # Every server process may run a scheduler; only the first to claim this reminder sends it
+    claimed = Bid.objects.filter(
+        id=bid_id, status='active', expires_at=bid['expires_at']
+    ).exclude(
+        reminded_deadline=bid['expires_at'], reminded_lead__lte=lead_seconds
+    ).update(reminded_deadline=bid['expires_at'], reminded_lead=lead_seconds)
+    if not claimed:
+        return None
+    
+    try:
+        topics = [topic for loaded in load_bids_for_events([bid_id]) for topic in bid_topics(loaded)]
+        publish(
+            BIDDING_STREAM,
+            {
+                'type': 'bid_closing_soon',
+                'bid_id': bid_id,
+                'prospect_id': bid['prospect_id'],
+                'data': {
+                    'bid_id': bid_id,
+                    'current_bid': bid['current_bid'],
+                    'expires_at': bid['expires_at'].isoformat(),
+                    'seconds_remaining': max(seconds_remaining, 0),
+                    'lead_seconds': lead_seconds,
+                }
+            },
+            topics=topics
+        )
+        logger.info(f"📢 Sent closing soon notification for bid {bid_id} ({lead_seconds}s lead)")
+    except Exception as e:
+        logger.error(f"❌ Error sending closing soon notification: {str(e)}")
+    
+    return None
 
 
 @shared_task
 def notify_bid_completed(bid_id):
     """Send WebSocket notification when a bid is completed"""
+    notify_bids_completed([bid_id])
+
+
+@shared_task
+def notify_bids_completed(bid_ids):
+    """Send WebSocket notifications for a batch of completed bids"""
     try:
-        bid = Bid.objects.get(id=bid_id)
-        channel_layer = get_channel_layer()
+        bids = load_bids_for_events(bid_ids)
+        missing = set(bid_ids) - {bid.id for bid in bids}
+        if missing:
+            logger.error(f"❌ Bids {sorted(missing)} not found for notification")
         
-        # Prepare notification data
-        notification_data = {
+        for bid in bids:
+            _send_bid_completed(bid)
+        
+    except Exception as e:
+        logger.error(f"❌ Error sending bid completion notification: {str(e)}")
+        raise  # left in the outbox and retried
+
+
+def _send_bid_completed(bid):
+    # Prepare notification data
+    notification_data = {
+        'type': 'bid_completed',
+        'bid_id': bid.id,
+        'data': {
+            'prospect_name': bid.prospect.name,
+            'prospect_position': bid.prospect.position,
+            'winning_team': bid.current_bidder.name,
+            'winning_team_id': bid.current_bidder_id,
+            'winning_amount': bid.current_bid,
+            'completed_at': bid.completed_at.isoformat() if bid.completed_at else None,
+            **bid_state(bid),
+        }
+    }
+    
+    # Send to general bidding channel
+    publish(
+        BIDDING_STREAM,
+        {
             'type': 'bid_completed',
             'bid_id': bid.id,
+            'prospect_id': bid.prospect.id,
+            'data': notification_data['data']
+        },
+        topics=bid_topics(bid)
+    )
+    
+    # Send to winning team's specific channel with updated POM balance
+    publish(
+        team_stream(bid.current_bidder.id),
+        {
+            'type': 'prospect_acquired',
             'data': {
                 'prospect_name': bid.prospect.name,
                 'prospect_position': bid.prospect.position,
-                'winning_team': bid.current_bidder.name,
-                'winning_amount': bid.current_bid,
-                'completed_at': bid.completed_at.isoformat() if bid.completed_at else None,
+                'prospect_id': bid.prospect_id,
+                'amount_paid': bid.current_bid,
+                'new_balance': bid.current_bidder.pom_balance,
+                'available_pom': bid.current_bidder.get_available_pom(),
+                'acquired_at': bid.completed_at.isoformat() if bid.completed_at else None,
             }
         }
-        
-        # Send to general bidding channel
-        async_to_sync(channel_layer.group_send)(
-            "bidding_updates",
-            {
-                'type': 'bid_completed',
-                'bid_id': bid.id,
-                'prospect_id': bid.prospect.id,
-                'data': notification_data['data']
+    )
+    
+    # Send team update to winning team
+    publish(
+        team_stream(bid.current_bidder.id),
+        {
+            'type': 'team_update',
+            'data': {
+                **team_balances(bid.current_bidder),
+                'message': f'Prospect acquired: {bid.prospect.name} for {bid.current_bid} POM'
             }
-        )
+        }
+    )
+    
+    logger.info(f"📢 Sent WebSocket notifications for completed bid: {bid.prospect.name}")
+
+
+@shared_task
+def notify_bid_cancelled(bid_id, released):
+    """Send WebSocket notification when an admin cancels a bid, with the released POM if it was active"""
+    try:
+        bids = load_bids_for_events([bid_id])
+        if not bids:
+            raise Bid.DoesNotExist
+        bid = bids[0]
         
-        # Send to winning team's specific channel with updated POM balance
-        async_to_sync(channel_layer.group_send)(
-            f"team_{bid.current_bidder.id}",
+        publish(
+            BIDDING_STREAM,
             {
-                'type': 'prospect_acquired',
+                'type': 'bid_cancelled',
+                'bid_id': bid.id,
+                'prospect_id': bid.prospect_id,
                 'data': {
                     'prospect_name': bid.prospect.name,
-                    'prospect_position': bid.prospect.position,
-                    'amount_paid': bid.current_bid,
-                    'new_balance': bid.current_bidder.pom_balance,
-                    'available_pom': bid.current_bidder.get_available_pom(),
-                    'acquired_at': bid.completed_at.isoformat() if bid.completed_at else None,
+                    'cancelled_at': bid.completed_at.isoformat() if bid.completed_at else None,
+                    **bid_state(bid),
                 }
-            }
+            },
+            topics=bid_topics(bid)
         )
         
-        # Send team update to winning team
-        async_to_sync(channel_layer.group_send)(
-            f"team_{bid.current_bidder.id}",
-            {
-                'type': 'team_update',
-                'data': {
-                    'pom_balance': bid.current_bidder.pom_balance,
-                    'available_pom': bid.current_bidder.get_available_pom(),
-                    'message': f'Prospect acquired: {bid.prospect.name} for {bid.current_bid} POM'
+        # The leader can spend the POM it had committed again
+        if released:
+            publish(
+                team_stream(bid.current_bidder_id),
+                {
+                    'type': 'team_update',
+                    'data': {
+                        **team_balances(bid.current_bidder),
+                        'message': f'Auction cancelled: {bid.prospect.name}, {bid.current_bid} POM released'
+                    }
                 }
-            }
-        )
+            )
         
-        logger.info(f"📢 Sent WebSocket notifications for completed bid: {bid.prospect.name}")
+        logger.info(f"📢 Sent WebSocket notifications for bid cancelled: {bid.prospect.name}")
         
     except Bid.DoesNotExist:
         logger.error(f"❌ Bid {bid_id} not found for notification")
     except Exception as e:
-        logger.error(f"❌ Error sending bid completion notification: {str(e)}")
+        logger.error(f"❌ Error sending bid cancelled notification: {str(e)}")
+        raise  # left in the outbox and retried
 
 
 @shared_task
 def notify_bid_created(bid_id):
     """Send WebSocket notification when a new bid is created (nomination)"""
     try:
-        bid = Bid.objects.get(id=bid_id)
-        channel_layer = get_channel_layer()
+        bids = load_bids_for_events([bid_id])
+        if not bids:
+            raise Bid.DoesNotExist
+        bid = bids[0]
         
         notification_data = {
             'prospect_name': bid.prospect.name,
@@ -130,26 +267,28 @@ def notify_bid_created(bid_id):
             'nominator': bid.nominator.name,
             'expires_at': bid.expires_at.isoformat() if bid.expires_at else None,
             'bid_id': bid.id,
+            **bid_state(bid),
         }
         
         # Send to general bidding channel
-        async_to_sync(channel_layer.group_send)(
-            "bidding_updates",
+        publish(
+            BIDDING_STREAM,
             {
                 'type': 'new_bid',
+                'bid_id': bid.id,
                 'prospect_id': bid.prospect.id,
                 'data': notification_data
-            }
+            },
+            topics=bid_topics(bid)
         )
         
         # Send team update to the nominating team
-        async_to_sync(channel_layer.group_send)(
-            f"team_{bid.nominator.id}",
+        publish(
+            team_stream(bid.nominator.id),
             {
                 'type': 'team_update',
                 'data': {
-                    'pom_balance': bid.nominator.pom_balance,
-                    'available_pom': bid.nominator.get_available_pom(),
+                    **team_balances(bid.nominator),
                     'message': f'Prospect nominated: {bid.prospect.name} for {bid.starting_bid} POM'
                 }
             }
@@ -161,44 +300,50 @@ def notify_bid_created(bid_id):
         logger.error(f"❌ Bid {bid_id} not found for notification")
     except Exception as e:
         logger.error(f"❌ Error sending new bid notification: {str(e)}")
+        raise  # left in the outbox and retried
 
 
 @shared_task
 def notify_bid_placed(bid_id):
     """Send WebSocket notification when a bid is placed on an auction"""
     try:
-        bid = Bid.objects.get(id=bid_id)
-        channel_layer = get_channel_layer()
+        bids = load_bids_for_events([bid_id])
+        if not bids:
+            raise Bid.DoesNotExist
+        bid = bids[0]
         
         notification_data = {
             'prospect_name': bid.prospect.name,
             'prospect_position': bid.prospect.position,
             'current_bid': bid.current_bid,
             'current_bidder': bid.current_bidder.name,
+            'current_bidder_id': bid.current_bidder_id,
+            'expires_at': bid.expires_at.isoformat() if bid.expires_at else None,
             'bid_id': bid.id,
+            **bid_state(bid),
         }
         
         logger.info(f"📢 Sending WebSocket notification for bid placed: {bid.prospect.name}")
         
         # Send to general bidding channel
-        async_to_sync(channel_layer.group_send)(
-            "bidding_updates",
+        publish(
+            BIDDING_STREAM,
             {
                 'type': 'bid_placed',
                 'bid_id': bid.id,
                 'prospect_id': bid.prospect.id,
                 'data': notification_data
-            }
+            },
+            topics=bid_topics(bid)
         )
         
         # Send team update to the bidding team
-        async_to_sync(channel_layer.group_send)(
-            f"team_{bid.current_bidder.id}",
+        publish(
+            team_stream(bid.current_bidder.id),
             {
                 'type': 'team_update',
                 'data': {
-                    'pom_balance': bid.current_bidder.pom_balance,
-                    'available_pom': bid.current_bidder.get_available_pom(),
+                    **team_balances(bid.current_bidder),
                     'message': f'Bid placed: {bid.prospect.name} for {bid.current_bid} POM'
                 }
             }
@@ -210,14 +355,35 @@ def notify_bid_placed(bid_id):
         logger.error(f"❌ Bid {bid_id} not found for notification")
     except Exception as e:
         logger.error(f"❌ Error sending bid placed notification: {str(e)}")
+        raise  # left in the outbox and retried
+
+
+@shared_task
+def notify_outbid(team_id, notice):
+    """Tell the team that lost the lead on an auction, with the POM it got back (see events.outbid_notice)"""
+    try:
+        publish(
+            team_stream(team_id),
+            {
+                'type': 'outbid',
+                'bid_id': notice['bid_id'],
+                'data': notice
+            }
+        )
+        logger.info(f"📢 Sent outbid notification to team {team_id} for {notice['prospect_name']}")
+    except Exception as e:
+        logger.error(f"❌ Error sending outbid notification: {str(e)}")
+        raise  # left in the outbox and retried
 
 
 @shared_task
 def notify_new_bid(bid_id):
     """Send WebSocket notification when a new bid is placed"""
     try:
-        bid = Bid.objects.get(id=bid_id)
-        channel_layer = get_channel_layer()
+        bids = load_bids_for_events([bid_id])
+        if not bids:
+            raise Bid.DoesNotExist
+        bid = bids[0]
         
         notification_data = {
             'prospect_name': bid.prospect.name,
@@ -228,29 +394,20 @@ def notify_new_bid(bid_id):
             'bid_id': bid.id,
         }
         
-        # Send to general bidding channel
-        async_to_sync(channel_layer.group_send)(
-            "bidding_updates",
+        # Send to general bidding channel (and the bid's topic groups)
+        publish(
+            BIDDING_STREAM,
             {
                 'type': 'bid_update',
                 'bid_id': bid.id,
                 'data': notification_data
-            }
-        )
-        
-        # Send to specific bid channel
-        async_to_sync(channel_layer.group_send)(
-            f"bid_{bid.id}",
-            {
-                'type': 'bid_update',
-                'bid_id': bid.id,
-                'data': notification_data
-            }
+            },
+            topics=bid_topics(bid)
         )
         
         # Send team update to the bidding team
-        async_to_sync(channel_layer.group_send)(
-            f"team_{bid.current_bidder.id}",
+        publish(
+            team_stream(bid.current_bidder.id),
             {
                 'type': 'team_update',
                 'data': {
@@ -4,59 +4,113 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from django.db import models
-from .models import Bid, BidHistory
+from django.db.models import Prefetch
+from farm_system.fieldsets import SparseFieldsetViewMixin
+from farm_system.pagination import BidCursorPagination
+from prospects.models import serializable_prospects
+from .models import Bid, BidHistory, BidOutbid, ProxyBid
+from .outbox import outbox_metrics
+from .send_queue import send_queue_metrics
+from .services import complete_bids, complete_expired_bids, set_proxy_bid
 from .serializers import (
     BidSerializer,
     BidCreateSerializer,
-    BidPlaceSerializer
+    BidPlaceSerializer,
+    ProxyBidSerializer,
+    build_compact_bid_payload
 )
 
 
-class BidViewSet(viewsets.ModelViewSet):
+class BidViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Bid.objects.all()
     serializer_class = BidSerializer
     permission_classes = [permissions.IsAuthenticated]  # Simple: just require login
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'prospect', 'current_bidder']
+    pagination_class = BidCursorPagination
     
     def get_queryset(self):
         """All authenticated users can see all bids"""
-        return Bid.objects.select_related(
-            'prospect', 'nominator', 'current_bidder'
-        ).prefetch_related('history__team')
+        if self.is_compact():
+            return Bid.objects.select_related(
+                'prospect', 'nominator__owner', 'current_bidder__owner'
+            ).prefetch_related(
+                Prefetch('history', queryset=BidHistory.objects.select_related('team__owner'))
+            )
+        
+        # Only join and prefetch the relations the requested fields will render
+        queryset = Bid.objects.all()
+        if self.expands('prospect'):
+            queryset = queryset.prefetch_related(Prefetch('prospect', queryset=serializable_prospects()))
+        for field in ('nominator', 'current_bidder'):
+            if self.expands(field):
+                queryset = queryset.select_related(f'{field}__owner').prefetch_related(
+                    Prefetch(f'{field}__prospects', queryset=serializable_prospects())
+                )
+        if self.expands('history'):
+            queryset = queryset.prefetch_related(
+                Prefetch('history', queryset=BidHistory.objects.select_related('team__owner'))
+            )
+        elif self.wants('history'):
+            queryset = queryset.prefetch_related('history')
+        
+        return self.restrict_columns(queryset, {
+            'time_remaining': ['status', 'expires_at'],
+            'is_expired': ['expires_at'],
+        })
     
     def get_serializer_class(self):
         if self.action == 'create':
             return BidCreateSerializer
         return BidSerializer
     
+    def is_compact(self):
+        """Whether the caller asked for side-loaded teams and prospects (?compact=true)"""
+        return self.request.query_params.get('compact', '').lower() in ('1', 'true', 'yes')
+    
+    def bid_list_response(self, bids):
+        """Render a page of bids in the requested (full or compact) shape"""
+        page = self.paginate_queryset(bids)
+        
+        if self.is_compact():
+            payload = build_compact_bid_payload(bids if page is None else page, context=self.get_serializer_context())
+            if page is None:
+                return Response(payload)
+            response = self.get_paginated_response(payload['bids'])
+            response.data['included'] = payload['included']
+            return response
+        
+        serializer = self.get_serializer(bids if page is None else page, many=True)
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+    
+    def list(self, request, *args, **kwargs):
+        return self.bid_list_response(self.filter_queryset(self.get_queryset()))
+    
     @action(detail=False, methods=['get'])
     def active(self, request):
-        """Get all active bids"""
+        """Get active bids, newest first (cursor paginated)"""
         bids = self.get_queryset().filter(status='active')
-        serializer = self.get_serializer(bids, many=True)
-        return Response(serializer.data)
+        return self.bid_list_response(bids)
     
     @action(detail=False, methods=['get'])
     def completed(self, request):
-        """Get all completed bids"""
+        """Get completed and cancelled bids, newest first (cursor paginated)"""
         bids = self.get_queryset().filter(status__in=['completed', 'cancelled'])
-        serializer = self.get_serializer(bids, many=True)
-        return Response(serializer.data)
+        return self.bid_list_response(bids)
     
     @action(detail=False, methods=['get'])
     def my_bids(self, request):
-        """Get bids created by the current user's team"""
+        """Get bids created by the current user's team (cursor paginated)"""
         bids = self.get_queryset().filter(nominator=request.user.team)
-        serializer = self.get_serializer(bids, many=True)
-        return Response(serializer.data)
+        return self.bid_list_response(bids)
     
     @action(detail=False, methods=['get'])
     def my_winning(self, request):
-        """Get bids currently being won by the current user's team"""
+        """Get bids currently being won by the current user's team (cursor paginated)"""
         bids = self.get_queryset().filter(current_bidder=request.user.team, status='active')
-        serializer = self.get_serializer(bids, many=True)
-        return Response(serializer.data)
+        return self.bid_list_response(bids)
     
     @action(detail=True, methods=['get'])
     def prospect_history(self, request, pk=None):
@@ -123,7 +177,16 @@ class BidViewSet(viewsets.ModelViewSet):
             try:
                 updated_bid = serializer.save()
                 logger.info(f"Bid placed successfully: {updated_bid.current_bid} POM by {updated_bid.current_bidder.name}")
+                if updated_bid.current_bidder_id != request.user.team.id:
+                    # Another team's maximum bid answered straight away
+                    raise BidOutbid(updated_bid.current_bid)
                 return Response(BidSerializer(updated_bid).data)
+            except BidOutbid as e:
+                logger.warning(f"Bid on {pk} was outbid: current bid is now {e.current_bid} POM")
+                return Response(
+                    {'error': str(e), 'outbid': True, 'current_bid': e.current_bid},
+                    status=status.HTTP_409_CONFLICT
+                )
             except serializers.ValidationError as e:
                 logger.error(f"Validation error in save: {e}")
                 return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -131,6 +194,42 @@ class BidViewSet(viewsets.ModelViewSet):
             logger.error(f"Serializer validation failed: {serializer.errors}")
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=True, methods=['get', 'post', 'delete'])
+    def proxy(self, request, pk=None):
+        """Get, set or withdraw your team's private maximum bid on an auction"""
+        bid = self.get_object()
+        team = request.user.team
+        
+        if request.method == 'GET':
+            try:
+                return Response(ProxyBidSerializer(bid.proxies.get(team=team)).data)
+            except ProxyBid.DoesNotExist:
+                return Response(
+                    {'error': 'No maximum bid set on this auction'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+        
+        if request.method == 'DELETE':
+            bid.proxies.filter(team=team).delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        
+        serializer = ProxyBidSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            bid = set_proxy_bid(team.id, bid.id, serializer.validated_data['max_amount'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if bid.current_bidder_id != team.id:
+            e = BidOutbid(bid.current_bid)
+            return Response(
+                {'error': str(e), 'outbid': True, 'current_bid': e.current_bid},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(ProxyBidSerializer(bid.proxies.get(team=team)).data)
+    
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
         """Manually complete a bid (admin only)"""
@@ -148,7 +247,8 @@ class BidViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if bid.complete_bid():
+        if complete_bids(Bid.objects.filter(pk=bid.pk)):
+            bid.refresh_from_db()
             return Response(BidSerializer(bid).data)
         else:
             return Response(
@@ -178,18 +278,24 @@ class BidViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Find bids that have expired (expires_at is in the past)
-        expired_bids = Bid.objects.filter(
-            status='active',
-            expires_at__lt=timezone.now()
-        )
-        completed_count = 0
-        
-        for bid in expired_bids:
-            if bid.complete_bid():
-                completed_count += 1
+        # Complete all bids that have expired (expires_at is in the past) in one batch
+        completed_count = len(complete_expired_bids())
         
         return Response({
             'message': f'Completed {completed_count} expired bids',
             'completed_count': completed_count
+        })
+    
+    @action(detail=False, methods=['get'])
+    def metrics(self, request):
+        """WebSocket send queue and outbox counters of this server process (admin only)"""
+        if not request.user.is_staff:
+            return Response(
+                {'error': 'Only admins can view bidding metrics'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return Response({
+            'send_queue': send_queue_metrics.snapshot(),
+            'outbox': outbox_metrics.snapshot(),
         }) 
\ No newline at end of file
@@ -7,21 +7,41 @@ For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
 
+import asyncio
 import os
 
 from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'farm_system.settings')
 django_asgi_app = get_asgi_application()
 
+from django.conf import settings
 from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
+from bidding.events import bind_server_loop
 from bidding.routing import websocket_urlpatterns
+from bidding.outbox import outbox_dispatcher
+from bidding.scheduler import expiry_scheduler
+from farm_system.middleware import JWTAuthMiddleware
 
-application = ProtocolTypeRouter({
+# Close auctions at their deadlines from within the server process
+if settings.BID_EXPIRY_SCHEDULER_ENABLED:
+    expiry_scheduler.start()
+
+# Send the notifications queued in the outbox from within the server process
+if settings.BID_OUTBOX_DISPATCHER_ENABLED:
+    outbox_dispatcher.start()
+
+router = ProtocolTypeRouter({
     "http": django_asgi_app,
-    "websocket": AuthMiddlewareStack(
+    # WebSockets authenticate with the same JWT access tokens as the REST API
+    "websocket": JWTAuthMiddleware(
         URLRouter(
             websocket_urlpatterns
         )
     ),
-}) 
\ No newline at end of file
+})
+
+
+async def application(scope, receive, send):
+    # The scheduler and dispatcher threads send their events on the server's loop
+    bind_server_loop(asyncio.get_running_loop())
+    return await router(scope, receive, send)
@@ -18,11 +18,8 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
 # Configure periodic tasks
+# Expired bids are closed at their deadlines by bidding.scheduler.ExpiryScheduler
 app.conf.beat_schedule = {
-    'check-expired-bids': {
-        'task': 'bidding.tasks.check_expired_bids',
-        'schedule': 30.0,  # Every 30 seconds
-    },
     'update-prospect-stats-daily': {
         'task': 'prospects.tasks.update_prospect_stats',
         'schedule': crontab(hour=3, minute=0),  # Daily at 3 AM
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import redis
+import redis.sentinel
+from channels_redis.pubsub import RedisPubSubChannelLayer, RedisPubSubLoopLayer
+from channels_redis.utils import _consistent_hash, _wrap_close, decode_hosts
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def create_sync_pool(host, max_connections):
+    """Blocking connection pool for one shard, shared by every thread of the process"""
+    host = host.copy()
+    host.pop('max_connections', None)
+    if 'address' in host:
+        address = host.pop('address')
+        return redis.BlockingConnectionPool.from_url(address, max_connections=max_connections, **host)
+    if 'master_name' in host:
+        sentinel = redis.sentinel.Sentinel(host.pop('sentinels'), sentinel_kwargs=host.pop('sentinel_kwargs', None))
+        return redis.sentinel.SentinelConnectionPool(host.pop('master_name'), sentinel, max_connections=max_connections, **host)
+    return redis.BlockingConnectionPool(max_connections=max_connections, **host)
+
+
+class PooledRedisLoopLayer(RedisPubSubLoopLayer):
+    """Per event loop half of PooledRedisChannelLayer, adding pipelined group sends"""
+
+    async def group_send_many(self, groups, message):
+        """Send one message to several groups with a single PUBLISH pipeline per shard"""
+        payload = self.channel_layer.serialize(message)
+        by_shard = {}
+        for group in groups:
+            group_channel = self._get_group_channel_name(group)
+            by_shard.setdefault(self._get_shard(group_channel), []).append(group_channel)
+        await asyncio.gather(*[
+            self._publish_pipeline(shard, group_channels, payload)
+            for shard, group_channels in by_shard.items()
+        ])
+
+    async def _publish_pipeline(self, shard, group_channels, payload):
+        async with shard._lock:
+            shard._ensure_redis()
+            async with shard._redis.pipeline(transaction=False) as pipe:
+                for group_channel in group_channels:
+                    pipe.publish(group_channel, payload)
+                await pipe.execute()
+
+
+class PooledRedisChannelLayer(RedisPubSubChannelLayer):
+    """Redis pub/sub channel layer shared by several Daphne and Celery processes.
+
+    Connections to each shard come from a bounded pool (pool_size per shard and
+    event loop). Group sends from synchronous code (views, Celery tasks, the expiry
+    scheduler) go through a process-wide blocking pool instead of opening a new
+    event loop and connection per send, and group_send_many pipelines the PUBLISH
+    of one message to several groups into a single round trip per shard.
+    """
+
+    def __init__(self, *args, hosts=None, pool_size=20, prefix='asgi', **kwargs):
+        self.pool_size = pool_size
+        self.prefix = prefix
+        self.hosts = [{**host, 'max_connections': pool_size} for host in decode_hosts(hosts)]
+        super().__init__(*args, hosts=self.hosts, prefix=prefix, **kwargs)
+        self._sync_clients = None
+        self._sync_lock = threading.Lock()
+
+    def _get_layer(self):
+        loop = asyncio.get_running_loop()
+
+        try:
+            layer = self._layers[loop]
+        except KeyError:
+            layer = PooledRedisLoopLayer(
+                *self._args,
+                **self._kwargs,
+                channel_layer=self,
+            )
+            self._layers[loop] = layer
+            _wrap_close(self, loop)
+
+        return layer
+
+    async def group_send_many(self, groups, message):
+        """Send one message to several groups, pipelined per shard"""
+        await self._get_layer().group_send_many(groups, message)
+
+    def _sync_client(self, group_channel):
+        with self._sync_lock:
+            if self._sync_clients is None:
+                self._sync_clients = [
+                    redis.Redis(connection_pool=create_sync_pool(host, self.pool_size))
+                    for host in self.hosts
+                ]
+        return self._sync_clients[_consistent_hash(group_channel, len(self._sync_clients))]
+
+    def group_send_many_sync(self, groups, message):
+        """Blocking group_send_many for synchronous callers, over the process-wide pool"""
+        payload = self.serialize(message)
+        by_client = {}
+        for group in groups:
+            group_channel = f"{self.prefix}__group__{group}"
+            by_client.setdefault(self._sync_client(group_channel), []).append(group_channel)
+        for client, group_channels in by_client.items():
+            with client.pipeline(transaction=False) as pipe:
+                for group_channel in group_channels:
+                    pipe.publish(group_channel, payload)
+                pipe.execute()
+
+    def close_sync_pools(self):
+        """Disconnect the process-wide pools (they reconnect on the next send)"""
+        with self._sync_lock:
+            for client in self._sync_clients or []:
+                client.connection_pool.disconnect()
+            self._sync_clients = None
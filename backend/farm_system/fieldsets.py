@@ -0,0 +1,100 @@
+from rest_framework import serializers
+
+
+def parse_field_list(value):
+    """Parse a comma separated query parameter into a set of names (None if absent)"""
+    if value is None:
+        return None
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+class SparseFieldsetSerializerMixin:
+    """Render only the requested fields, with relations as ids unless expanded.
+
+    Pass ``fields`` and/or ``expand`` (sets of names) when creating the serializer.
+    Relations that can be collapsed to primary keys are declared on the serializer
+    as ``expandable_fields = {name: many}``. Without either argument the serializer
+    behaves exactly as before, with every field rendered and every relation nested.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+        if fields is not None or expand is not None:
+            expand = expand or set()
+            for name, many in self.expandable_fields.items():
+                if name in self.fields and name not in expand:
+                    self.fields[name] = serializers.PrimaryKeyRelatedField(many=many, read_only=True)
+
+
+class SparseFieldsetViewMixin:
+    """Read ``?fields=`` and ``?expand=`` and pass them to the serializer.
+
+    Viewsets use ``wants()`` and ``expands()`` in ``get_queryset`` to join or
+    prefetch only the relations that will be rendered, and ``restrict_columns()``
+    to load only the columns the requested fields need.
+    """
+
+    def _field_param(self, name):
+        request = getattr(self, 'request', None)
+        if request is None:
+            return None
+        return parse_field_list(request.query_params.get(name))
+
+    @property
+    def requested_fields(self):
+        return self._field_param('fields')
+
+    @property
+    def requested_expand(self):
+        return self._field_param('expand')
+
+    def wants(self, field):
+        """Whether field will be rendered"""
+        fields = self.requested_fields
+        return fields is None or field in fields
+
+    def expands(self, field):
+        """Whether relation field will be rendered nested (the default when no shape is requested)"""
+        if not self.wants(field):
+            return False
+        expand = self.requested_expand
+        if expand is None and self.requested_fields is None:
+            return True
+        return field in (expand or ())
+
+    def restrict_columns(self, queryset, dependencies=None):
+        """Defer model columns that no requested field needs (GET requests with ?fields= only)"""
+        fields = self.requested_fields
+        if fields is None or self.request.method != 'GET':
+            return queryset
+
+        dependencies = dependencies or {}
+        concrete = {field.name for field in queryset.model._meta.concrete_fields}
+        columns = {'id'}
+        # Cursor pagination reads its ordering columns from the page boundaries
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        columns.update(field.lstrip('-') for field in ordering)
+        for field in fields:
+            if field in dependencies:
+                columns.update(dependencies[field])
+            elif field in concrete:
+                columns.add(field)
+        # A relation joined with select_related cannot have its foreign key deferred
+        select_related = queryset.query.select_related
+        if isinstance(select_related, dict):
+            columns.update(name for name in select_related if name in concrete)
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        if issubclass(self.get_serializer_class(), SparseFieldsetSerializerMixin):
+            kwargs.setdefault('fields', self.requested_fields)
+            kwargs.setdefault('expand', self.requested_expand)
+        return super().get_serializer(*args, **kwargs)
@@ -1,6 +1,12 @@
+import asyncio
 import logging
 import time
+from urllib.parse import parse_qs
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
 
 logger = logging.getLogger(__name__)
 
@@ -25,4 +31,102 @@ class RequestLoggingMiddleware:
             duration = time.time() - start_time
             logger.debug(f"Request completed: {request.method} {request.path} - Status: {response.status_code} - Duration: {duration:.3f}s")
         
-        return response 
\ No newline at end of file
+        return response 
+
+
+# Close code sent to WebSocket clients whose access token has expired; they should refresh it and reconnect
+WS_CLOSE_TOKEN_EXPIRED = 4401
+
+# Clients may send the token as the subprotocols ["bearer", <token>] instead of ?token=
+TOKEN_SUBPROTOCOL = 'bearer'
+
+
+def get_websocket_token(scope):
+    """Raw JWT sent with a WebSocket handshake, and the subprotocol to accept it with"""
+    subprotocols = scope.get('subprotocols') or []
+    if TOKEN_SUBPROTOCOL in subprotocols:
+        index = subprotocols.index(TOKEN_SUBPROTOCOL)
+        if index + 1 < len(subprotocols):
+            return subprotocols[index + 1], TOKEN_SUBPROTOCOL
+    query = parse_qs(scope.get('query_string', b'').decode())
+    return query.get('token', [None])[0], None
+
+
+def validate_access_token(raw_token):
+    """Return (access token, expired); the token is None if it is missing, invalid or expired"""
+    if not raw_token:
+        return None, False
+    try:
+        return AccessToken(raw_token), False
+    except TokenError:
+        pass
+    try:
+        payload = AccessToken(raw_token, verify=False).payload
+    except TokenError:
+        return None, False
+    return None, payload.get('exp', 0) <= time.time()
+
+
+class JWTAuthMiddleware:
+    """Authenticate WebSockets with a SimpleJWT access token, without database queries.
+    
+    The scope gets a TokenUser built from the token claims, and the team_id claim
+    as scope['team_id'] so consumers skip the team lookup. Sockets without a valid
+    token stay anonymous. A socket whose token has expired is closed with
+    WS_CLOSE_TOKEN_EXPIRED, on connect or as soon as the token expires.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'websocket':
+            return await self.app(scope, receive, send)
+        
+        raw_token, subprotocol = get_websocket_token(scope)
+        token, expired = validate_access_token(raw_token)
+        
+        if expired:
+            # Complete the handshake so the client sees why it is closed
+            await receive()
+            await send({'type': 'websocket.accept', 'subprotocol': subprotocol})
+            await send({'type': 'websocket.close', 'code': WS_CLOSE_TOKEN_EXPIRED})
+            return
+        
+        scope = dict(scope, user=AnonymousUser(), auth_subprotocol=subprotocol)
+        if token is None:
+            return await self.app(scope, receive, send)
+        
+        scope['user'] = TokenUser(token)
+        if 'team_id' in token:
+            scope['team_id'] = token['team_id']
+        return await self.close_on_expiry(token['exp'], scope, receive, send)
+    
+    async def close_on_expiry(self, expires_at, scope, receive, send):
+        """Run the app, closing its socket with WS_CLOSE_TOKEN_EXPIRED once the token expires"""
+        expiry = None
+        closed = False
+        
+        async def expire():
+            nonlocal closed
+            await asyncio.sleep(max(expires_at - time.time(), 0))
+            if not closed:
+                closed = True
+                logger.info(f"⏰ Closing WebSocket for {scope['user']}: access token expired")
+                await send({'type': 'websocket.close', 'code': WS_CLOSE_TOKEN_EXPIRED})
+        
+        async def watched_send(message):
+            nonlocal expiry, closed
+            if closed:
+                return
+            if message['type'] == 'websocket.accept' and expiry is None:
+                expiry = asyncio.ensure_future(expire())
+            elif message['type'] == 'websocket.close':
+                closed = True
+            await send(message)
+        
+        try:
+            return await self.app(scope, receive, watched_send)
+        finally:
+            if expiry is not None:
+                expiry.cancel()
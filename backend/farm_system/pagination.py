@@ -0,0 +1,17 @@
+from rest_framework.pagination import CursorPagination
+
+
+class FarmCursorPagination(CursorPagination):
+    """Cursor pagination so deep pages cost the same index range scan as the first"""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class BidCursorPagination(FarmCursorPagination):
+    """Newest bids first, keyed on (created_at, id)"""
+    ordering = ('-created_at', '-id')
+
+
+class ProspectCursorPagination(FarmCursorPagination):
+    """Prospects alphabetically, keyed on (name, id)"""
+    ordering = ('name', 'id')
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def encode_reply(value):
+    """RESP2 encoding of a reply"""
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, bool):
+        return b'+OK\r\n' if value else b'$-1\r\n'
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, str):
+        return b'+' + value.encode() + b'\r\n'
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    if isinstance(value, Exception):
+        return b'-ERR ' + str(value).encode() + b'\r\n'
+    return b'*%d\r\n' % len(value) + b''.join(encode_reply(item) for item in value)
+
+
+async def read_command(reader):
+    """Read one RESP2 command (an array of bulk strings, or an inline command)"""
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        return line.split()
+    args = []
+    for _ in range(int(line[1:])):
+        length = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+class RedisStandIn:
+    """In-process server speaking enough of the Redis protocol for the channel layer.
+
+    Supports the connection handshake (PING, ECHO, SELECT, CLIENT), pub/sub
+    (PUBLISH, SUBSCRIBE, UNSUBSCRIBE) and plain keys (GET, SET, DEL, FLUSHALL),
+    so the Redis channel layer and several worker processes can be exercised
+    without an external Redis. Not for production use.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self.keys = {}
+        self.subscribers = {}
+        self.published = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+
+    @property
+    def url(self):
+        return f"redis://{self.host}:{self.port}/0"
+
+    def start(self):
+        """Serve from a background thread and return the server URL"""
+        self._thread = threading.Thread(target=self._run, name='redis-standin', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        logger.info(f"✅ Redis stand-in listening on {self.url}")
+        return self.url
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle_client, self.host, self.port)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            self._loop.close()
+
+    async def _handle_client(self, reader, writer):
+        channels = set()
+        try:
+            while True:
+                try:
+                    command = await read_command(reader)
+                except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+                    break
+                if command is None:
+                    break
+                if command:
+                    writer.write(self.execute(command, writer, channels))
+                    await writer.drain()
+        finally:
+            for channel in channels:
+                self.subscribers.get(channel, set()).discard(writer)
+            writer.close()
+
+    def execute(self, command, writer, channels):
+        """Run one command and return its encoded reply"""
+        name, args = command[0].upper(), command[1:]
+        if name == b'PING':
+            if channels:
+                return encode_reply([b'pong', args[0] if args else b''])
+            return encode_reply(args[0] if args else 'PONG')
+        if name == b'ECHO':
+            return encode_reply(args[0])
+        if name in (b'SELECT', b'CLIENT', b'QUIT'):
+            return encode_reply('OK')
+        if name == b'PUBLISH':
+            return encode_reply(self.publish(args[0], args[1]))
+        if name == b'SUBSCRIBE':
+            replies = []
+            for channel in args:
+                channels.add(channel)
+                self.subscribers.setdefault(channel, set()).add(writer)
+                replies.append(encode_reply([b'subscribe', channel, len(channels)]))
+            return b''.join(replies)
+        if name == b'UNSUBSCRIBE':
+            replies = []
+            for channel in args or list(channels):
+                channels.discard(channel)
+                self.subscribers.get(channel, set()).discard(writer)
+                replies.append(encode_reply([b'unsubscribe', channel, len(channels)]))
+            return b''.join(replies) or encode_reply([b'unsubscribe', None, 0])
+        if name == b'GET':
+            return encode_reply(self.keys.get(args[0]))
+        if name == b'SET':
+            self.keys[args[0]] = args[1]
+            return encode_reply('OK')
+        if name == b'DEL':
+            return encode_reply(sum(1 for key in args if self.keys.pop(key, None) is not None))
+        if name in (b'FLUSHALL', b'FLUSHDB'):
+            self.keys.clear()
+            return encode_reply('OK')
+        return encode_reply(ValueError(f"unknown command '{name.decode()}'"))
+
+    def publish(self, channel, data):
+        """Deliver a message to every connection subscribed to channel"""
+        self.published += 1
+        receivers = self.subscribers.get(channel, ())
+        message = encode_reply([b'message', channel, data])
+        for writer in receivers:
+            writer.write(message)
+        return len(receivers)
@@ -4,6 +4,7 @@ Django settings for farm_system project.
 
 from pathlib import Path
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -143,21 +144,75 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
-# Channels settings - Using in-memory channel layer
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+# Channels settings - in-memory channel layer (single process) unless CHANNEL_LAYER_URL is set.
+# A Redis channel layer lets several Daphne processes and Celery workers share groups;
+# give several comma separated URLs to shard groups across Redis servers.
+CHANNEL_LAYER_URL = config('CHANNEL_LAYER_URL', default='')
+if CHANNEL_LAYER_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'farm_system.channel_layers.PooledRedisChannelLayer',
+            'CONFIG': {
+                'hosts': [url.strip() for url in CHANNEL_LAYER_URL.split(',') if url.strip()],
+                'pool_size': config('CHANNEL_LAYER_POOL_SIZE', default=20, cast=int),
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
     }
-}
 
-# Celery settings
-# CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
-# CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
-CELERY_BROKER_URL = 'memory://'
-CELERY_RESULT_BACKEND = 'rpc://'
-CELERY_TASK_ALWAYS_EAGER = True
+# Celery settings - in-memory broker with eager tasks unless a broker URL (e.g. redis://localhost:6379/0) is set
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='memory://')
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='rpc://')
+CELERY_BROKER_POOL_LIMIT = config('CELERY_BROKER_POOL_LIMIT', default=10, cast=int)
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=True, cast=bool)
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# Auction expiry scheduler - closes bids at their deadlines (see bidding/scheduler.py)
+BID_EXPIRY_SCHEDULER_ENABLED = config('BID_EXPIRY_SCHEDULER_ENABLED', default=True, cast=bool)
+BID_CLOSING_SOON_LEAD_SECONDS = config('BID_CLOSING_SOON_LEAD_SECONDS', default='300,60', cast=lambda v: [int(s) for s in v.split(',') if s.strip()])
+BID_EXPIRY_RESYNC_SECONDS = config('BID_EXPIRY_RESYNC_SECONDS', default=300, cast=int)
+
+# WebSocket event replay - sequenced events kept per stream for clients resuming after a reconnect
+# 'memory' or 'database'. Sequence numbers must be shared once several processes publish, so a
+# Redis channel layer defaults to (and requires) the database log.
+BID_EVENT_LOG = config('BID_EVENT_LOG', default='database' if CHANNEL_LAYER_URL else 'memory')
+if CHANNEL_LAYER_URL and BID_EVENT_LOG != 'database':
+    raise ImproperlyConfigured(
+        "BID_EVENT_LOG must be 'database' when CHANNEL_LAYER_URL is set: a per-process memory log "
+        "gives clients that reconnect to another process wrong gaps and replays"
+    )
+BID_EVENT_REPLAY_SIZE = config('BID_EVENT_REPLAY_SIZE', default=500, cast=int)
+BID_SNAPSHOT_CACHE_SECONDS = config('BID_SNAPSHOT_CACHE_SECONDS', default=5, cast=int)
+# Outbound events queued per WebSocket before a slow client is resynced with a snapshot
+BID_SOCKET_QUEUE_SIZE = config('BID_SOCKET_QUEUE_SIZE', default=100, cast=int)
+
+# Notification outbox - events queued with their transaction and sent by a dispatcher (see bidding/outbox.py)
+BID_OUTBOX_DISPATCHER_ENABLED = config('BID_OUTBOX_DISPATCHER_ENABLED', default=True, cast=bool)
+BID_OUTBOX_BATCH_SIZE = config('BID_OUTBOX_BATCH_SIZE', default=100, cast=int)
+BID_OUTBOX_POLL_SECONDS = config('BID_OUTBOX_POLL_SECONDS', default=1.0, cast=float)
+BID_OUTBOX_MAX_ATTEMPTS = config('BID_OUTBOX_MAX_ATTEMPTS', default=10, cast=int)
+# Seconds a dispatcher holds the batch it is sending before another dispatcher may send it again
+BID_OUTBOX_CLAIM_SECONDS = config('BID_OUTBOX_CLAIM_SECONDS', default=60, cast=int)
+
+# Prospect stats import - outbound requests share one rate limit, retry with backoff and trip a circuit breaker
+STATS_IMPORT_RATE_PER_SECOND = config('STATS_IMPORT_RATE_PER_SECOND', default=0.5, cast=float)
+STATS_IMPORT_BURST = config('STATS_IMPORT_BURST', default=2, cast=int)
+STATS_IMPORT_WORKERS = config('STATS_IMPORT_WORKERS', default=3, cast=int)
+STATS_IMPORT_TIMEOUT_SECONDS = config('STATS_IMPORT_TIMEOUT_SECONDS', default=60, cast=int)
+STATS_IMPORT_MAX_RETRIES = config('STATS_IMPORT_MAX_RETRIES', default=3, cast=int)
+STATS_IMPORT_BACKOFF_SECONDS = config('STATS_IMPORT_BACKOFF_SECONDS', default=2.0, cast=float)
+STATS_IMPORT_BREAKER_THRESHOLD = config('STATS_IMPORT_BREAKER_THRESHOLD', default=5, cast=int)
+STATS_IMPORT_BREAKER_RESET_SECONDS = config('STATS_IMPORT_BREAKER_RESET_SECONDS', default=300, cast=int)
+# Where the reduced Chadwick register is cached between runs (rebuilt only when the upstream archive changes)
+STATS_IMPORT_CACHE_DIR = config('STATS_IMPORT_CACHE_DIR', default=str(BASE_DIR / 'cache'))
+# Register matches below this confidence (0-1) are listed for review in the admin's ID match filter
+STATS_IMPORT_REVIEW_CONFIDENCE = config('STATS_IMPORT_REVIEW_CONFIDENCE', default=0.9, cast=float)
+
 # Development settings for testing
 if DEBUG:
     # Fast bidding for development (5 minutes instead of 24 hours)
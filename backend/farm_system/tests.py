@@ -0,0 +1,137 @@
+import asyncio
+from datetime import date
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+from bidding.models import Bid
+from bidding.serializers import BidSerializer
+from farm_system.channel_layers import PooledRedisChannelLayer
+from farm_system.redis_standin import RedisStandIn
+from prospects.models import Prospect
+from prospects.serializers import ProspectSerializer
+from teams.serializers import TeamSerializer
+
+
+class SparseFieldsetTests(APITestCase):
+    """?fields= with ?expand= must work for every expandable relation of every viewset"""
+
+    ENDPOINTS = (
+        ('/api/teams/', TeamSerializer),
+        ('/api/prospects/', ProspectSerializer),
+        ('/api/bids/', BidSerializer),
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='pw')
+        bidder = User.objects.create_user('bidder', password='pw')
+        prospect = Prospect.objects.create(
+            name='Test Prospect', position='SS', organization='NYY',
+            date_of_birth=date(2003, 5, 1), eta=2027, created_by=cls.user.team, team=cls.user.team
+        )
+        Bid.objects.create(
+            prospect=prospect, nominator=cls.user.team, current_bidder=bidder.team,
+            starting_bid=5, current_bid=6
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_fields_with_expand(self):
+        for url, serializer in self.ENDPOINTS:
+            for field in serializer.expandable_fields:
+                for fields in (f'id,{field}', 'id'):
+                    with self.subTest(url=url, fields=fields, expand=field):
+                        response = self.client.get(url, {'fields': fields, 'expand': field})
+                        self.assertEqual(response.status_code, 200)
+
+    def test_expanded_relation_is_nested(self):
+        response = self.client.get('/api/teams/', {'fields': 'id,prospects', 'expand': 'prospects'})
+        self.assertEqual(response.status_code, 200)
+        teams = response.data['results'] if isinstance(response.data, dict) else response.data
+        team = next(team for team in teams if team['id'] == self.user.team.id)
+        self.assertEqual(set(team), {'id', 'prospects'})
+        self.assertEqual(team['prospects'][0]['name'], 'Test Prospect')
+
+
+class PooledRedisChannelLayerTests(SimpleTestCase):
+    """The Redis channel layer against the in-process Redis stand-in"""
+
+    MESSAGE = {'type': 'bid_update', 'stream': 'bidding_updates', 'seq': 1, 'text': '{"type": "bid_update"}'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.standin = RedisStandIn()
+        cls.url = cls.standin.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.standin.stop()
+        super().tearDownClass()
+
+    def run_with_layer(self, test, hosts=None):
+        """Run test(layer) on a new event loop with a fresh layer"""
+        async def run():
+            layer = PooledRedisChannelLayer(hosts=hosts or [self.url])
+            try:
+                await test(layer)
+            finally:
+                await layer.flush()
+                layer.close_sync_pools()
+
+        asyncio.run(run())
+
+    async def join(self, layer, group):
+        channel = await layer.new_channel()
+        await layer.group_add(group, channel)
+        return channel
+
+    async def receive(self, layer, channel):
+        return await asyncio.wait_for(layer.receive(channel), timeout=5)
+
+    def test_group_send_reaches_every_member(self):
+        async def test(layer):
+            channels = [await self.join(layer, 'bidding_updates') for _ in range(3)]
+            await layer.group_send('bidding_updates', self.MESSAGE)
+            for channel in channels:
+                self.assertEqual(await self.receive(layer, channel), self.MESSAGE)
+
+        self.run_with_layer(test)
+
+    def test_group_discard_stops_delivery(self):
+        async def test(layer):
+            left = await self.join(layer, 'bidding_updates')
+            stayed = await self.join(layer, 'bidding_updates')
+            await layer.group_discard('bidding_updates', left)
+            await layer.group_send('bidding_updates', self.MESSAGE)
+            self.assertEqual(await self.receive(layer, stayed), self.MESSAGE)
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(layer.receive(left), timeout=0.2)
+
+        self.run_with_layer(test)
+
+    def test_group_send_many_publishes_once_per_group(self):
+        groups = ['bidding_updates', 'bid_1', 'prospect_2', 'position_SS']
+
+        async def test(layer):
+            channels = [await self.join(layer, group) for group in groups]
+            published = self.standin.published
+            await layer.group_send_many(groups, self.MESSAGE)
+            for channel in channels:
+                self.assertEqual(await self.receive(layer, channel), self.MESSAGE)
+            self.assertEqual(self.standin.published - published, len(groups))
+
+        # Two shards, so the groups are split into one pipeline per shard
+        self.run_with_layer(test, hosts=[self.url, self.url])
+
+    def test_group_send_many_sync_from_a_thread(self):
+        groups = ['bidding_updates', 'bid_1', 'organization_Red-Sox']
+
+        async def test(layer):
+            channels = [await self.join(layer, group) for group in groups]
+            await asyncio.to_thread(layer.group_send_many_sync, groups, self.MESSAGE)
+            for channel in channels:
+                self.assertEqual(await self.receive(layer, channel), self.MESSAGE)
+
+        self.run_with_layer(test, hosts=[self.url, self.url])
@@ -1,13 +1,38 @@
+from django.conf import settings
 from django.contrib import admin
 from .models import Prospect
 
 
+class IdMatchFilter(admin.SimpleListFilter):
+    """Review queue for the ids the stats import matched from the register"""
+    title = 'ID match'
+    parameter_name = 'id_match'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('review', 'Needs review (low confidence)'),
+            ('unmatched', 'Unmatched'),
+            ('matched', 'Matched'),
+        )
+
+    def queryset(self, request, queryset):
+        review_confidence = getattr(settings, 'STATS_IMPORT_REVIEW_CONFIDENCE', 0.9)
+        if self.value() == 'review':
+            return queryset.filter(mlbam_id__isnull=False, id_confidence__lt=review_confidence)
+        if self.value() == 'unmatched':
+            return queryset.filter(mlbam_id__isnull=True)
+        if self.value() == 'matched':
+            return queryset.filter(mlbam_id__isnull=False)
+        return queryset
+
+
 @admin.register(Prospect)
 class ProspectAdmin(admin.ModelAdmin):
-    list_display = ['name', 'position', 'organization', 'level', 'eta', 'age', 'team', 'created_by', 'created_at']
-    list_filter = ['position', 'organization', 'level', 'eta', 'team', 'created_at']
-    search_fields = ['name', 'organization']
-    readonly_fields = ['created_at', 'updated_at', 'acquired_at', 'date_of_birth', 'age']
+    list_display = ['name', 'position', 'organization', 'level', 'eta', 'age', 'team', 'mlbam_id', 'id_confidence', 'created_by', 'created_at']
+    list_filter = [IdMatchFilter, 'position', 'organization', 'level', 'eta', 'team', 'created_at']
+    search_fields = ['name', 'organization', 'id_matched_name']
+    readonly_fields = ['created_at', 'updated_at', 'acquired_at', 'date_of_birth', 'age', 'id_confidence', 'id_matched_name', 'id_matched_at']
+    actions = ['confirm_id_match', 'clear_id_match']
     
     fieldsets = (
         ('Basic Information', {
@@ -16,6 +41,10 @@ class ProspectAdmin(admin.ModelAdmin):
         ('Team Assignment', {
             'fields': ('team', 'acquired_at')
         }),
+        ('External IDs', {
+            'fields': ('mlbam_id', 'bbref_id', 'fangraphs_id', 'id_matched_name', 'id_confidence', 'id_matched_at'),
+            'description': 'Matched from the Chadwick register by name and birthday. Correct a wrong match by entering the right ids.'
+        }),
         ('Metadata', {
             'fields': ('created_by', 'created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -28,4 +57,23 @@ class ProspectAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         if not change:  # New prospect
             obj.created_by = request.user.team if hasattr(request.user, 'team') else None
-        super().save_model(request, obj, form, change) 
\ No newline at end of file
+        if {'mlbam_id', 'bbref_id', 'fangraphs_id'} & set(form.changed_data):
+            # Entered by hand, so no longer a guess
+            obj.set_external_ids(
+                obj.mlbam_id, obj.bbref_id, obj.fangraphs_id,
+                confidence=1.0 if obj.mlbam_id else None,
+                matched_name=obj.name if obj.mlbam_id else ''
+            )
+        super().save_model(request, obj, form, change)
+    
+    @admin.action(description='Confirm the matched ids')
+    def confirm_id_match(self, request, queryset):
+        updated = queryset.filter(mlbam_id__isnull=False).update(id_confidence=1.0)
+        self.message_user(request, f"Confirmed the ids of {updated} prospects.")
+    
+    @admin.action(description='Clear the matched ids (matched again on the next stats import)')
+    def clear_id_match(self, request, queryset):
+        updated = queryset.update(
+            mlbam_id=None, bbref_id='', fangraphs_id='', id_confidence=None, id_matched_name='', id_matched_at=None
+        )
+        self.message_user(request, f"Cleared the ids of {updated} prospects.") 
\ No newline at end of file
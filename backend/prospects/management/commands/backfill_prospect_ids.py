@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from prospects.models import Prospect
+from prospects.services import get_baseball_data_service
+
+ID_FIELDS = ['mlbam_id', 'bbref_id', 'fangraphs_id', 'id_confidence', 'id_matched_name', 'id_matched_at']
+
+
+class Command(BaseCommand):
+    help = 'Match prospects without stored external ids to the Chadwick register in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rematch',
+            action='store_true',
+            help='Also match again prospects whose ids are below the review confidence (confirmed ids are kept)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the matches without saving them',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Prospects saved per bulk update',
+        )
+
+    def handle(self, *args, **options):
+        review_confidence = getattr(settings, 'STATS_IMPORT_REVIEW_CONFIDENCE', 0.9)
+        missing = Q(mlbam_id__isnull=True)
+        if options['rematch']:
+            missing |= Q(id_confidence__lt=review_confidence)
+        prospects = list(Prospect.objects.filter(missing).order_by('id'))
+        if not prospects:
+            self.stdout.write(self.style.SUCCESS('Every prospect already has its ids'))
+            return
+
+        baseball_service = get_baseball_data_service()
+        players = baseball_service.load_chadwick_data()
+        if not players:
+            self.stdout.write(self.style.ERROR('Could not load the Chadwick register'))
+            return
+
+        matched, low_confidence, unmatched = [], 0, 0
+        for prospect in prospects:
+            ids = baseball_service.resolve_player_ids(prospect.name, players, prospect.date_of_birth)
+            if ids is None:
+                unmatched += 1
+                self.stdout.write(self.style.WARNING(f"  No match: {prospect.name}"))
+                continue
+
+            prospect.set_external_ids(**ids)
+            matched.append(prospect)
+            if ids['confidence'] < review_confidence:
+                low_confidence += 1
+                self.stdout.write(
+                    f"  Review: {prospect.name} -> {ids['matched_name']} ({ids['mlbam_id']}), "
+                    f"confidence {ids['confidence']}"
+                )
+
+        if not options['dry_run']:
+            Prospect.objects.bulk_update(matched, ID_FIELDS, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would match' if options['dry_run'] else 'Matched'} {len(matched)} of {len(prospects)} prospects "
+            f"({low_confidence} below {review_confidence} confidence, {unmatched} unmatched)"
+        ))
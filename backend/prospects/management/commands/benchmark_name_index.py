@@ -0,0 +1,126 @@
+import random
+import string
+import time
+from difflib import get_close_matches
+import pandas as pd
+from django.core.management.base import BaseCommand
+from prospects.name_index import PlayerNameIndex
+
+SYLLABLES = ['an', 'ber', 'car', 'do', 'el', 'fer', 'gar', 'hen', 'is', 'jo', 'ken', 'lo', 'mar', 'ne',
+             'or', 'pe', 'quin', 'ro', 'san', 'tor', 'u', 'vas', 'wil', 'xa', 'yan', 'zo']
+
+
+def synthetic_register(size, rng):
+    """A register-shaped DataFrame of random names and birthdays"""
+    def name(parts):
+        return ''.join(rng.choice(SYLLABLES) for _ in range(parts))
+
+    return pd.DataFrame({
+        'name_first': [name(rng.randint(2, 3)) for _ in range(size)],
+        'name_last': [name(rng.randint(2, 4)) for _ in range(size)],
+        'key_mlbam': range(100000, 100000 + size),
+        'birth_year': [float(rng.randint(1960, 2005)) for _ in range(size)],
+        'birth_month': [float(rng.randint(1, 12)) for _ in range(size)],
+        'birth_day': [float(rng.randint(1, 28)) for _ in range(size)],
+    })
+
+
+def legacy_find(players, first_name, last_name, birth_year):
+    """The previous find_player_mlb_id: a scan for exact names, then difflib over every name"""
+    exact_matches = [p for p in players if p['name_first'] == first_name and p['name_last'] == last_name]
+    if exact_matches:
+        if birth_year and len(exact_matches) > 1:
+            for player in exact_matches:
+                if player['birth_year'] == birth_year:
+                    return player['key_mlbam']
+        return exact_matches[0]['key_mlbam']
+
+    all_names = [f"{p['name_first']} {p['name_last']}" for p in players]
+    matches = get_close_matches(f"{first_name} {last_name}", all_names, n=5, cutoff=0.6)
+    if birth_year:
+        for match in matches:
+            match_first, match_last = match.split(' ', 1)
+            for player in players:
+                if (player['name_first'] == match_first and player['name_last'] == match_last
+                        and player['birth_year'] == birth_year):
+                    return player['key_mlbam']
+    for match in matches:
+        match_first, match_last = match.split(' ', 1)
+        for player in players:
+            if player['name_first'] == match_first and player['name_last'] == match_last:
+                return player['key_mlbam']
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Benchmark player name lookups per second against register size, index versus linear scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='1000,10000,25000',
+            help='Comma separated register sizes to measure',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=100,
+            help='Lookups at each size',
+        )
+        parser.add_argument(
+            '--misspelled',
+            type=float,
+            default=0.3,
+            help='Fraction of lookups with a misspelled name (these need fuzzy matching)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+
+        self.stdout.write(
+            f"{'register':>9} {'build ms':>9} {'scan lookups/s':>15} {'index lookups/s':>16} {'speedup':>8} {'agree':>6}"
+        )
+        for size in sizes:
+            register = synthetic_register(size, rng)
+            queries = self._queries(register, options['queries'], options['misspelled'], rng)
+
+            start = time.perf_counter()
+            index = PlayerNameIndex(register)
+            build = time.perf_counter() - start
+
+            players = register.to_dict('records')
+            start = time.perf_counter()
+            expected = [legacy_find(players, *query) for query in queries]
+            scan = time.perf_counter() - start
+
+            start = time.perf_counter()
+            found = [index.find(*query) for query in queries]
+            indexed = time.perf_counter() - start
+
+            found = [index.key_mlbam(match.row) if match else None for match in found]
+            agree = sum(a == b for a, b in zip(expected, found)) / len(queries)
+            self.stdout.write(
+                f"{size:>9} {build * 1000:>9.0f} {len(queries) / scan:>15.0f} {len(queries) / indexed:>16.0f} "
+                f"{scan / indexed:>7.0f}x {agree:>6.0%}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            'Benchmark complete (agree: share of lookups resolving to the same player as the linear scan)'
+        ))
+
+    def _queries(self, register, count, misspelled, rng):
+        """(first, last, birth year) lookups of register players, some with one letter replaced"""
+        queries = []
+        for row in rng.sample(range(len(register)), min(count, len(register))):
+            first, last = register.at[row, 'name_first'], register.at[row, 'name_last']
+            if rng.random() < misspelled:
+                position = rng.randrange(len(last))
+                last = last[:position] + rng.choice(string.ascii_lowercase) + last[position + 1:]
+            queries.append((first, last, register.at[row, 'birth_year']))
+        return queries
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prospects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='prospect',
+            index=models.Index(fields=['name', 'id'], name='prospect_name_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prospect',
+            index=models.Index(fields=['team', 'name', 'id'], name='prospect_team_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prospects', '0002_prospect_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prospect',
+            name='bbref_id',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='prospect',
+            name='fangraphs_id',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='prospect',
+            name='id_confidence',
+            field=models.FloatField(blank=True, help_text='Confidence of the register match, 0-1 (1 once reviewed)', null=True),
+        ),
+        migrations.AddField(
+            model_name='prospect',
+            name='id_matched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='prospect',
+            name='id_matched_name',
+            field=models.CharField(blank=True, help_text='Register name the ids were matched to', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='prospect',
+            name='mlbam_id',
+            field=models.PositiveIntegerField(blank=True, help_text='MLB Advanced Media player id', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='prospect',
+            index=models.Index(fields=['mlbam_id'], name='prospects_p_mlbam_i_5873fa_idx'),
+        ),
+    ]
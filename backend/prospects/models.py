@@ -41,6 +41,14 @@ class Prospect(models.Model):
     last_tagged_at = models.DateTimeField(null=True, blank=True)
     last_tagged_by = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name='tagged_prospects')
     
+    # External ids, matched from the Chadwick register once and used for every later stats refresh
+    mlbam_id = models.PositiveIntegerField(null=True, blank=True, help_text="MLB Advanced Media player id")
+    bbref_id = models.CharField(max_length=20, blank=True)
+    fangraphs_id = models.CharField(max_length=20, blank=True)
+    id_confidence = models.FloatField(null=True, blank=True, help_text="Confidence of the register match, 0-1 (1 once reviewed)")
+    id_matched_name = models.CharField(max_length=100, blank=True, help_text="Register name the ids were matched to")
+    id_matched_at = models.DateTimeField(null=True, blank=True)
+    
     # Farm system
     team = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name='prospects')
     acquired_at = models.DateTimeField(null=True, blank=True)
@@ -60,6 +68,10 @@ class Prospect(models.Model):
             models.Index(fields=['eta']),
             models.Index(fields=['tags_applied']),
             models.Index(fields=['last_tagged_by']),
+            models.Index(fields=['mlbam_id']),
+            # Cursor pagination: one index range scan per page of each listing
+            models.Index(fields=['name', 'id'], name='prospect_name_cursor_idx'),
+            models.Index(fields=['team', 'name', 'id'], name='prospect_team_cursor_idx'),
         ]
     
     def __str__(self):
@@ -90,7 +102,7 @@ class Prospect(models.Model):
     @property
     def is_available(self):
         """Check if prospect is available for bidding (not on any team)"""
-        return self.team is None
+        return self.team_id is None
     
     @property
     def current_bid(self):
@@ -136,12 +148,10 @@ class Prospect(models.Model):
         """Tag a prospect to extend eligibility (cost doubles each time)"""
         
         tag_cost = self.next_tag_cost
-        if team.pom_balance < tag_cost:
-            raise ValueError(f"Team does not have enough POM to tag prospect (cost: {tag_cost} POM)")
         
-        # Deduct POM from team
-        team.pom_balance -= tag_cost
-        team.save()
+        # Deduct POM from team, only if the POM not committed to bids covers it
+        if not team.deduct_pom(tag_cost):
+            raise ValueError(f"Team does not have enough POM to tag prospect (cost: {tag_cost} POM)")
         
         # Tag the prospect
         self.tags_applied += 1
@@ -149,8 +159,27 @@ class Prospect(models.Model):
         self.last_tagged_by = team
         self.save()
     
+    def set_external_ids(self, mlbam_id, bbref_id='', fangraphs_id='', confidence=None, matched_name=''):
+        """Record the register match (does not save)"""
+        self.mlbam_id = mlbam_id
+        self.bbref_id = bbref_id
+        self.fangraphs_id = fangraphs_id
+        self.id_confidence = confidence
+        self.id_matched_name = matched_name
+        self.id_matched_at = timezone.now()
+    
     def transfer_to_team(self, new_team):
         """Transfer prospect to a new team"""
         self.team = new_team
         self.acquired_at = timezone.now()
-        self.save() 
\ No newline at end of file
+        self.save() 
+
+
+def serializable_prospects():
+    """Prospects with everything ProspectSerializer renders preloaded"""
+    from bidding.models import Bid
+    return Prospect.objects.select_related(
+        'team__owner', 'created_by__owner', 'last_tagged_by__owner'
+    ).prefetch_related(
+        models.Prefetch('bids', queryset=Bid.objects.filter(status='active'), to_attr='active_bids')
+    )
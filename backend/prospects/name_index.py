@@ -0,0 +1,149 @@
+import heapq
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import NamedTuple, Optional
+import pandas as pd
+
+
+class NameMatch(NamedTuple):
+    """A register player matched to a name"""
+    row: int  # position in the register
+    name: str  # the matched "first last"
+    similarity: float  # 1.0 for an exact name match, else the difflib ratio
+    birthday_score: int  # 3 for the birth year, 2 for the month and 1 for the day that agree
+    same_name: int  # register players sharing the matched name
+
+
+class PlayerNameIndex:
+    """Name lookups over the Chadwick register, built once per register load.
+
+    Exact matches come from a dict keyed on the (first, last) name, and players
+    sharing a name are told apart by a secondary (first, last, birth year) key.
+    Fuzzy candidates come from an inverted index of character trigrams: only the
+    names sharing the most trigrams with the query are scored with difflib, with
+    the same ratio and cutoff get_close_matches uses, instead of every name.
+    """
+
+    NGRAM = 3
+
+    def __init__(self, players: pd.DataFrame, max_candidates: int = 100):
+        self.players = players.reset_index(drop=True)
+        self.max_candidates = max_candidates
+        self._mlbam = self.players['key_mlbam'].tolist()
+        self._birthdays = list(zip(*(
+            [None if pd.isna(value) else int(value) for value in self.players[column].tolist()]
+            for column in ('birth_year', 'birth_month', 'birth_day')
+        )))
+
+        self._by_name = {}
+        self._by_birth_year = {}
+        names = zip(self.players['name_first'].tolist(), self.players['name_last'].tolist())
+        for row, key in enumerate(names):
+            self._by_name.setdefault(key, []).append(row)
+            birth_year = self._birthdays[row][0]
+            if birth_year is not None:
+                self._by_birth_year.setdefault((*key, birth_year), []).append(row)
+
+        # Each distinct full name once, with the trigrams pointing back to it
+        self._name_keys = list(self._by_name)
+        self._names = [f"{first} {last}" for first, last in self._name_keys]
+        self._grams = {}
+        for position, name in enumerate(self._names):
+            for gram in self._ngrams(name):
+                self._grams.setdefault(gram, []).append(position)
+
+    def __len__(self):
+        return len(self._mlbam)
+
+    @classmethod
+    def _ngrams(cls, name: str):
+        padded = f" {name} "
+        return {padded[i:i + cls.NGRAM] for i in range(len(padded) - cls.NGRAM + 1)}
+
+    def key_mlbam(self, row: int) -> int:
+        return self._mlbam[row]
+
+    def player(self, row: int) -> dict:
+        """Every register column of one player"""
+        return self.players.iloc[row].to_dict()
+
+    def close_matches(self, name: str, n: int = 5, cutoff: float = 0.6):
+        """Like difflib.get_close_matches over the register: up to n (ratio, name, position), best first"""
+        shared = Counter()
+        for gram in self._ngrams(name):
+            shared.update(self._grams.get(gram, ()))
+
+        matcher = SequenceMatcher()
+        matcher.set_seq2(name)
+        scored = []
+        for position, _ in shared.most_common(self.max_candidates):
+            matcher.set_seq1(self._names[position])
+            if (matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff
+                    and matcher.ratio() >= cutoff):
+                scored.append((matcher.ratio(), self._names[position], position))
+        return heapq.nlargest(n, scored)
+
+    def _birthday_score(self, row, birth_year, birth_month, birth_day):
+        year, month, day = self._birthdays[row]
+        score = 0
+        if birth_year and year == birth_year:
+            score += 3  # Year match is most important
+        if birth_month and month == birth_month:
+            score += 2  # Month match is second most important
+        if birth_day and day == birth_day:
+            score += 1  # Day match is least important
+        return score
+
+    def find(self, first_name: str, last_name: str, birth_year: Optional[int] = None,
+             birth_month: Optional[int] = None, birth_day: Optional[int] = None) -> Optional[NameMatch]:
+        """Best register player for a lowercased name, or None.
+
+        An exact name wins; among players sharing it, the first whose birthday agrees
+        with the given parts. Otherwise the closest fuzzy name, preferring the
+        candidate whose birthday agrees best when a birth year is given.
+        """
+        rows = self._by_name.get((first_name, last_name))
+        if rows:
+            name = f"{first_name} {last_name}"
+            if birth_year and len(rows) > 1:
+                for row in self._by_birth_year.get((first_name, last_name, birth_year), ()):
+                    _, month, day = self._birthdays[row]
+                    if (not birth_month or month == birth_month) and (not birth_day or day == birth_day):
+                        score = self._birthday_score(row, birth_year, birth_month, birth_day)
+                        return NameMatch(row, name, 1.0, score, len(rows))
+            score = self._birthday_score(rows[0], birth_year, birth_month, birth_day)
+            return NameMatch(rows[0], name, 1.0, score, len(rows))
+
+        matches = self.close_matches(f"{first_name} {last_name}")
+        if not matches:
+            return None
+
+        if birth_year:
+            best, best_score = None, 0
+            for ratio, name, position in matches:
+                rows = self._by_name[self._name_keys[position]]
+                for row in rows:
+                    score = self._birthday_score(row, birth_year, birth_month, birth_day)
+                    if score > best_score:
+                        best, best_score = NameMatch(row, name, ratio, score, len(rows)), score
+            if best:
+                return best
+
+        ratio, name, position = matches[0]
+        rows = self._by_name[self._name_keys[position]]
+        return NameMatch(rows[0], name, ratio, 0, len(rows))
+
+
+def match_confidence(match: NameMatch, birthday_given: bool) -> float:
+    """Confidence in a match from 0 to 1.
+
+    The name similarity, scaled from 0.4 (no part of a given birthday agrees) to
+    1.0 (year, month and day agree), and split between namesakes unless the whole
+    birthday told them apart.
+    """
+    confidence = match.similarity
+    if birthday_given:
+        confidence *= (4 + match.birthday_score) / 10
+    if match.same_name > 1 and match.birthday_score < 6:
+        confidence /= match.same_name
+    return round(confidence, 3)
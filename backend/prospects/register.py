@@ -0,0 +1,132 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import zipfile
+from pathlib import Path
+import pandas as pd
+from pyarrow import feather
+
+logger = logging.getLogger(__name__)
+
+# Columns of the Chadwick people files the import uses, read with fixed dtypes
+# (IDs and birth dates stay float so missing values are NaN rather than object columns)
+REGISTER_DTYPES = {
+    'key_mlbam': 'float64',
+    'key_bbref': 'str',
+    'key_fangraphs': 'float64',
+    'name_first': 'str',
+    'name_last': 'str',
+    'birth_year': 'float64',
+    'birth_month': 'float64',
+    'birth_day': 'float64',
+}
+
+PEOPLE_FILE_PATTERN = re.compile("/people.+csv$")
+
+
+def read_register_archive(content: bytes) -> pd.DataFrame:
+    """Read the MLB players (rows with key_mlbam) out of a register zip archive"""
+    with zipfile.ZipFile(io.BytesIO(content)) as zip_file:
+        people_files = [
+            zip_info.filename for zip_info in zip_file.infolist()
+            if PEOPLE_FILE_PATTERN.search(zip_info.filename)
+        ]
+        if not people_files:
+            raise ValueError("Could not find any people.csv files in the register archive")
+
+        logger.info(f"Found {len(people_files)} people.csv files")
+        frames = []
+        for filename in people_files:
+            with zip_file.open(filename) as csv_file:
+                people = pd.read_csv(csv_file, usecols=list(REGISTER_DTYPES), dtype=REGISTER_DTYPES)
+            frames.append(people[people['key_mlbam'].notna()])
+
+    people = pd.concat(frames, ignore_index=True)
+    return pd.DataFrame({
+        'name_first': people['name_first'].fillna('').str.lower(),
+        'name_last': people['name_last'].fillna('').str.lower(),
+        'key_mlbam': people['key_mlbam'].astype('int64'),
+        'key_bbref': people['key_bbref'].fillna(''),
+        'key_fangraphs': people['key_fangraphs'].astype('Int64'),
+        'birth_year': people['birth_year'],
+        'birth_month': people['birth_month'],
+        'birth_day': people['birth_day'],
+    })
+
+
+class RegisterCache:
+    """The reduced register on disk as an uncompressed Feather file, plus the ETag and
+    SHA-256 of the archive it was built from. Uncompressed Feather is memory-mapped
+    on read, so later runs load it without parsing or copying."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.path = self.directory / 'chadwick-register.feather'
+        self.metadata_path = self.directory / 'chadwick-register.json'
+
+    def metadata(self) -> dict:
+        """ETag and hash of the cached archive, or {} when there is no usable cache"""
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.metadata_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def read(self) -> pd.DataFrame:
+        return feather.read_table(self.path, memory_map=True).to_pandas()
+
+    def write(self, players: pd.DataFrame, etag: str, sha256: str):
+        """Replace the cache atomically, so a concurrent reader never sees half a file"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        players.reset_index(drop=True).to_feather(temporary, compression='uncompressed')
+        os.replace(temporary, self.path)
+        self.save_metadata(etag=etag, sha256=sha256, players=len(players))
+
+    def save_metadata(self, **metadata):
+        temporary = self.metadata_path.with_suffix(f'.{os.getpid()}.tmp')
+        temporary.write_text(json.dumps(metadata))
+        os.replace(temporary, self.metadata_path)
+
+
+def load_register(download, url: str, cache: RegisterCache) -> pd.DataFrame:
+    """The register's MLB players, rebuilt only when the upstream archive changed.
+
+    download(url, headers) must return a requests response. The cached ETag is sent
+    as If-None-Match, so an unchanged archive costs one 304; without an ETag match
+    the archive is downloaded and hashed, and only parsed when its hash differs
+    from the cached one. If the download fails, a cached register is used instead.
+    """
+    metadata = cache.metadata()
+    headers = {'If-None-Match': metadata['etag']} if metadata.get('etag') else {}
+    try:
+        response = download(url, headers=headers)
+    except Exception as e:
+        if not metadata:
+            raise
+        logger.warning(f"⚠️ Could not check the Chadwick register ({e}), using the cached copy")
+        return cache.read()
+
+    if response.status_code == 304:
+        logger.info("Chadwick register unchanged (ETag match), using the cached copy")
+        return cache.read()
+
+    etag = response.headers.get('ETag', '')
+    sha256 = hashlib.sha256(response.content).hexdigest()
+    if sha256 == metadata.get('sha256'):
+        logger.info("Chadwick register unchanged (same content hash), using the cached copy")
+        cache.save_metadata(**{**metadata, 'etag': etag})
+        return cache.read()
+
+    players = read_register_archive(response.content)
+    try:
+        cache.write(players, etag=etag, sha256=sha256)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not cache the Chadwick register in {cache.directory}: {e}")
+        return players
+    logger.info(f"✅ Cached {len(players)} MLB players from the Chadwick register")
+    return cache.read()
@@ -1,8 +1,11 @@
 from rest_framework import serializers
+from farm_system.fieldsets import SparseFieldsetSerializerMixin
 from .models import Prospect
 
 
-class ProspectSerializer(serializers.ModelSerializer):
+class ProspectSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {'team': False, 'created_by': False, 'last_tagged_by': False}
+    
     team = serializers.SerializerMethodField()
     created_by = serializers.SerializerMethodField()
     is_available = serializers.ReadOnlyField()
@@ -49,7 +52,11 @@ class ProspectSerializer(serializers.ModelSerializer):
         }
     
     def get_current_bid(self, obj):
-        bid = obj.current_bid
+        # Use the active bids prefetched by ProspectViewSet when available
+        if hasattr(obj, 'active_bids'):
+            bid = obj.active_bids[0] if obj.active_bids else None
+        else:
+            bid = obj.current_bid
         if bid:
             # Return minimal bid info to avoid circular reference
             return {
@@ -72,6 +79,28 @@ class ProspectSerializer(serializers.ModelSerializer):
         return None
 
 
+class CompactProspectSerializer(serializers.ModelSerializer):
+    """Prospect fields that need no extra queries, with related teams referenced by id"""
+    age = serializers.ReadOnlyField()
+    is_available = serializers.ReadOnlyField()
+    is_eligible = serializers.ReadOnlyField()
+    eligibility_status = serializers.ReadOnlyField()
+    eligibility_threshold_ab = serializers.ReadOnlyField()
+    eligibility_threshold_ip = serializers.ReadOnlyField()
+    next_tag_cost = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = Prospect
+        fields = [
+            'id', 'name', 'position', 'organization', 'date_of_birth', 'age', 'level', 'eta',
+            'team', 'acquired_at', 'created_by', 'is_available',
+            'at_bats', 'innings_pitched', 'tags_applied', 'last_tagged_at', 'last_tagged_by',
+            'is_eligible', 'eligibility_status', 'eligibility_threshold_ab', 'eligibility_threshold_ip',
+            'next_tag_cost'
+        ]
+        read_only_fields = fields
+
+
 class ProspectCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Prospect
@@ -1,89 +1,101 @@
 import requests
-import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional
-import io
-import zipfile
-import re
-from difflib import get_close_matches
 import pandas as pd
+from django.conf import settings
 from pybaseball import batting_stats_range, pitching_stats_range
 from datetime import date
+from .name_index import NameMatch, PlayerNameIndex, match_confidence
+from .register import RegisterCache, load_register
+from .throttle import get_stats_fetcher
 
 logger = logging.getLogger(__name__)
 
+# First day of the league-wide stat ranges that MLB appearances are counted from
+STATS_START_DATE = '2022-05-01'
+
 
 class BaseballDataService:
     """Service for fetching baseball statistics from external sources using Chadwick Bureau lookup"""
     
-    def __init__(self):
+    def __init__(self, fetcher=None):
         self.chadwick_url = "https://github.com/chadwickbureau/register/archive/refs/heads/master.zip"
         self._chadwick_data = None
+        # League-wide stat ranges keyed by mlbID, fetched once per service instance (one import run)
+        self._at_bats_by_id = None
+        self._innings_pitched_by_id = None
+        # Every outbound request goes through the shared rate limit, retries and circuit breaker
+        self.fetcher = fetcher or get_stats_fetcher()
+        self._load_locks = {name: threading.Lock() for name in ('chadwick', 'batting', 'pitching')}
+    
+    def _download(self, url, headers=None):
+        response = requests.get(url, headers=headers, timeout=getattr(settings, 'STATS_IMPORT_TIMEOUT_SECONDS', 60))
+        response.raise_for_status()
+        return response
+    
+    def prepare_import(self, load_register: bool = True):
+        """Fetch the Chadwick register and both stat ranges concurrently; returns the register players.
+
+        Pass load_register=False when every prospect already has its ids; None is returned then.
+        """
+        workers = getattr(settings, 'STATS_IMPORT_WORKERS', 3)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stats-import') as pool:
+            players = pool.submit(self.load_chadwick_data) if load_register else None
+            batting = pool.submit(self._load_at_bats)
+            pitching = pool.submit(self._load_innings_pitched)
+            # A range that cannot be fetched only costs this run its stats, not the whole import
+            if not self._range_loaded(batting, 'batting'):
+                self._at_bats_by_id = {}
+            if not self._range_loaded(pitching, 'pitching'):
+                self._innings_pitched_by_id = {}
+            return players.result() if players else None
     
-    def _extract_people_files(self, zip_archive: zipfile.ZipFile):
-        """Extract all people.csv files from the zip archive"""
-        people_pattern = re.compile("/people.+csv$")
-        return [
-            zip_info for zip_info in zip_archive.infolist()
-            if people_pattern.search(zip_info.filename)
-        ]
+    @staticmethod
+    def _range_loaded(future, name):
+        try:
+            future.result()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Could not fetch the {name} stat range, skipping {name} stats this run: {e}")
+            return False
     
-    def load_chadwick_data(self):
-        """Load Chadwick Bureau player data from zip file (MLB players only)"""
-        if self._chadwick_data is not None:
+    def load_chadwick_data(self) -> Optional[PlayerNameIndex]:
+        """Load Chadwick Bureau player data (MLB players only) into a name index"""
+        with self._load_locks['chadwick']:
+            if self._chadwick_data is None:
+                self._chadwick_data = self._load_chadwick_data()
             return self._chadwick_data
-            
+    
+    def load_chadwick_register(self) -> pd.DataFrame:
+        """The register's MLB players as a DataFrame, from the on-disk cache unless upstream changed"""
+        cache = RegisterCache(getattr(settings, 'STATS_IMPORT_CACHE_DIR', settings.BASE_DIR / 'cache'))
+        return load_register(
+            lambda url, headers: self.fetcher.call(self._download, url, headers=headers),
+            self.chadwick_url,
+            cache
+        )
+    
+    def _load_chadwick_data(self):
         try:
-            logger.info("Loading Chadwick Bureau player data from zip...")
-            response = requests.get(self.chadwick_url)
-            response.raise_for_status()
-            
-            # Extract all people.csv files from the zip
-            with zipfile.ZipFile(io.BytesIO(response.content)) as zip_file:
-                people_files = self._extract_people_files(zip_file)
-                
-                if not people_files:
-                    logger.error("Could not find any people.csv files in the zip")
-                    return []
-                
-                logger.info(f"Found {len(people_files)} people.csv files")
-                
-                # Read all CSV files and combine them
-                all_players = []
-                for file_info in people_files:
-                    logger.info(f"Reading {file_info.filename}")
-                    with zip_file.open(file_info.filename) as csv_file:
-                        df = pd.read_csv(csv_file, low_memory=False)
-                        
-                        # Filter for MLB players only (those with key_mlbam)
-                        mlb_df = df[df['key_mlbam'].notna() & (df['key_mlbam'] != '')]
-                        
-                        # Convert to list of dictionaries
-                        for _, row in mlb_df.iterrows():
-                            all_players.append({
-                                'name_first': str(row.get('name_first', '')).lower(),
-                                'name_last': str(row.get('name_last', '')).lower(),
-                                'key_mlbam': int(row.get('key_mlbam', '')),
-                                'birth_year': row.get('birth_year'),
-                                'birth_month': row.get('birth_month'),
-                                'birth_day': row.get('birth_day')
-                            })
-                
-                self._chadwick_data = all_players
-                logger.info(f"Loaded {len(self._chadwick_data)} MLB players from Chadwick Bureau")
-                return self._chadwick_data
+            logger.info("Loading Chadwick Bureau player data...")
+            players = PlayerNameIndex(self.load_chadwick_register())
+            logger.info(f"Loaded {len(players)} MLB players from Chadwick Bureau")
+            return players
             
         except Exception as e:
             logger.error(f"Error loading Chadwick Bureau data: {e}")
-            return []
+            return None
     
-    def find_player_mlb_id(self, player_name: str, players: pd.DataFrame, birth_year: Optional[int] = None, 
-                            birth_month: Optional[int] = None, birth_day: Optional[int] = None) -> Optional[str]:
+    def find_player_mlb_id(self, player_name: str, players: PlayerNameIndex, birth_year: Optional[int] = None, 
+                            birth_month: Optional[int] = None, birth_day: Optional[int] = None) -> Optional[int]:
         """
-        Find Baseball Reference ID for a player using Chadwick Bureau data
+        Find the MLB Player ID for a player using the Chadwick Bureau name index
         
         Args:
             player_name: Full name of the player (e.g., "Mike Trout")
+            players: Index of the register, from load_chadwick_data()
             birth_year: Player's birth year (optional, for more accurate matching)
             birth_month: Player's birth month (optional, for more accurate matching)
             birth_day: Player's birth day (optional, for more accurate matching)
@@ -92,96 +104,69 @@ class BaseballDataService:
             int MLB Player ID (e.g., 545361) or None if not found
         """
         try:
-            if not players:
-                return None
-            
-            # Split player name into first and last
-            name_parts = player_name.strip().split()
-            if len(name_parts) < 2:
-                logger.warning(f"Player name '{player_name}' doesn't have enough parts")
-                return None
-            
-            first_name = name_parts[0].lower()
-            last_name = name_parts[-1].lower()
-            
-            logger.info(f"Searching for player: {first_name} {last_name}")
-            if birth_year:
-                logger.info(f"With birth year: {birth_year}")
-            
-            # Search for exact name match first
-            exact_matches = []
-            for player in players:
-                if player['name_first'] == first_name and player['name_last'] == last_name:
-                    exact_matches.append(player)
-            
-            if exact_matches:
-                # If we have birthday info, try to match by birthday
-                if birth_year and len(exact_matches) > 1:
-                    for player in exact_matches:
-                        if (player['birth_year'] == birth_year and 
-                            (not birth_month or player['birth_month'] == birth_month) and
-                            (not birth_day or player['birth_day'] == birth_day)):
-                            mlb_id = player['key_mlbam']
-                            logger.info(f"Found exact match with birthday: {mlb_id}")
-                            return mlb_id
-                
-                # If no birthday match or only one exact name match, return the first
-                mlb_id = exact_matches[0]['key_mlbam']
-                logger.info(f"Found exact name match: {mlb_id}")
-                return mlb_id
-            
-            # If no exact match, try fuzzy matching
-            all_names = [f"{p['name_first']} {p['name_last']}" for p in players]
-            search_name = f"{first_name} {last_name}"
-            
-            matches = get_close_matches(search_name, all_names, n=5, cutoff=0.6)
-            
-            if matches:
-                logger.info(f"Found fuzzy matches: {matches}")
-                
-                # If we have birthday info, try to find the best match using birthday
-                if birth_year:
-                    best_match = None
-                    best_score = 0
-                    
-                    for match in matches:
-                        match_first, match_last = match.split(' ', 1)
-                        for player in players:
-                            if player['name_first'] == match_first and player['name_last'] == match_last:
-                                # Calculate birthday match score
-                                score = 0
-                                if player['birth_year'] == birth_year:
-                                    score += 3  # Year match is most important
-                                if birth_month and player['birth_month'] == birth_month:
-                                    score += 2  # Month match is second most important
-                                if birth_day and player['birth_day'] == birth_day:
-                                    score += 1  # Day match is least important
-                                
-                                if score > best_score:
-                                    best_score = score
-                                    best_match = player
-                    
-                    if best_match and best_score > 0:
-                        mlb_id = best_match['key_mlbam']
-                        logger.info(f"Using fuzzy match with birthday (score {best_score}): {mlb_id}")
-                        return mlb_id
-                
-                # If no birthday match or no birthday provided, return the first fuzzy match
-                for match in matches:
-                    match_first, match_last = match.split(' ', 1)
-                    for player in players:
-                        if player['name_first'] == match_first and player['name_last'] == match_last:
-                            mlb_id = player['key_mlbam']
-                            logger.info(f"Using fuzzy match (no birthday): {mlb_id}")
-                            return mlb_id
-            
-            logger.warning(f"No match found for player: {player_name}")
-            return None
+            match = self._match_player(player_name, players, birth_year, birth_month, birth_day)
+            return players.key_mlbam(match.row) if match else None
             
         except Exception as e:
             logger.error(f"Error finding player ID for {player_name}: {e}")
             return None
     
+    def resolve_player_ids(self, player_name: str, players: PlayerNameIndex,
+                           birth_date: Optional[date] = None) -> Optional[dict]:
+        """
+        Match a player to the register once, for storing on the prospect
+        
+        Returns:
+            dict of mlbam_id, bbref_id, fangraphs_id, confidence (0-1) and matched_name, or None if not found
+        """
+        birth_parts = (birth_date.year, birth_date.month, birth_date.day) if birth_date else (None, None, None)
+        match = self._match_player(player_name, players, *birth_parts)
+        if match is None:
+            return None
+        
+        player = players.player(match.row)
+        fangraphs_id = player.get('key_fangraphs')
+        return {
+            'mlbam_id': int(player['key_mlbam']),
+            'bbref_id': player.get('key_bbref') or '',
+            'fangraphs_id': '' if pd.isna(fangraphs_id) else str(int(fangraphs_id)),
+            'confidence': match_confidence(match, birth_date is not None),
+            'matched_name': match.name.title(),
+        }
+    
+    def _match_player(self, player_name: str, players: PlayerNameIndex, birth_year: Optional[int] = None,
+                      birth_month: Optional[int] = None, birth_day: Optional[int] = None) -> Optional[NameMatch]:
+        if not players:
+            return None
+        
+        # Split player name into first and last
+        name_parts = player_name.strip().split()
+        if len(name_parts) < 2:
+            logger.warning(f"Player name '{player_name}' doesn't have enough parts")
+            return None
+        
+        first_name = name_parts[0].lower()
+        last_name = name_parts[-1].lower()
+        
+        logger.info(f"Searching for player: {first_name} {last_name}")
+        if birth_year:
+            logger.info(f"With birth year: {birth_year}")
+        
+        match = players.find(first_name, last_name, birth_year, birth_month, birth_day)
+        if match is None:
+            logger.warning(f"No match found for player: {player_name}")
+            return None
+        
+        mlb_id = players.key_mlbam(match.row)
+        if match.similarity < 1:
+            logger.info(f"Using fuzzy match '{match.name}' (similarity {match.similarity:.2f}, "
+                        f"birthday score {match.birthday_score}): {mlb_id}")
+        elif match.same_name > 1 and match.birthday_score:
+            logger.info(f"Found exact match with birthday: {mlb_id}")
+        else:
+            logger.info(f"Found exact name match: {mlb_id}")
+        return match
+    
     def get_player_stats_by_id(self, mlb_id: int, pitching: bool = False) -> Optional[float]:
         """
         Get player stats using Baseball Reference ID
@@ -201,22 +186,52 @@ class BaseballDataService:
             logger.error(f"Error getting player stats for {mlb_id}: {e}")
             return None
     
+    @staticmethod
+    def _index_by_mlb_id(stats: pd.DataFrame, column: str) -> Dict[int, float]:
+        """Map each mlbID in a stats table to its value in column (first row wins)"""
+        ids = pd.to_numeric(stats['mlbID'], errors='coerce')
+        rows = ids.notna() & ~ids.duplicated()
+        return dict(zip(ids[rows].astype(int).tolist(), stats.loc[rows, column].tolist()))
+    
+    def load_stat_ranges(self):
+        """Fetch the league-wide batting and pitching ranges once and index them by mlbID"""
+        self._load_at_bats()
+        self._load_innings_pitched()
+    
+    def _load_at_bats(self):
+        with self._load_locks['batting']:
+            if self._at_bats_by_id is None:
+                end_date = date.today().strftime('%Y-%m-%d')
+                logger.info(f"Fetching batting stats from {STATS_START_DATE} to {end_date}")
+                stats = self.fetcher.call(batting_stats_range, STATS_START_DATE, end_date)
+                self._at_bats_by_id = self._index_by_mlb_id(stats, 'AB')
+                logger.info(f"Indexed {len(self._at_bats_by_id)} batters by mlbID")
+            return self._at_bats_by_id
+    
+    def _load_innings_pitched(self):
+        with self._load_locks['pitching']:
+            if self._innings_pitched_by_id is None:
+                end_date = date.today().strftime('%Y-%m-%d')
+                logger.info(f"Fetching pitching stats from {STATS_START_DATE} to {end_date}")
+                stats = self.fetcher.call(pitching_stats_range, STATS_START_DATE, end_date)
+                self._innings_pitched_by_id = self._index_by_mlb_id(stats, 'IP')
+                logger.info(f"Indexed {len(self._innings_pitched_by_id)} pitchers by mlbID")
+            return self._innings_pitched_by_id
+    
     def _get_innings_pitched(self, mlb_id: int) -> Optional[float]:
         """
         Get innings pitched for a player
         """
-        stats = pitching_stats_range('2022-05-01', date.today().strftime('%Y-%m-%d'))
-        return stats[stats['mlbID'].astype(int) == mlb_id]['IP'].iloc[0]
+        return self._load_innings_pitched().get(int(mlb_id))
     
     
     def _get_at_bats(self, mlb_id: int) -> Optional[float]:
         """
         Get at bats for a player
         """
-        stats = batting_stats_range('2022-05-01', date.today().strftime('%Y-%m-%d'))
-        return stats[stats['mlbID'].astype(int) == mlb_id]['AB'].iloc[0]
+        return self._load_at_bats().get(int(mlb_id))
     
-    def search_player(self, player_name: str, players: pd.DataFrame, birth_year: Optional[int] = None,
+    def search_player(self, player_name: str, players: PlayerNameIndex, birth_year: Optional[int] = None,
                      birth_month: Optional[int] = None, birth_day: Optional[int] = None, pitching: bool = False) -> Optional[float]:
         """
         Search for a player using Chadwick Bureau lookup
@@ -246,7 +261,7 @@ class BaseballDataService:
             return None
     
     
-    def get_mlb_appearances(self, player_name: str, players: pd.DataFrame, pitching: bool = False) -> Optional[float]:
+    def get_mlb_appearances(self, player_name: str, players: PlayerNameIndex, pitching: bool = False) -> Optional[float]:
         """
         Get MLB-only appearances (at bats or innings pitched) for a player
         
@@ -257,9 +272,7 @@ class BaseballDataService:
             Count of either at bats or innings pitched as float
         """
         try:
-            # Rate limiting
-            time.sleep(5)
-            
+            # Lookups are local; only the fetches behind them are rate limited
             player_data = self.search_player(player_name, players, pitching=pitching)
             if not player_data:
                 return None
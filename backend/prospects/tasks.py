@@ -1,4 +1,5 @@
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 import logging
@@ -19,16 +20,35 @@ def update_prospect_stats():
     # Get all prospects that might have MLB appearances
     prospects = Prospect.objects.all()
     error_count = 0
+    matched_count = 0
     
     baseball_service = get_baseball_data_service()
-    players = baseball_service.load_chadwick_data()
+    # One download of each stat range for the whole run, fetched concurrently with the register.
+    # The register is only needed to match prospects that have no stored ids yet.
+    needs_matching = prospects.filter(mlbam_id__isnull=True).exists()
+    players = baseball_service.prepare_import(load_register=needs_matching)
+    review_confidence = getattr(settings, 'STATS_IMPORT_REVIEW_CONFIDENCE', 0.9)
     
     for prospect in prospects:
         try:
-            # Get current MLB stats
             logger.info(f"Updating stats for {prospect.name}")
+            if prospect.mlbam_id is None:
+                # Match by name once; every later run looks the stats up by the stored id
+                ids = baseball_service.resolve_player_ids(prospect.name, players, prospect.date_of_birth)
+                if ids is None:
+                    logger.warning(f"No register match for {prospect.name}, skipping")
+                    continue
+                prospect.set_external_ids(**ids)
+                prospect.save()
+                matched_count += 1
+                logger.info(f"Matched {prospect.name} to {ids['matched_name']} ({ids['mlbam_id']}), "
+                            f"confidence {ids['confidence']}")
+                if ids['confidence'] < review_confidence:
+                    logger.warning(f"⚠️ Low confidence match for {prospect.name}, queued for review in the admin")
+            
+            # Get current MLB stats
             is_pitcher = prospect.position == 'P'
-            count = baseball_service.get_mlb_appearances(prospect.name, players, pitching=is_pitcher)
+            count = baseball_service.get_player_stats_by_id(prospect.mlbam_id, pitching=is_pitcher)
             if count is None:
                 logger.warning(f"No stats found for {prospect.name}, minor league only player?")
                 continue
@@ -51,5 +71,6 @@ def update_prospect_stats():
     
     return {
         'error_count': error_count,
+        'matched_count': matched_count,
         'total_prospects': prospects.count()
     }
@@ -0,0 +1,140 @@
+import random
+import threading
+import time
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing rate requests per second, with bursts of up to capacity"""
+
+    def __init__(self, rate: float, capacity: int, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, waiting until one is available"""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a source that has been failing"""
+
+
+class CircuitBreaker:
+    """Stops calling a failing source for a while.
+
+    After threshold consecutive failures the circuit opens and calls fail fast with
+    CircuitOpen. Once reset_timeout seconds have passed one trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._trial or self._clock() - self._opened_at < self.reset_timeout:
+                raise CircuitOpen(f"Stats source failed {self._failures} times in a row; retrying later")
+            self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("✅ Stats source recovered, closing circuit")
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            if self._opened_at is not None or self._failures >= self.threshold:
+                if self._opened_at is None:
+                    logger.error(f"❌ Stats source failed {self._failures} times in a row, opening circuit")
+                self._opened_at = self._clock()
+
+
+class ThrottledFetcher:
+    """Runs outbound requests through a shared rate limit, retries with backoff and a circuit breaker"""
+
+    def __init__(self, limiter: TokenBucket, breaker: CircuitBreaker, max_retries: int,
+                 backoff: float, sleep=time.sleep):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._sleep = sleep
+
+    def call(self, fetch, *args, **kwargs):
+        """Call fetch(*args, **kwargs), retrying failures with exponential backoff and jitter"""
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            self.limiter.acquire()
+            try:
+                result = fetch(*args, **kwargs)
+            except Exception as e:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries or self.breaker.is_open:
+                    raise
+                delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                attempt += 1
+                logger.warning(f"⚠️ {getattr(fetch, '__name__', 'Fetch')} failed ({e}), retry {attempt} in {delay:.1f}s")
+                self._sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_stats_fetcher() -> ThrottledFetcher:
+    """The process-wide fetcher shared by every stats import, configured from settings"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = ThrottledFetcher(
+                TokenBucket(
+                    getattr(settings, 'STATS_IMPORT_RATE_PER_SECOND', 0.5),
+                    getattr(settings, 'STATS_IMPORT_BURST', 2)
+                ),
+                CircuitBreaker(
+                    getattr(settings, 'STATS_IMPORT_BREAKER_THRESHOLD', 5),
+                    getattr(settings, 'STATS_IMPORT_BREAKER_RESET_SECONDS', 300)
+                ),
+                max_retries=getattr(settings, 'STATS_IMPORT_MAX_RETRIES', 3),
+                backoff=getattr(settings, 'STATS_IMPORT_BACKOFF_SECONDS', 2.0),
+            )
+        return _fetcher
@@ -11,12 +11,27 @@ from .serializers import (
     ProspectTagSerializer
 )
 from django.db import models
+from django.db.models import Prefetch
+from farm_system.fieldsets import SparseFieldsetViewMixin
+from farm_system.pagination import ProspectCursorPagination
 from .tasks import update_prospect_stats
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# Model columns needed by computed ProspectSerializer fields
+PROSPECT_FIELD_COLUMNS = {
+    'age': ['date_of_birth'],
+    'is_available': ['team'],
+    'is_eligible': ['at_bats', 'innings_pitched', 'tags_applied'],
+    'eligibility_status': ['position', 'at_bats', 'innings_pitched', 'tags_applied'],
+    'eligibility_threshold_ab': ['tags_applied'],
+    'eligibility_threshold_ip': ['tags_applied'],
+    'next_tag_cost': ['tags_applied'],
+}
+
+
 class IsProspectOwnerOrAdmin(permissions.BasePermission):
     """Custom permission to only allow prospect owners or admins to edit prospects"""
     
@@ -29,16 +44,29 @@ class IsProspectOwnerOrAdmin(permissions.BasePermission):
         return obj.team == request.user.team
 
 
-class ProspectViewSet(viewsets.ModelViewSet):
+class ProspectViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Prospect.objects.all()
     serializer_class = ProspectSerializer
     permission_classes = [IsProspectOwnerOrAdmin]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['position', 'organization', 'team']
+    pagination_class = ProspectCursorPagination
     
     def get_queryset(self):
         """Filter queryset based on user permissions"""
-        return Prospect.objects.select_related('team')
+        from bidding.models import Bid
+        
+        # Only join and prefetch the relations the requested fields will render
+        queryset = Prospect.objects.all()
+        for field in ('team', 'created_by', 'last_tagged_by'):
+            if self.expands(field):
+                queryset = queryset.select_related(f'{field}__owner')
+        if self.wants('current_bid'):
+            queryset = queryset.prefetch_related(
+                Prefetch('bids', queryset=Bid.objects.filter(status='active'), to_attr='active_bids')
+            )
+        
+        return self.restrict_columns(queryset, PROSPECT_FIELD_COLUMNS)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -47,19 +75,24 @@ class ProspectViewSet(viewsets.ModelViewSet):
             return ProspectUpdateSerializer
         return ProspectSerializer
     
+    def prospect_list_response(self, prospects):
+        """Render a page of prospects"""
+        page = self.paginate_queryset(prospects)
+        if page is None:
+            return Response(self.get_serializer(prospects, many=True).data)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+    
     @action(detail=False, methods=['get'])
     def my_prospects(self, request):
-        """Get prospects owned by the current user's team"""
+        """Get prospects owned by the current user's team (cursor paginated)"""
         prospects = self.get_queryset().filter(team=request.user.team)
-        serializer = self.get_serializer(prospects, many=True)
-        return Response(serializer.data)
+        return self.prospect_list_response(prospects)
     
     @action(detail=False, methods=['get'])
     def available(self, request):
-        """Get prospects available for bidding (not on any team)"""
+        """Get prospects available for bidding, not on any team (cursor paginated)"""
         prospects = self.get_queryset().filter(team__isnull=True)
-        serializer = self.get_serializer(prospects, many=True)
-        return Response(serializer.data)
+        return self.prospect_list_response(prospects)
     
     @action(detail=True, methods=['post'])
     def transfer(self, request, pk=None):
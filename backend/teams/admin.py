@@ -4,17 +4,17 @@ from .models import Team
 
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
-    list_display = ['name', 'owner', 'pom_balance', 'prospect_count', 'created_at']
+    list_display = ['name', 'owner', 'pom_balance', 'committed_pom', 'prospect_count', 'created_at']
     list_filter = ['created_at']
     search_fields = ['name', 'owner__username', 'owner__email']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['committed_pom', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Team Information', {
             'fields': ('name', 'owner')
         }),
         ('Financial', {
-            'fields': ('pom_balance',)
+            'fields': ('pom_balance', 'committed_pom')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
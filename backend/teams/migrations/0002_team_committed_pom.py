@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:04
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def backfill_committed_pom(apps, schema_editor):
+    Team = apps.get_model('teams', 'Team')
+    Bid = apps.get_model('bidding', 'Bid')
+    totals = Bid.objects.filter(status='active').values('current_bidder').annotate(
+        total=models.Sum('current_bid')
+    )
+    for row in totals:
+        Team.objects.filter(pk=row['current_bidder']).update(committed_pom=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0001_initial'),
+        ('bidding', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='committed_pom',
+            field=models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.RunPython(backfill_committed_pom, migrations.RunPython.noop),
+    ]
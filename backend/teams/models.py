@@ -12,6 +12,8 @@ class Team(models.Model):
     name = models.CharField(max_length=100, unique=True)
     owner = models.OneToOneField(User, on_delete=models.CASCADE, related_name='team')
     pom_balance = models.IntegerField(default=100, validators=[MinValueValidator(0)])
+    # POM tied up in active bids this team is leading, maintained by the bidding app
+    committed_pom = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -21,20 +23,30 @@ class Team(models.Model):
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        # committed_pom only moves through F() updates, so saving a loaded team never writes back a stale copy
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'committed_pom'
+            ]
+        super().save(*args, **kwargs)
+    
     @property
     def prospect_count(self):
         return self.prospects.count()
     
+    def get_committed_pom(self, exclude_bid=None):
+        """Get the POM committed to active bids where this team is the current bidder"""
+        committed_pom = self.committed_pom
+        if (exclude_bid is not None and exclude_bid.status == 'active'
+                and exclude_bid.current_bidder_id == self.id):
+            committed_pom -= exclude_bid.current_bid
+        return committed_pom
+    
     def can_afford_bid(self, amount, exclude_bid=None):
         """Check if team can afford a bid amount, considering all active bids"""
-        # Get total committed POM from active bids where this team is the current bidder
-        from bidding.models import Bid
-        committed_pom = Bid.objects.filter(
-            current_bidder=self,
-            status='active'
-        ).exclude(id=exclude_bid.id if exclude_bid else None).aggregate(
-            total=models.Sum('current_bid')
-        )['total'] or 0
+        committed_pom = self.get_committed_pom(exclude_bid=exclude_bid)
         
         # Available POM = current balance - committed POM
         available_pom = self.pom_balance - committed_pom
@@ -50,28 +62,60 @@ class Team(models.Model):
     
     def get_available_pom(self, exclude_bid=None):
         """Get the available POM balance (current balance minus committed bids)"""
+        return self.pom_balance - self.get_committed_pom(exclude_bid=exclude_bid)
+    
+    def calculate_committed_pom(self):
+        """Recompute committed POM from active bid rows (used for reconciliation)"""
         from bidding.models import Bid
-        committed_pom = Bid.objects.filter(
+        return Bid.objects.filter(
             current_bidder=self,
             status='active'
-        ).exclude(id=exclude_bid.id if exclude_bid else None).aggregate(
+        ).aggregate(
             total=models.Sum('current_bid')
         )['total'] or 0
-        
-        return self.pom_balance - committed_pom
+    
+    def reconcile_committed_pom(self):
+        """Reset committed POM from active bid rows, returning the drift that was corrected"""
+        actual = self.calculate_committed_pom()
+        drift = self.committed_pom - actual
+        if drift:
+            Team.objects.filter(pk=self.pk).update(committed_pom=actual)
+            self.committed_pom = actual
+        return drift
+    
+    @classmethod
+    def adjust_committed_pom(cls, team_id, delta):
+        """Atomically shift a team's committed POM by delta"""
+        if delta:
+            cls.objects.filter(pk=team_id).update(
+                committed_pom=models.F('committed_pom') + delta
+            )
+    
+    @classmethod
+    def commit_if_affordable(cls, team_id, amount):
+        """Atomically commit POM to a bid, only if the team's available POM covers it"""
+        return cls.objects.filter(
+            pk=team_id,
+            pom_balance__gte=models.F('committed_pom') + amount
+        ).update(
+            committed_pom=models.F('committed_pom') + amount
+        ) == 1
     
     def deduct_pom(self, amount):
-        """Deduct POM from team balance"""
-        if self.can_afford_bid(amount):
-            self.pom_balance -= amount
-            self.save()
-            return True
-        return False
+        """Deduct POM from team balance, only if the POM not committed to bids covers it"""
+        updated = Team.objects.filter(
+            pk=self.pk,
+            pom_balance__gte=models.F('committed_pom') + amount
+        ).update(
+            pom_balance=models.F('pom_balance') - amount
+        )
+        self.refresh_from_db(fields=['pom_balance', 'committed_pom'])
+        return updated == 1
     
     def add_pom(self, amount):
         """Add POM to team balance"""
-        self.pom_balance += amount
-        self.save()
+        Team.objects.filter(pk=self.pk).update(pom_balance=models.F('pom_balance') + amount)
+        self.refresh_from_db(fields=['pom_balance', 'committed_pom'])
 
 
 @receiver(post_save, sender=User)
@@ -88,4 +132,4 @@ def create_team_for_user(sender, instance, created, **kwargs):
 def save_team_for_user(sender, instance, **kwargs):
     """Save team when user is saved"""
     if hasattr(instance, 'team'):
-        instance.team.save() 
\ No newline at end of file
+        instance.team.save(update_fields=['name', 'updated_at']) 
\ No newline at end of file
@@ -1,6 +1,8 @@
 import logging
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.models import User
+from farm_system.fieldsets import SparseFieldsetSerializerMixin
 from .models import Team
 
 logger = logging.getLogger(__name__)
@@ -12,23 +14,36 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {'owner': False, 'prospects': True}
+    
     owner = UserSerializer(read_only=True)
     prospect_count = serializers.ReadOnlyField()
     prospects = serializers.SerializerMethodField()
     
     class Meta:
         model = Team
-        fields = ['id', 'name', 'owner', 'pom_balance', 'prospect_count', 'prospects', 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at']
+        fields = ['id', 'name', 'owner', 'pom_balance', 'committed_pom', 'prospect_count', 'prospects', 'created_at', 'updated_at']
+        read_only_fields = ['committed_pom', 'created_at', 'updated_at']
     
     def get_prospects(self, obj):
         from prospects.serializers import ProspectSerializer
         # Get all prospects for this team, regardless of permissions
-        prospects = obj.prospects.all().select_related('team')
+        # (uses the roster prefetched by TeamViewSet; each prospect's team is obj itself)
+        prospects = obj.prospects.all()
         return ProspectSerializer(prospects, many=True, context=self.context).data
 
 
+class CompactTeamSerializer(serializers.ModelSerializer):
+    """Team summary without the prospect roster, for side-loaded payloads"""
+    owner = serializers.CharField(source='owner.username', read_only=True)
+    
+    class Meta:
+        model = Team
+        fields = ['id', 'name', 'owner', 'pom_balance', 'committed_pom']
+        read_only_fields = fields
+
+
 class TeamCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Team
@@ -82,7 +97,21 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         logger.debug(f"Updating team name to: {team_name}")
         # Update the team name
         user.team.name = team_name
-        user.team.save()
+        user.team.save(update_fields=['name', 'updated_at'])
         
         logger.info(f"Successfully created user {user.username} with team {user.team.name}")
-        return user 
\ No newline at end of file
+        return user 
+
+
+class TeamTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair whose claims carry the username and team id, so WebSocket auth needs no DB lookups"""
+    
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['username'] = user.username
+        try:
+            token['team_id'] = user.team.id
+        except Team.DoesNotExist:
+            token['team_id'] = None
+        return token
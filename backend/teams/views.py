@@ -6,12 +6,16 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
+from django.db.models import Prefetch
+from farm_system.fieldsets import SparseFieldsetViewMixin
+from prospects.models import Prospect, serializable_prospects
 from .models import Team
 from .serializers import (
     TeamSerializer, 
     TeamCreateSerializer, 
     TeamUpdateSerializer,
-    UserRegistrationSerializer
+    UserRegistrationSerializer,
+    TeamTokenObtainPairSerializer
 )
 import logging
 
@@ -41,7 +45,7 @@ class IsTeamOwnerOrAdmin(permissions.BasePermission):
         return obj.owner == request.user
 
 
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
     permission_classes = [IsTeamOwnerOrAdmin]
@@ -50,7 +54,18 @@ class TeamViewSet(viewsets.ModelViewSet):
         """Filter queryset based on user permissions"""
         # All authenticated users can view all teams
         # But only team owners or admins can edit teams (handled by permission_classes)
-        return Team.objects.all()
+        # Only join and prefetch the relations the requested fields will render
+        queryset = Team.objects.all()
+        if self.expands('owner'):
+            queryset = queryset.select_related('owner')
+        if self.expands('prospects'):
+            queryset = queryset.prefetch_related(Prefetch('prospects', queryset=serializable_prospects()))
+        elif self.wants('prospects') or self.wants('prospect_count'):
+            queryset = queryset.prefetch_related(
+                Prefetch('prospects', queryset=Prospect.objects.only('id', 'team'))
+            )
+        
+        return self.restrict_columns(queryset)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -62,7 +77,7 @@ class TeamViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_team(self, request):
         """Get the current user's team"""
-        team = get_object_or_404(Team, owner=request.user)
+        team = get_object_or_404(self.get_queryset(), owner=request.user)
         serializer = self.get_serializer(team)
         return Response(serializer.data)
     
@@ -130,6 +145,7 @@ class UserRegistrationViewSet(viewsets.GenericViewSet):
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     """Custom token view that provides specific error messages"""
+    serializer_class = TeamTokenObtainPairSerializer
     
     def post(self, request, *args, **kwargs):
         username = request.data.get('username')
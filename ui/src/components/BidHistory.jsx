@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
 import { useAuth } from '../context/AuthContext'
 import api from '../services/api'
+import socket, { BIDDING_STREAM } from '../services/socket'
 import { formatDistanceToNow } from 'date-fns'
 
 function BidHistory() {
@@ -19,38 +20,24 @@ function BidHistory() {
   useEffect(() => {
     loadBidHistory()
     
-    // Set up WebSocket connection for real-time updates
-    const ws = new WebSocket('ws://localhost:8000/ws/bidding/')
-    
-    ws.onopen = () => {
-      console.log('WebSocket connected for bid history')
-    }
-    
-    ws.onmessage = (event) => {
-      const data = JSON.parse(event.data)
-      
-      // Handle different types of WebSocket messages
-      if (data.type === 'bid_placed' && data.prospect_id === parseInt(prospectId)) {
-        // Refresh bid history when a new bid is placed
-        loadBidHistory()
-      } else if (data.type === 'bid_completed' && data.prospect_id === parseInt(prospectId)) {
-        // Refresh bid history when a bid is completed
-        loadBidHistory()
+    // Real-time updates over the shared socket, only about this prospect's auctions
+    return socket.listen({
+      streams: [BIDDING_STREAM],
+      filter: { prospects: [parseInt(prospectId)] },
+      snapshot: false,
+      onMessage: (data) => {
+        // Bid events carry the full updated bid, so apply them in place
+        if (data.prospect_id !== parseInt(prospectId) || !data.data || !data.data.bid) {
+          return
+        }
+        if (data.type === 'bid_placed' || data.type === 'bid_completed' || data.type === 'new_bid') {
+          const bid = api.hydrateBidEvent(data.data)
+          setBids(bids => bids.some(existing => existing.id === bid.id)
+            ? bids.map(existing => existing.id === bid.id ? bid : existing)
+            : [bid, ...bids])
+        }
       }
-    }
-    
-    ws.onerror = (error) => {
-      console.error('WebSocket error:', error)
-    }
-    
-    ws.onclose = () => {
-      console.log('WebSocket disconnected')
-    }
-    
-    // Cleanup WebSocket on component unmount
-    return () => {
-      ws.close()
-    }
+    })
   }, [prospectId])
 
   const loadBidHistory = async () => {
@@ -72,7 +59,7 @@ function BidHistory() {
       setPlacingBid(true)
       setBidError(null)
       
-      await api.placeBid(bidId, amount)
+      await socket.placeBid(bidId, amount)
       
       // Refresh bid history after successful bid
       await loadBidHistory()
@@ -2,10 +2,19 @@ import React, { useState, useEffect } from 'react'
 import { useAuth } from '../context/AuthContext'
 import { useNavigate } from 'react-router-dom'
 import api from '../services/api'
+import socket, { BIDDING_STREAM } from '../services/socket'
 import { formatDistanceToNow } from 'date-fns'
 
+// Replace a bid in place, or add it to the front if it is new
+const upsertBid = (bids, bid) => {
+  if (bids.some(existing => existing.id === bid.id)) {
+    return bids.map(existing => existing.id === bid.id ? bid : existing)
+  }
+  return [bid, ...bids]
+}
+
 function Bidding() {
-  const { team, refreshTeam } = useAuth()
+  const { team, refreshTeam, applyTeamBalances } = useAuth()
   const navigate = useNavigate()
   const [activeBids, setActiveBids] = useState([])
   const [completedBids, setCompletedBids] = useState([])
@@ -25,41 +34,64 @@ function Bidding() {
   })
 
   useEffect(() => {
-    loadBids()
+    // Active bids arrive as a snapshot over the shared socket
+    loadCompletedBids()
     
-    // Set up WebSocket connection for real-time updates
-    const ws = new WebSocket('ws://localhost:8000/ws/bidding/')
+    let hasSnapshot = false
+    let loadedOverRest = false
     
-    ws.onopen = () => {
-      console.log('WebSocket connected for bidding')
-    }
-    
-    ws.onmessage = (event) => {
-      console.log('WebSocket message received:', event.data)
-      const data = JSON.parse(event.data)
+    // Bid events carry the full updated bid, so apply them in place
+    const applyBidEvent = (data) => {
+      if (!data.data || !data.data.bid) {
+        return
+      }
+      const bid = api.hydrateBidEvent(data.data)
+      Object.values(data.data.included.teams).forEach(applyTeamBalances)
       
-      // Handle different types of WebSocket messages
-      if (data.type === 'bid_placed' || data.type === 'bid_completed' || data.type === 'new_bid') {
-        console.log('Refreshing bids due to:', data.type)
-        // Refresh bids when any bid activity occurs
-        loadBids()
-        refreshTeam()
+      if (data.type === 'bid_placed' || data.type === 'new_bid') {
+        setActiveBids(bids => upsertBid(bids, bid))
+      } else if (data.type === 'bid_completed') {
+        setActiveBids(bids => bids.filter(existing => existing.id !== bid.id))
+        setCompletedBids(bids => upsertBid(bids, bid))
+      } else if (data.type === 'bid_cancelled') {
+        setActiveBids(bids => bids.filter(existing => existing.id !== bid.id))
       }
     }
     
-    ws.onerror = (error) => {
-      console.error('WebSocket error:', error)
-    }
-    
-    ws.onclose = () => {
-      console.log('WebSocket disconnected')
-    }
-    
-    // Cleanup WebSocket on component unmount
-    return () => {
-      ws.close()
+    // The shared socket dedups events and resumes the stream after a reconnect
+    return socket.listen({
+      streams: [BIDDING_STREAM],
+      onMessage: (data) => {
+        // The whole board, on connect or when a gap was too old to replay
+        if (data.type === 'snapshot') {
+          setActiveBids(api.hydrateCompactBids(data.data))
+          Object.values(data.data.included.teams).forEach(applyTeamBalances)
+          hasSnapshot = true
+          setLoading(false)
+          return
+        }
+        applyBidEvent(data)
+      },
+      onStatus: (connected) => {
+        // Never got a snapshot: show the board over REST while the socket keeps retrying
+        if (!connected && !hasSnapshot && !loadedOverRest) {
+          loadedOverRest = true
+          loadBids()
+        }
+      }
+    })
+  }, [])
+  
+  // The WebSocket event updates the board; only refetch when it is not connected
+  const refreshIfDisconnected = async () => {
+    if (socket.isOpen()) {
+      return
     }
-  }, [refreshTeam])
+    await Promise.all([
+      loadBids(),
+      refreshTeam()
+    ])
+  }
 
   const loadBids = async () => {
     try {
@@ -78,6 +110,14 @@ function Bidding() {
     }
   }
 
+  const loadCompletedBids = async () => {
+    try {
+      setCompletedBids(await api.getCompletedBids())
+    } catch (error) {
+      setError('Failed to load bids: ' + error.message)
+    }
+  }
+
   const handleNominate = async (e) => {
     e.preventDefault()
     try {
@@ -92,7 +132,7 @@ function Bidding() {
       }
       
       console.log('Creating bid with data:', { prospectData, startingBid: nominationForm.startingBid })
-      await api.createBid(prospectData, nominationForm.startingBid)
+      await socket.nominate(prospectData, nominationForm.startingBid)
       setShowNominateModal(false)
       setNominationForm({
         name: '',
@@ -104,11 +144,7 @@ function Bidding() {
         startingBid: 5
       })
       
-      // Refresh both bids and team data
-      await Promise.all([
-        loadBids(),
-        refreshTeam()
-      ])
+      await refreshIfDisconnected()
     } catch (error) {
       console.error('Nomination error:', error)
       setBidError(error.message)
@@ -120,13 +156,8 @@ function Bidding() {
   const handleBid = async (bidId, amount) => {
     try {
       console.log(`Frontend: Attempting to place bid ${amount} POM`)
-      await api.placeBid(bidId, amount)
-      
-      // Refresh both bids and team data
-      await Promise.all([
-        loadBids(),
-        refreshTeam()
-      ])
+      await socket.placeBid(bidId, amount)
+      await refreshIfDisconnected()
       
       console.log(`Bid placed successfully: ${amount} POM`)
     } catch (error) {
@@ -1,5 +1,6 @@
 import React, { createContext, useContext, useState, useEffect } from 'react'
 import api from '../services/api'
+import socket, { teamStream } from '../services/socket'
 
 const AuthContext = createContext()
 
@@ -102,6 +103,39 @@ export function AuthProvider({ children }) {
         }
     }
 
+    // Apply balances pushed over the WebSocket when they belong to our team
+    const applyTeamBalances = (balances) => {
+        setTeam(current => {
+            if (!current || current.id !== balances.id) {
+                return current
+            }
+            return {
+                ...current,
+                pom_balance: balances.pom_balance,
+                committed_pom: balances.committed_pom,
+            }
+        })
+    }
+
+    // Follow our team's stream on the shared socket for balance updates
+    const teamId = team ? team.id : null
+    useEffect(() => {
+        // The socket authenticates when it connects, so reconnect when the user changes
+        socket.reconnect()
+        if (!teamId) {
+            return
+        }
+        return socket.listen({
+            streams: [teamStream(teamId)],
+            onMessage: (data) => {
+                // Outbid events carry our balances after the POM committed to that auction was released
+                if (data.type === 'snapshot' || data.type === 'team_update' || data.type === 'outbid') {
+                    applyTeamBalances({ id: data.data.team_id, ...data.data })
+                }
+            }
+        })
+    }, [teamId])
+
     const value = {
         user,
         team,
@@ -112,6 +146,7 @@ export function AuthProvider({ children }) {
         logout,
         updateTeam,
         refreshTeam,
+        applyTeamBalances,
         isAuthenticated: !!user,
     }
 
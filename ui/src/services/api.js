@@ -34,7 +34,8 @@ class ApiService {
 
     // Generic request method
     async request(endpoint, options = {}) {
-        const url = `${this.baseURL}${endpoint}`;
+        // Pagination links (`next`/`previous`) are already absolute URLs
+        const url = endpoint.startsWith('http') ? endpoint : `${this.baseURL}${endpoint}`;
         const config = {
             headers: this.getHeaders(),
             ...options,
@@ -129,6 +130,24 @@ class ApiService {
         }
     }
 
+    // Follow cursor pagination `next` links and return every page
+    async requestAllPages(endpoint) {
+        const pages = [];
+        let next = endpoint;
+        while (next) {
+            const page = await this.request(next);
+            pages.push(page);
+            next = page.next;
+        }
+        return pages;
+    }
+
+    // Fetch every page of a paginated listing as one array
+    async requestAll(endpoint) {
+        const pages = await this.requestAllPages(endpoint);
+        return pages.flatMap(page => page.results);
+    }
+
     // Authentication
     async login(username, password) {
         const response = await this.request('/token/', {
@@ -188,15 +207,15 @@ class ApiService {
 
     // Prospects
     async getProspects() {
-        return await this.request('/prospects/');
+        return await this.requestAll('/prospects/');
     }
 
     async getMyProspects() {
-        return await this.request('/prospects/my_prospects/');
+        return await this.requestAll('/prospects/my_prospects/');
     }
 
     async getAvailableProspects() {
-        return await this.request('/prospects/available/');
+        return await this.requestAll('/prospects/available/');
     }
 
     async createProspect(prospectData) {
@@ -233,23 +252,44 @@ class ApiService {
 
     // Bidding
     async getBids() {
-        return await this.request('/bids/');
+        return await this.requestAll('/bids/');
+    }
+
+    // Rebuild nested bids from a compact response, where teams and prospects
+    // are referenced by id and sent once in the top-level `included` map
+    hydrateCompactBids(payload) {
+        const { teams, prospects } = payload.included;
+        const bids = payload.results || payload.bids;
+        return bids.map(bid => ({
+            ...bid,
+            prospect: prospects[bid.prospect],
+            nominator: teams[bid.nominator],
+            current_bidder: teams[bid.current_bidder],
+            history: bid.history.map(entry => ({ ...entry, team: teams[entry.team] })),
+        }));
+    }
+
+    // Rebuild one nested bid from a WebSocket event carrying `bid` and `included`
+    hydrateBidEvent(data) {
+        return this.hydrateCompactBids({ bids: [data.bid], included: data.included })[0];
     }
 
     async getActiveBids() {
-        return await this.request('/bids/active/');
+        const pages = await this.requestAllPages('/bids/active/?compact=true');
+        return pages.flatMap(page => this.hydrateCompactBids(page));
     }
 
     async getCompletedBids() {
-        return await this.request('/bids/completed/');
+        const pages = await this.requestAllPages('/bids/completed/?compact=true');
+        return pages.flatMap(page => this.hydrateCompactBids(page));
     }
 
     async getMyBids() {
-        return await this.request('/bids/my_bids/');
+        return await this.requestAll('/bids/my_bids/');
     }
 
     async getMyWinningBids() {
-        return await this.request('/bids/my_winning/');
+        return await this.requestAll('/bids/my_winning/');
     }
 
     async createBid(prospectData, startingBid) {
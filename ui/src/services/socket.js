@@ -0,0 +1,320 @@
+import api from './api';
+
+// Use environment variable for the WebSocket URL
+const WS_BASE_URL = import.meta.env.VITE_WS_URL || 'ws://localhost:8000/ws';
+
+export const BIDDING_STREAM = 'bidding_updates';
+
+export const teamStream = (teamId) => `team_${teamId}`;
+
+// Close code the server uses when the access token has expired
+const TOKEN_EXPIRED = 4401;
+
+// How long to wait for the reply to a bid or nomination sent over the socket
+const REQUEST_TIMEOUT = 10000;
+
+// One multiplexed WebSocket (ws/stream/) shared by every component. It carries the
+// bidding stream and the user's team stream, tracks the last sequence number applied
+// per stream, and resumes each stream after a reconnect.
+class StreamSocket {
+    constructor() {
+        this.ws = null;
+        this.listeners = new Set();
+        this.lastSeq = {};
+        this.resumingFrom = {};
+        this.skipped = {};
+        this.pendingSnapshots = new Set();
+        this.subscription = null;
+        this.reconnectTimer = null;
+        this.pendingRequests = new Map();
+        this.lastRequestId = 0;
+    }
+
+    isOpen() {
+        return !!this.ws && this.ws.readyState === WebSocket.OPEN;
+    }
+
+    // Receive the messages of some streams. Options:
+    //   streams   - stream names, e.g. [BIDDING_STREAM, teamStream(team.id)]
+    //   filter    - bidding topics ({ prospects: [id] }, see the subscribe message), or null for the whole feed
+    //   snapshot  - request a snapshot of each stream first (default true)
+    //   onMessage - called with every message on those streams, in sequence order
+    //   onStatus  - called with true/false when the socket opens or closes
+    // Returns a function that stops listening.
+    listen({ streams, filter = null, snapshot = true, onMessage, onStatus }) {
+        const listener = { streams, filter, snapshot, onMessage, onStatus };
+        this.listeners.add(listener);
+
+        if (snapshot) {
+            streams.forEach(stream => this.pendingSnapshots.add(stream));
+        }
+        if (this.isOpen()) {
+            this.sendPendingSnapshots();
+            this.updateSubscription();
+        } else {
+            this.connect();
+        }
+
+        return () => {
+            this.listeners.delete(listener);
+            if (this.listeners.size === 0) {
+                this.close();
+            } else {
+                this.updateSubscription();
+            }
+        };
+    }
+
+    // Reconnect, e.g. after login or logout, since the socket authenticates when it connects
+    reconnect() {
+        if (!this.ws) {
+            return;
+        }
+        this.disconnect();
+        this.connect();
+    }
+
+    connect() {
+        if (this.ws || this.listeners.size === 0) {
+            return;
+        }
+        clearTimeout(this.reconnectTimer);
+
+        // The access token goes in the subprotocols rather than the URL, which may be logged
+        const ws = api.token
+            ? new WebSocket(`${WS_BASE_URL}/stream/`, ['bearer', api.token])
+            : new WebSocket(`${WS_BASE_URL}/stream/`);
+        this.ws = ws;
+
+        ws.onopen = () => {
+            console.log('WebSocket connected');
+            this.resumingFrom = {};
+            this.subscription = null;
+            this.updateSubscription();
+            // Replay what we missed on streams we are following, snapshot the rest
+            this.wantedStreams().forEach(stream => {
+                if (this.pendingSnapshots.has(stream)) {
+                    return;
+                }
+                if (this.lastSeq[stream] !== undefined) {
+                    this.resume(stream);
+                } else if (this.wantsSnapshot(stream)) {
+                    this.pendingSnapshots.add(stream);
+                }
+            });
+            this.sendPendingSnapshots();
+            this.notifyStatus(true);
+        };
+
+        ws.onmessage = (event) => {
+            this.handleMessage(JSON.parse(event.data));
+        };
+
+        ws.onerror = (error) => {
+            console.error('WebSocket error:', error);
+        };
+
+        ws.onclose = (event) => {
+            if (ws !== this.ws) {
+                return; // replaced by reconnect()
+            }
+            console.log('WebSocket disconnected');
+            this.ws = null;
+            this.failPendingRequests();
+            this.notifyStatus(false);
+            if (this.listeners.size === 0) {
+                return;
+            }
+            if (event.code === TOKEN_EXPIRED) {
+                // Reconnect with a fresh token, or stay closed until the user logs in again
+                api.refreshToken()
+                    .then(() => this.connect())
+                    .catch(error => console.error('WebSocket token expired:', error));
+                return;
+            }
+            this.reconnectTimer = setTimeout(() => this.connect(), 1000);
+        };
+    }
+
+    // Close the socket once nobody is listening; the next listener starts from a snapshot
+    close() {
+        this.disconnect();
+        this.lastSeq = {};
+        this.skipped = {};
+        this.pendingSnapshots.clear();
+    }
+
+    disconnect() {
+        clearTimeout(this.reconnectTimer);
+        if (this.ws) {
+            const ws = this.ws;
+            this.ws = null;
+            ws.close();
+            this.failPendingRequests();
+        }
+    }
+
+    send(message) {
+        if (this.isOpen()) {
+            this.ws.send(JSON.stringify(message));
+        }
+    }
+
+    // Place a bid over the socket, or through the API while it is closed
+    placeBid(bidId, amount) {
+        if (!this.isOpen()) {
+            return api.placeBid(bidId, amount);
+        }
+        return this.request({ type: 'place_bid', bid_id: bidId, amount });
+    }
+
+    // Nominate a prospect over the socket, or through the API while it is closed
+    nominate(prospectData, startingBid) {
+        if (!this.isOpen()) {
+            return api.createBid(prospectData, startingBid);
+        }
+        return this.request({ type: 'nominate', prospect: prospectData, starting_bid: startingBid });
+    }
+
+    // Send a request and resolve with its ack, or reject with the server's error
+    request(message) {
+        const requestId = ++this.lastRequestId;
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(() => {
+                this.pendingRequests.delete(requestId);
+                reject(new Error('No response from the server. Check whether your bid went through.'));
+            }, REQUEST_TIMEOUT);
+            this.pendingRequests.set(requestId, { resolve, reject, timer });
+            this.send({ ...message, request_id: requestId });
+        });
+    }
+
+    settleRequest(data) {
+        const pending = this.pendingRequests.get(data.request_id);
+        this.pendingRequests.delete(data.request_id);
+        clearTimeout(pending.timer);
+
+        if (data.type === 'bid_outbid') {
+            const error = new Error(`You were outbid. The current bid is now ${data.current_bid} POM`);
+            error.outbid = true;
+            error.currentBid = data.current_bid;
+            pending.reject(error);
+        } else if (data.type === 'bid_error') {
+            pending.reject(new Error(data.error));
+        } else {
+            pending.resolve(data);
+        }
+    }
+
+    failPendingRequests() {
+        this.pendingRequests.forEach(pending => {
+            clearTimeout(pending.timer);
+            pending.reject(new Error('Connection lost. Check whether your bid went through.'));
+        });
+        this.pendingRequests.clear();
+    }
+
+    wantedStreams() {
+        const streams = new Set();
+        this.listeners.forEach(listener => listener.streams.forEach(stream => streams.add(stream)));
+        return streams;
+    }
+
+    wantsSnapshot(stream) {
+        return [...this.listeners].some(listener => listener.snapshot && listener.streams.includes(stream));
+    }
+
+    sendPendingSnapshots() {
+        this.pendingSnapshots.forEach(stream => this.send({ type: 'snapshot', stream }));
+        this.pendingSnapshots.clear();
+    }
+
+    // Ask the server for the events after the last one we applied
+    resume(stream) {
+        if (this.resumingFrom[stream] === this.lastSeq[stream]) {
+            return;
+        }
+        this.resumingFrom[stream] = this.lastSeq[stream];
+        this.send({ type: 'resume', stream, last_seq: this.lastSeq[stream] });
+    }
+
+    // Subscribe to the union of the listeners' bidding topics, or the whole feed if any listener wants it
+    updateSubscription() {
+        const listeners = [...this.listeners].filter(listener => listener.streams.includes(BIDDING_STREAM));
+        const topics = {};
+        if (listeners.length > 0 && listeners.every(listener => listener.filter)) {
+            listeners.forEach(listener => {
+                Object.entries(listener.filter).forEach(([key, values]) => {
+                    topics[key] = Array.isArray(values)
+                        ? [...new Set([...(topics[key] || []), ...values])]
+                        : topics[key] || values;
+                });
+            });
+        }
+
+        const subscription = JSON.stringify(topics);
+        if (subscription === (this.subscription || '{}')) {
+            return;
+        }
+        this.subscription = subscription;
+        this.send({ type: 'subscribe', ...topics });
+    }
+
+    handleMessage(data) {
+        // Replies to our own bids and nominations
+        if (data.request_id !== undefined && this.pendingRequests.has(data.request_id)) {
+            this.settleRequest(data);
+            return;
+        }
+
+        const stream = data.stream;
+
+        // Events a slow connection skipped because a newer event about the same bid replaced them
+        if (data.type === 'coalesced') {
+            this.skipped[stream] = new Set([...(this.skipped[stream] || []), ...data.seqs]);
+            return;
+        }
+
+        // The whole state of a stream, on request or when a gap was too old to replay
+        if (data.type === 'snapshot') {
+            this.lastSeq[stream] = data.seq;
+            delete this.resumingFrom[stream];
+            delete this.skipped[stream];
+        } else if (data.seq !== undefined && data.seq !== null) {
+            let lastSeq = this.lastSeq[stream];
+            const skipped = this.skipped[stream];
+            while (skipped && lastSeq !== undefined && skipped.delete(lastSeq + 1)) {
+                lastSeq += 1;
+                this.lastSeq[stream] = lastSeq;
+            }
+            if (lastSeq !== undefined) {
+                if (data.seq <= lastSeq) {
+                    return; // already applied
+                }
+                // A filtered bidding feed skips the sequence numbers of other topics
+                const filtered = stream === BIDDING_STREAM && this.subscription && this.subscription !== '{}';
+                if (data.seq > lastSeq + 1 && !filtered) {
+                    this.resume(stream); // missed events; they are replayed in order
+                    return;
+                }
+            }
+            this.lastSeq[stream] = data.seq;
+        }
+
+        this.listeners.forEach(listener => {
+            if (listener.streams.includes(stream) && listener.onMessage) {
+                listener.onMessage(data);
+            }
+        });
+    }
+
+    notifyStatus(connected) {
+        this.listeners.forEach(listener => {
+            if (listener.onStatus) {
+                listener.onStatus(connected);
+            }
+        });
+    }
+}
+
+export default new StreamSocket();